@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+"""Differential check: utils.parse_command consumers vs. the inline parsing they replaced.
+
+Usage:
+    python3 command_parse_diff.py [--random N] [--seed N]
+
+smart_approve.decompose_command() and protect_files.extract_file_targets()
+must return exactly what reference_decompose() / reference_targets() (verbatim
+copies of the per-hook parsing) return, for every command in the corpus: the
+Bash commands in the eval files, a handful of hand-written edge cases, and
+random operator/subshell/quote soup. Each command is checked cold and from the
+in-process LRU. Exits 1 on any mismatch.
+"""
+
+import argparse
+import json
+import random
+import re
+import shlex
+import sys
+import time
+from pathlib import Path
+
+EVALS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(EVALS_DIR.parent / "scripts"))
+
+import protect_files  # noqa: E402
+import smart_approve  # noqa: E402
+import utils  # noqa: E402
+
+EDGE_CASES = [
+    "find . -name '*.pem' -exec cat {} \\; && ls",
+    "find . -exec rm {} ; echo done",
+    "cat $(echo .env) | tee >(gzip > out.gz) <(cat ~/.ssh/id_rsa)",
+    "echo `cat .env`; X=$(cat secrets) y",
+    "for f in *.md; do cat $f; done",
+    "cat <<EOF\n.env\nEOF\necho ok",
+    "git status && git push --force origin main",
+    "echo 'unterminated",
+    "echo $((1 + 2)) && cat 'a b'",
+    "bash -c 'cat .env' || eval cat .env",
+    "ls \\\n  -la",
+]
+PIECES = [
+    "cat", ".env", "ls", "-la", "&&", "||", ";", "|", "\n", "$(", ")", "`",
+    "'", '"', "<(", ">(", "find", "-exec", "{}", "\\;", "echo", "X=1", "do",
+    "done", "<<EOF", "EOF", "git", "push", "xargs", "$((", "~/.ssh/id_rsa",
+]
+
+
+def reference_decompose(command: str) -> list[str]:
+    """smart_approve.decompose_command() before utils.parse_command."""
+    all_commands = []
+    for seg in utils.split_on_operators(command):
+        for sub in utils.extract_subshells(seg):
+            for ss in utils.split_on_operators(sub):
+                normalized = smart_approve.normalize_command(ss)
+                if normalized:
+                    all_commands.append(normalized)
+        normalized = smart_approve.normalize_command(seg)
+        if normalized:
+            all_commands.append(normalized)
+    return [
+        cmd
+        for cmd in all_commands
+        if not smart_approve.is_shell_structural(cmd)
+        and not smart_approve.is_standalone_assignment(cmd)
+    ]
+
+
+def reference_targets(command: str) -> list[str]:
+    """protect_files.extract_file_targets() before utils.parse_command."""
+    targets = []
+    raw_commands = utils.split_on_operators(command, protect_exec=True)
+    for sub in utils.extract_subshells(command):
+        raw_commands.extend(utils.split_on_operators(sub, protect_exec=True))
+    for m in utils.PROCESS_SUBSTITUTION_RE.finditer(command):
+        raw_commands.extend(utils.split_on_operators(m.group(1), protect_exec=True))
+    raw_commands = [
+        c
+        for c in raw_commands
+        if not protect_files.is_shell_structural(c)
+        and not protect_files.is_standalone_assignment(c)
+    ]
+    for sub in raw_commands:
+        neutralized = utils.neutralize_subshells(sub)
+        try:
+            tokens = shlex.split(neutralized)
+        except ValueError:
+            tokens = neutralized.split()
+        targets.extend(protect_files.extract_targets_from_tokens(tokens))
+    if re.search(r"\b(eval|xargs)\b", command):
+        try:
+            words = shlex.split(command)
+        except ValueError:
+            words = command.split()
+        for word in words:
+            if any(kw in word for kw in protect_files.PROTECTED_KEYWORDS):
+                targets.append(word)
+    return [protect_files.expand_env_vars(t) for t in targets]
+
+
+def build_corpus(n_random: int, rng: random.Random) -> list[str]:
+    corpus = set(EDGE_CASES)
+    for evals_file in EVALS_DIR.glob("*.json"):
+        for case in json.loads(evals_file.read_text()).get("cases", []):
+            command = (case.get("input") or {}).get("tool_input", {}).get("command")
+            if isinstance(command, str):
+                corpus.add(command)
+    for _ in range(n_random):
+        corpus.add(" ".join(rng.choice(PIECES) for _ in range(rng.randint(1, 12))))
+    return sorted(corpus)
+
+
+def check_all(corpus: list[str]) -> int:
+    mismatches = 0
+    for rnd in ("cold", "lru"):
+        for cmd in corpus:
+            for label, got, expected in (
+                ("decompose", smart_approve.decompose_command(cmd), reference_decompose(cmd)),
+                ("targets", protect_files.extract_file_targets(cmd), reference_targets(cmd)),
+            ):
+                if got != expected:
+                    mismatches += 1
+                    if mismatches <= 20:
+                        print(f"  MISMATCH [{label}/{rnd}] {cmd!r}: expected {expected!r}, got {got!r}")
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--random", type=int, default=3000, help="random commands")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    corpus = build_corpus(args.random, random.Random(args.seed))
+
+    utils.parse_command.cache_clear()
+    failed = check_all(corpus)
+
+    start = time.perf_counter()
+    for cmd in corpus:
+        reference_decompose(cmd)
+        reference_targets(cmd)
+    reference_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for cmd in corpus:
+        smart_approve.decompose_command(cmd)
+        protect_files.extract_file_targets(cmd)
+    cached_s = time.perf_counter() - start
+
+    status = "PASS" if not failed else "FAIL"
+    print(
+        f"  {status}  {len(corpus)} commands x (cold, lru), {failed} mismatches "
+        f"(inline {reference_s / len(corpus) * 1e6:.1f} µs/cmd, "
+        f"shared parse {cached_s / len(corpus) * 1e6:.1f} µs/cmd)"
+    )
+    print(f"\n{'=' * 40}")
+    print(f"TOTAL: {failed} mismatches")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+"""Differential check: protect_files.PathPolicy vs. the per-pattern loop it replaced.
+
+Usage:
+    python3 protect_files_policy_diff.py [--random N] [--seed N]
+
+For PROTECTED_PATTERNS (case-folded), ALLOWED_PATTERNS and a few synthetic
+pattern lists, every path in the corpus must get the same first matching
+pattern from PathPolicy.match() as from reference_match(), a verbatim copy of
+the fnmatch + Path.match loop. The corpus holds paths derived from each
+pattern (wildcards filled in, in both cases, under several prefixes),
+random component soup, and the files in this repo. Exits 1 on any mismatch.
+"""
+
+import argparse
+import fnmatch
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+EVALS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = EVALS_DIR.parent.parent
+sys.path.insert(0, str(EVALS_DIR.parent / "scripts"))
+
+import protect_files  # noqa: E402
+
+SYNTHETIC_PATTERN_LISTS = [
+    ["*", "*.md", "a[!b]c", "/abs/**/x", "**", "docs/*/index.md", "?"],
+    ["/tmp/**", "*.tar.gz", "**/build/*", "x/**/y/**/z", "**/.cache", "[ab]*/c"],
+]
+COMPONENTS = [
+    ".env", ".ENV", ".env.local", "secrets", "Secrets", "id_rsa", "id_rsa.pub",
+    "id_ed25519", "x.pem", "X.PEM", "key.key", "config", ".git", "hooks",
+    "proc", "self", "environ", "tmp", "Desktop", "a.md", "b.png", ".claude",
+    "settings.json", ".ssh", ".aws", "credentials", "kubeconfig", ".kube",
+    "main.tf", "state.tfstate", "state.tfstate.backup", "src", "index.md",
+    "docs", "abc", "acc", "build", "y", "z", "x", ".cache", "c", "..", ".",
+    "", "ümlaut", "a b", "*", "[x]",
+]
+
+
+def reference_match(patterns: list[str], path: str, casefold: bool) -> str | None:
+    """The loop matches_pattern/is_allowed ran before PathPolicy."""
+    path_key = path.lower() if casefold else path
+    p = Path(path_key)
+    for pattern in patterns:
+        pattern_key = pattern.lower() if casefold else pattern
+        if fnmatch.fnmatch(path_key, pattern_key):
+            return pattern
+        if p.match(pattern_key):
+            return pattern
+    return None
+
+
+def fill_wildcards(pattern: str, rng: random.Random) -> str:
+    out = []
+    for part in pattern.split("/"):
+        if part == "**":
+            out.append("/".join(rng.choice(COMPONENTS[:20]) for _ in range(rng.randint(0, 3))))
+        else:
+            out.append(part.replace("*", rng.choice(["", "x", "rsa", "a.b"])).replace("?", "q"))
+    return "/".join(out)
+
+
+def build_corpus(patterns: list[str], n_random: int, rng: random.Random) -> list[str]:
+    prefixes = ["", "/", protect_files.PROJECT_ROOT + "/", str(Path.home()) + "/", "/tmp/", "a/b/"]
+    corpus = set()
+    for pattern in patterns:
+        for _ in range(6):
+            filled = fill_wildcards(pattern, rng)
+            for candidate in (filled, filled.upper(), filled + "/x", filled.rstrip("/")):
+                corpus.add(candidate)
+                corpus.add(rng.choice(prefixes) + candidate.lstrip("/"))
+    for _ in range(n_random):
+        parts = [rng.choice(COMPONENTS) for _ in range(rng.randint(0, 6))]
+        corpus.add(rng.choice(prefixes) + "/".join(parts))
+    for root, dirs, files in os.walk(REPO_ROOT):
+        dirs[:] = [d for d in dirs if d not in (".git", "node_modules", ".venv")]
+        for name in files:
+            corpus.add(os.path.join(root, name))
+    return sorted(corpus)
+
+
+def check(label: str, patterns: list[str], casefold: bool, corpus: list[str]) -> int:
+    policy = protect_files.PathPolicy(patterns, casefold=casefold)
+    mismatches = 0
+    for path in corpus:
+        expected = reference_match(patterns, path, casefold)
+        got = policy.match(path)
+        if got != expected:
+            mismatches += 1
+            if mismatches <= 20:
+                print(f"  MISMATCH [{label}] {path!r}: expected {expected!r}, got {got!r}")
+
+    start = time.perf_counter()
+    for path in corpus:
+        reference_match(patterns, path, casefold)
+    reference_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for path in corpus:
+        policy.match(path)
+    policy_s = time.perf_counter() - start
+
+    status = "PASS" if not mismatches else "FAIL"
+    print(
+        f"  {status}  {label}: {len(patterns)} patterns x {len(corpus)} paths, "
+        f"{mismatches} mismatches "
+        f"(loop {reference_s / len(corpus) * 1e6:.1f} µs/path, "
+        f"compiled {policy_s / len(corpus) * 1e6:.1f} µs/path)"
+    )
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--random", type=int, default=5000, help="random paths per list")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    lists = [
+        ("PROTECTED_PATTERNS", protect_files.PROTECTED_PATTERNS, True),
+        ("ALLOWED_PATTERNS", protect_files.ALLOWED_PATTERNS, False),
+    ] + [(f"synthetic_{i}", patterns, i % 2 == 0) for i, patterns in enumerate(SYNTHETIC_PATTERN_LISTS)]
+
+    failed = 0
+    for label, patterns, casefold in lists:
+        corpus = build_corpus(patterns, args.random, rng)
+        failed += check(label, patterns, casefold, corpus)
+
+    print(f"\n{'=' * 40}")
+    print(f"TOTAL: {failed} mismatches")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
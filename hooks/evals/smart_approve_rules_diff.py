@@ -0,0 +1,123 @@
+#!/usr/bin/python3
+"""Differential check: smart_approve.BashRuleSet vs. the linear fnmatch loop.
+
+Usage:
+    python3 smart_approve_rules_diff.py [--random N] [--seed N]
+
+For the allow/deny lists in claude/settings.json and a few synthetic lists,
+every command in the corpus must get the same answer from
+BashRuleSet.matches() as from command_matches_pattern(). The corpus holds
+commands derived from each rule (wildcards filled in, with and without
+arguments), random token soup, and the sub-commands of the eval inputs. The
+rule set is also round-tripped through its on-disk JSON form. Exits 1 on any
+mismatch.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+EVALS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = EVALS_DIR.parent.parent
+sys.path.insert(0, str(EVALS_DIR.parent / "scripts"))
+
+import smart_approve  # noqa: E402
+
+SYNTHETIC_PATTERN_LISTS = [
+    ["Bash(/opt/adb*)", "Bash(ls)", "Bash(git status:*)", "Bash(git:)", "Bash(:*)", "Bash(*)"],
+    ["Bash(npm run [a-c]*:*)", "Bash(?s:*)", "Bash(make  build:*)", "Bash(x y z)", "Read(./src)"],
+]
+TOKENS = [
+    "git", "status", "ls", "-la", "rm", "-rf", "/", "npm", "run", "build", "a",
+    "s", "x", "y", "z", "make", "", "/opt/adb", "/opt/adbd", "docker", "ps",
+    "*", "[x]", "--force", "push", "curl", "echo", "hi", "\t", "git\tstatus",
+]
+
+
+def fill_wildcards(glob_pat: str, rng: random.Random) -> str:
+    out = glob_pat
+    for ch, fills in (("*", ["", "x", " arg", " -rf /"]), ("?", ["q", " "])):
+        while ch in out:
+            out = out.replace(ch, rng.choice(fills), 1)
+    return out.replace("[a-c]", rng.choice("abd")).replace("[x]", "x")
+
+
+def build_corpus(patterns: list[str], n_random: int, rng: random.Random) -> list[str]:
+    corpus = set()
+    for prefix, glob_pat in smart_approve.parse_bash_patterns(patterns):
+        corpus.update([prefix, prefix + " ", glob_pat, prefix + "x"])
+        for _ in range(6):
+            filled = fill_wildcards(glob_pat, rng)
+            corpus.update([filled, filled + " extra", filled.upper()])
+    for _ in range(n_random):
+        corpus.add(" ".join(rng.choice(TOKENS) for _ in range(rng.randint(1, 5))))
+    for evals_file in EVALS_DIR.glob("*.json"):
+        for case in json.loads(evals_file.read_text()).get("cases", []):
+            command = (case.get("input") or {}).get("tool_input", {}).get("command")
+            if isinstance(command, str):
+                corpus.update(smart_approve.decompose_command(command))
+    return sorted(corpus)
+
+
+def check(label: str, patterns: list[str], corpus: list[str]) -> int:
+    reference = smart_approve.parse_bash_patterns(patterns)
+    built = smart_approve.BashRuleSet.from_patterns(patterns)
+    loaded = smart_approve.BashRuleSet.from_json(json.loads(json.dumps(built.to_json())))
+    mismatches = 0
+    for cmd in corpus:
+        expected = smart_approve.command_matches_pattern(cmd, reference)
+        for rules in (built, loaded):
+            got = rules.matches(cmd)
+            if got != expected:
+                mismatches += 1
+                if mismatches <= 20:
+                    print(f"  MISMATCH [{label}] {cmd!r}: expected {expected}, got {got}")
+
+    start = time.perf_counter()
+    for cmd in corpus:
+        smart_approve.command_matches_pattern(cmd, reference)
+    reference_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for cmd in corpus:
+        built.matches(cmd)
+    indexed_s = time.perf_counter() - start
+
+    status = "PASS" if not mismatches else "FAIL"
+    print(
+        f"  {status}  {label}: {len(reference)} rules x {len(corpus)} commands, "
+        f"{mismatches} mismatches "
+        f"(loop {reference_s / len(corpus) * 1e6:.1f} µs/cmd, "
+        f"indexed {indexed_s / len(corpus) * 1e6:.1f} µs/cmd)"
+    )
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--random", type=int, default=5000, help="random commands per list")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    settings = json.loads((REPO_ROOT / "claude" / "settings.json").read_text())
+    permissions = settings.get("permissions", {})
+    lists = [
+        ("settings.allow", permissions.get("allow", [])),
+        ("settings.deny", permissions.get("deny", [])),
+    ] + [(f"synthetic_{i}", patterns) for i, patterns in enumerate(SYNTHETIC_PATTERN_LISTS)]
+
+    failed = 0
+    for label, patterns in lists:
+        corpus = build_corpus(patterns, args.random, rng)
+        failed += check(label, patterns, corpus)
+
+    print(f"\n{'=' * 40}")
+    print(f"TOTAL: {failed} mismatches")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,13 @@ from pathlib import Path
 import numpy as np
 
 sys.path.insert(0, str(Path(__file__).parent))
-from utils import extract_query_text, get_by_key, get_hooks_logger, get_project_name
+from embedding_protocol import DaemonError, request_vectors
+from utils import (
+    extract_query_text,
+    get_by_key,
+    get_embedding_daemon_socket_path,
+    get_hooks_logger,
+)
 
 LOG = get_hooks_logger("Context7Search")
 
@@ -25,7 +31,7 @@ DAEMON_START_TIMEOUT = 90
 
 
 def getDaemonSocketPath() -> str:
-    return f"/tmp/embedding-daemon-{get_project_name()}.sock"
+    return get_embedding_daemon_socket_path()
 
 
 def isDaemonRunning(sock_path: str) -> bool:
@@ -57,7 +63,7 @@ def waitForDaemon(sock_path: str, timeout: int = DAEMON_START_TIMEOUT) -> bool:
     return False
 
 
-def encodeViaDaemon(text: str) -> np.ndarray | None:
+def requestVectors(texts: list[str] | str) -> np.ndarray | None:
     sock_path = getDaemonSocketPath()
     if not isDaemonRunning(sock_path):
         LOG.debug("Daemon not running — starting")
@@ -66,26 +72,25 @@ def encodeViaDaemon(text: str) -> np.ndarray | None:
             LOG.warning("Daemon failed to start within timeout")
             return None
     try:
-        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        conn.connect(sock_path)
-        conn.sendall((json.dumps({"text": text}) + "\n").encode())
-        data = b""
-        while not data.endswith(b"\n"):
-            chunk = conn.recv(4096)
-            if not chunk:
-                break
-            data += chunk
-        conn.close()
-        response = json.loads(data.decode())
-        if "error" in response:
-            LOG.warning(f"Daemon error: {response['error']}")
-            return None
-        return np.array(response["vector"], dtype=np.float32)
+        return request_vectors(sock_path, texts)
+    except DaemonError as e:
+        LOG.warning(f"Daemon error: {e}")
+        return None
     except Exception as e:
         LOG.warning(f"Daemon communication failed: {e}")
         return None
 
 
+def encodeViaDaemon(text: str) -> np.ndarray | None:
+    matrix = requestVectors(text)
+    return None if matrix is None else matrix[0]
+
+
+def encodeBatchViaDaemon(texts: list[str]) -> np.ndarray | None:
+    """Embed all `texts` in one daemon round trip; returns a (len, dim) matrix."""
+    return requestVectors(texts)
+
+
 def cosineSimilarity(a: np.ndarray, b: np.ndarray) -> float:
     denom = np.linalg.norm(a) * np.linalg.norm(b)
     if denom == 0:
@@ -112,9 +117,14 @@ def topResults(results: list[dict], query_vector: np.ndarray | None) -> list[dic
     if query_vector is not None:
         scored = []
         log_scores = []
-        for s in filtered:
-            description = get_by_key(s, "description") or ""
-            desc_vector = encodeViaDaemon(description) if description else None
+        descriptions = [get_by_key(s, "description") or "" for s in filtered]
+        to_embed = [d for d in descriptions if d]
+        desc_matrix = encodeBatchViaDaemon(to_embed) if to_embed else None
+        desc_vectors = (
+            dict(zip(to_embed, desc_matrix)) if desc_matrix is not None else {}
+        )
+        for s, description in zip(filtered, descriptions):
+            desc_vector = desc_vectors.get(description)
             similarity = (
                 cosineSimilarity(query_vector, desc_vector)
                 if desc_vector is not None
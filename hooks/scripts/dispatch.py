@@ -0,0 +1,398 @@
+#!/usr/bin/python3
+"""Single-dispatch entry point: one process runs every hook routed to an event.
+
+    python3 dispatch.py PreToolUse < payload.json
+
+The payload is read from stdin once. The event (argv[1], else the payload's
+hook_event_name) and tool_name select handlers from HOOK_ROUTES, the registry
+of the existing hook scripts with the matchers claude/settings.json gave
+them. Only the selected modules are imported. Each one then runs in its own
+thread, exactly as its `if __name__ == "__main__":` block would: the block is
+compiled once and exec'd against the module's globals, with
+sys.stdin/stdout/stderr bound to per-thread buffers and SystemExit captured as
+the exit code. The scripts themselves are untouched and still run standalone.
+Their module globals (log buffers, caches) are shared across runs, so a hook
+runs for one event at a time; different hooks still run concurrently.
+
+merge_results() folds the per-hook results into the one answer Claude Code
+reads: any exit 2 blocks with the blockers' stderr, otherwise
+hookSpecificOutput is merged (additionalContext concatenated, the most
+restrictive permissionDecision wins).
+
+hook_host.py keeps a Dispatcher alive across events. hook_client.py falls back
+to running this script as one process when no host is up.
+"""
+
+import ast
+import importlib
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+import types
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+from utils import get_hooks_logger  # noqa: E402
+
+# event -> [(matcher, [hook scripts])], in claude/settings.json order. Matchers
+# follow Claude Code: "" matches every tool, anything else must fullmatch.
+HOOK_ROUTES: dict[str, list[tuple[str, list[str]]]] = {
+    "PreToolUse": [
+        ("Bash", ["smart_approve", "protect_branches", "dev_server_tmux_check"]),
+        ("Edit|Write", ["context_refs", "similar_code_ref"]),
+        ("Write", ["md_location_check"]),
+        ("Read|Edit|Write", ["dir_context_refs"]),
+        ("Read", ["large_file_read_warning"]),
+        (
+            "",
+            ["tooluse_context_rules", "subagent_guidelines", "protect_files", "log_hooks"],
+        ),
+    ],
+    "PostToolUse": [
+        ("AskUserQuestion", ["skill_activation", "context7_search", "log_hooks"]),
+        ("EnterWorktree", ["worktree_init"]),
+        ("", ["checklist_context_watch"]),
+        (
+            "Edit|Write",
+            [
+                "typescript_lint",
+                "python_lint",
+                "golang_lint",
+                "md_json_lint",
+                "track_edited_files",
+                "jest_coverage_incremental",
+                "jest_coverage_report",
+            ],
+        ),
+        ("", ["tooluse_context_rules", "log_hooks"]),
+    ],
+}
+HOOK_ENV = {"log_hooks": {"JSON_COLORIZE": "1"}}
+HOOK_TIMEOUTS = {"skill_activation": 10, "context7_search": 10}
+DEFAULT_HOOK_TIMEOUT = 60  # seconds, Claude Code's default per hook
+
+PERMISSION_PRIORITY = {"allow": 1, "ask": 2, "deny": 3}
+
+LOG = get_hooks_logger("Dispatch")
+
+
+# ---------------------------------------------------------------------------
+# Routing and merging
+# ---------------------------------------------------------------------------
+
+
+def routed_hooks() -> list[str]:
+    """Every hook script named in HOOK_ROUTES."""
+    return sorted({hook for routes in HOOK_ROUTES.values() for _, hooks in routes for hook in hooks})
+
+
+def select_hooks(event: str | None, tool_name: str | None) -> list[str]:
+    """Hook scripts routed to `event`/`tool_name`, deduplicated like Claude
+    Code does for identical commands, in settings order."""
+    selected: list[str] = []
+    for matcher, hooks in HOOK_ROUTES.get(event or "", []):
+        if matcher and not re.fullmatch(matcher, tool_name or ""):
+            continue
+        for hook in hooks:
+            if hook not in selected:
+                selected.append(hook)
+    return selected
+
+
+def parse_event(event: str | None, payload: str) -> tuple[str | None, str | None]:
+    """(event name, tool name); the event falls back to hook_event_name."""
+    try:
+        data = json.loads(payload)
+    except json.JSONDecodeError:
+        return event, None
+    if not isinstance(data, dict):
+        return event, None
+    return event or data.get("hook_event_name"), data.get("tool_name")
+
+
+def merge_results(event: str | None, results: list[dict], payload: str) -> dict:
+    """Combine per-hook {"hook", "exit_code", "stdout", "stderr"} results into
+    what a single hook command should return to Claude Code.
+
+    - Any exit code 2 blocks: exit 2 with the blocking hooks' stderr (Claude
+      ignores stdout then, so nothing else is returned).
+    - Otherwise exit 0, with the JSON outputs merged: additionalContext and
+      systemMessage are concatenated, the most restrictive
+      permissionDecision wins (deny > ask > allow), decision "block" and
+      continue=false are kept. Other failures are non-blocking, as they were
+      for separate commands: their stderr is passed through, not the code.
+    - Hooks that only echo the payload back (the lint hooks) add nothing;
+      plain-text stdout is kept only when no hook produced JSON.
+    """
+    blocking = [r for r in results if r["exit_code"] == 2]
+    if blocking:
+        stderr = "\n".join(r["stderr"].strip() for r in blocking if r["stderr"].strip())
+        return {"exit_code": 2, "stdout": "", "stderr": stderr + "\n" if stderr else ""}
+
+    specific: dict = {}
+    merged: dict = {}
+    contexts: list[str] = []
+    messages: list[str] = []
+    reasons: list[str] = []
+    texts: list[str] = []
+    stderr_lines: list[str] = []
+    permission, permission_reasons = None, []
+
+    for result in results:
+        if result["exit_code"] != 0 and result["stderr"].strip():
+            stderr_lines.append(f"[{result['hook']}] {result['stderr'].strip()}")
+        out = result["stdout"].strip()
+        if not out or out == payload.strip():
+            continue
+        try:
+            data = json.loads(out)
+        except json.JSONDecodeError:
+            texts.append(out)
+            continue
+        if not isinstance(data, dict):
+            texts.append(out)
+            continue
+
+        hook_output = data.get("hookSpecificOutput") or {}
+        if hook_output.get("additionalContext"):
+            contexts.append(hook_output["additionalContext"])
+        decision = hook_output.get("permissionDecision")
+        if decision in PERMISSION_PRIORITY:
+            rank = PERMISSION_PRIORITY[decision]
+            if permission is None or rank > PERMISSION_PRIORITY[permission]:
+                permission, permission_reasons = decision, []
+            if decision == permission and hook_output.get("permissionDecisionReason"):
+                permission_reasons.append(hook_output["permissionDecisionReason"])
+        if "updatedInput" in hook_output:
+            specific["updatedInput"] = hook_output["updatedInput"]
+
+        if data.get("decision") == "block":
+            merged["decision"] = "block"
+            if data.get("reason"):
+                reasons.append(data["reason"])
+        if data.get("continue") is False:
+            merged["continue"] = False
+            if data.get("stopReason"):
+                merged.setdefault("stopReason", data["stopReason"])
+        if data.get("systemMessage"):
+            messages.append(data["systemMessage"])
+        if data.get("suppressOutput"):
+            merged["suppressOutput"] = True
+
+    if contexts:
+        specific["additionalContext"] = "\n\n".join(contexts)
+    if permission:
+        specific["permissionDecision"] = permission
+        if permission_reasons:
+            specific["permissionDecisionReason"] = "\n".join(permission_reasons)
+    if specific:
+        merged["hookSpecificOutput"] = {"hookEventName": event, **specific}
+    if reasons:
+        merged["reason"] = "\n".join(reasons)
+    if messages:
+        merged["systemMessage"] = "\n".join(messages)
+
+    if merged:
+        stdout = json.dumps(merged, ensure_ascii=False) + "\n"
+    else:
+        stdout = "\n".join(texts) + "\n" if texts else ""
+    stderr = "\n".join(stderr_lines) + "\n" if stderr_lines else ""
+    return {"exit_code": 0, "stdout": stdout, "stderr": stderr}
+
+
+# ---------------------------------------------------------------------------
+# In-process execution
+# ---------------------------------------------------------------------------
+
+
+class ThreadLocalStream:
+    """Stands in for sys.stdin/stdout/stderr: resolves to the stream bound on
+    the current thread, or the original one. Lets hooks that read
+    sys.stdin / print() / sys.exit() run concurrently in one process."""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def bind(self, stream) -> None:
+        self._local.stream = stream
+
+    def unbind(self) -> None:
+        self._local.stream = None
+
+    def _current(self):
+        return getattr(self._local, "stream", None) or self._default
+
+    def __getattr__(self, name):
+        return getattr(self._current(), name)
+
+    def __iter__(self):
+        return iter(self._current())
+
+
+def install_stream_proxies() -> tuple[ThreadLocalStream, ...]:
+    sys.stdin = ThreadLocalStream(sys.stdin)
+    sys.stdout = ThreadLocalStream(sys.stdout)
+    sys.stderr = ThreadLocalStream(sys.stderr)
+    return sys.stdin, sys.stdout, sys.stderr
+
+
+def prepare_process() -> None:
+    """Hooks see only their own argv defaults (log_hooks uses argparse) and the
+    per-hook environment settings.json used to prefix their commands with."""
+    sys.argv = sys.argv[:1]
+    apply_hook_env()
+
+
+def apply_hook_env() -> None:
+    for env in HOOK_ENV.values():
+        for name, value in env.items():
+            os.environ.setdefault(name, value)
+
+
+def main_block(module: types.ModuleType) -> types.CodeType:
+    """Compile the body of the module's `if __name__ == "__main__":` block."""
+    source = Path(module.__file__).read_text(encoding="utf-8")
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.If) and ast.unparse(node.test) == "__name__ == '__main__'":
+            block = ast.Module(body=node.body, type_ignores=[])
+            return compile(block, module.__file__, "exec")
+    raise ValueError(f"{module.__name__} has no __main__ block")
+
+
+def exit_status(code) -> tuple[int, str]:
+    """SystemExit.code -> (exit status, stderr text), like the interpreter."""
+    if code is None:
+        return 0, ""
+    if isinstance(code, int):
+        return code, ""
+    return 1, f"{code}\n"
+
+
+class Dispatcher:
+    """Runs routed hooks in-process. Modules are imported on first use (or
+    up front with load()) and kept for the life of the Dispatcher."""
+
+    def __init__(self, streams: tuple[ThreadLocalStream, ...], max_workers: int):
+        self.streams = streams
+        self.hooks: dict[str, tuple[types.ModuleType, types.CodeType]] = {}
+        self.load_errors: dict[str, str] = {}
+        self.timed_out = False
+        self._load_lock = threading.Lock()
+        self._run_locks: dict[str, threading.Lock] = {}
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hook")
+
+    def load(self, names: list[str]) -> None:
+        for name in names:
+            self._load(name)
+        LOG.debug(f"Loaded {len(self.hooks)} hooks ({len(self.load_errors)} failed)")
+
+    def _load(self, name: str) -> None:
+        with self._load_lock:
+            if name in self.hooks or name in self.load_errors:
+                return
+            try:
+                module = importlib.import_module(name)
+                self.hooks[name] = (module, main_block(module))
+                self._run_locks[name] = threading.Lock()
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Reported per event, as a separate process would have.
+                self.load_errors[name] = traceback.format_exc()
+                LOG.warning(f"Failed to load hook {name}")
+
+    def run_hook(self, hook: str, payload: str) -> dict:
+        self._load(hook)
+        if hook in self.load_errors:
+            return {"hook": hook, "exit_code": 1, "stdout": "", "stderr": self.load_errors[hook]}
+        # A run still going for an earlier event (or one that timed out) owns
+        # the module's globals until it ends.
+        timeout = HOOK_TIMEOUTS.get(hook, DEFAULT_HOOK_TIMEOUT)
+        run_lock = self._run_locks[hook]
+        if not run_lock.acquire(timeout=timeout):
+            return {"hook": hook, "exit_code": 1, "stdout": "", "stderr": f"timed out after {timeout}s"}
+        try:
+            return self._run_locked(hook, payload)
+        finally:
+            run_lock.release()
+
+    def _run_locked(self, hook: str, payload: str) -> dict:
+        module, code = self.hooks[hook]
+        stdin, stdout, stderr = io.StringIO(payload), io.StringIO(), io.StringIO()
+        for proxy, stream in zip(self.streams, (stdin, stdout, stderr)):
+            proxy.bind(stream)
+        exit_code = 0
+        try:
+            # Fresh locals: names the block binds (`except ... as exc`) stay
+            # per run instead of landing in the shared module globals.
+            exec(code, module.__dict__, {})  # pylint: disable=exec-used
+        except SystemExit as exc:
+            exit_code, message = exit_status(exc.code)
+            stderr.write(message)
+        except Exception:  # pylint: disable=broad-exception-caught
+            traceback.print_exc(file=stderr)
+            exit_code = 1
+        finally:
+            for proxy in self.streams:
+                proxy.unbind()
+        return {
+            "hook": hook,
+            "exit_code": exit_code,
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+        }
+
+    def run_event(self, event: str | None, payload: str) -> dict:
+        event, tool_name = parse_event(event, payload)
+        hooks = select_hooks(event, tool_name)
+        futures = [(hook, self.pool.submit(self.run_hook, hook, payload)) for hook in hooks]
+        results = []
+        start = time.monotonic()
+        for hook, future in futures:
+            timeout = HOOK_TIMEOUTS.get(hook, DEFAULT_HOOK_TIMEOUT)
+            try:
+                results.append(future.result(timeout=max(0.0, start + timeout - time.monotonic())))
+            except FutureTimeoutError:
+                # The thread can't be killed; its output is dropped when it ends.
+                LOG.warning(f"Hook {hook} timed out after {timeout}s")
+                self.timed_out = True
+                results.append(
+                    {"hook": hook, "exit_code": 1, "stdout": "", "stderr": f"timed out after {timeout}s"}
+                )
+        return merge_results(event, results, payload)
+
+
+def main():
+    event = sys.argv[1] if len(sys.argv) > 1 else None
+    payload = sys.stdin.read()
+
+    event, tool_name = parse_event(event, payload)
+    hooks = select_hooks(event, tool_name)
+    if not hooks:
+        sys.exit(0)
+
+    prepare_process()
+    dispatcher = Dispatcher(install_stream_proxies(), max_workers=len(hooks))
+    result = dispatcher.run_event(event, payload)
+
+    sys.stdout.write(result["stdout"])
+    sys.stderr.write(result["stderr"])
+    if dispatcher.timed_out:
+        # Don't wait at exit for a hook thread that is still running.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(result["exit_code"])
+    sys.exit(result["exit_code"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+"""Persistent content-addressed embedding cache for embedding_daemon.py.
+
+Vectors are stored in SQLite keyed by sha256(model name + raw text), so a hit
+skips both spaCy cleaning and the model. Rows carry a last-used timestamp and
+the least recently used ones are evicted once the table grows past
+`max_entries`.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+MAX_CACHE_ENTRIES = 20_000  # ~30 MB at 384-dim float32
+EVICT_TO_RATIO = 0.9  # evict down to 90% of the cap so inserts don't evict every time
+
+
+def cache_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{text}".encode()).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(
+        self, db_path: Path, model_name: str, max_entries: int = MAX_CACHE_ENTRIES
+    ):
+        self.db_path = db_path
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)"
+        )
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, texts: list[str]) -> dict[str, np.ndarray]:
+        """Return {text: vector} for the texts already cached; touches their LRU stamp."""
+        keys = {cache_key(self.model_name, text): text for text in texts}
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            placeholders = ",".join("?" * len(keys))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                list(keys),
+            ).fetchall()
+            if rows:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key, _ in rows],
+                )
+                self._conn.commit()
+            for key, blob in rows:
+                found[keys[key]] = np.frombuffer(blob, dtype=np.float32)
+            self.hits += sum(1 for text in texts if text in found)
+            self.misses += sum(1 for text in texts if text not in found)
+        return found
+
+    def put_many(self, items: dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (
+                cache_key(self.model_name, text),
+                np.ascontiguousarray(vector, dtype=np.float32).tobytes(),
+                now,
+            )
+            for text, vector in items.items()
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._entries += self._conn.total_changes - before
+            if self._entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        target = int(self.max_entries * EVICT_TO_RATIO)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (self._entries - target,),
+        )
+        self._entries = target
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "path": str(self.db_path),
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,19 +1,82 @@
 #!/usr/bin/python3
-"""Persistent embedding daemon — loads SentenceTransformer once, serves via Unix socket."""
-
+"""Persistent embedding daemon — loads SentenceTransformer once, serves via Unix socket.
+
+One daemon per user serves every project: socket from
+utils.get_embedding_daemon_socket_path(), PID file flock'd as a singleton.
+The model, the spaCy pipelines and the cache are project-independent, so
+opening another repo or worktree reuses the loaded model. Before, each project
+directory started its own daemon with its own model copy, so RSS grew with the
+number of open repos/worktrees and each new one paid a model cold start.
+
+Measuring it (before = the per-project daemon, after = this one): open one,
+then three projects, trigger a hook in each, and sum the daemons' RSS; then
+restart the daemon and time its first answer, which includes the model load:
+    ps -o pid,rss,args -C python3 | grep embedding_daemon
+    kill $(cat /tmp/embedding-daemon-$(id -u).pid); python3 embedding_daemon.py &
+    time (until python3 embedding_protocol.py --socket /tmp/embedding-daemon-$(id -u).sock \\
+        --rows 1 --iterations 1 2>/dev/null; do sleep 0.1; done)
+No figures are recorded yet: they need the model in ~/.cache/huggingface/hub.
+
+Protocol (see embedding_protocol.py): one newline-terminated JSON request
+per connection.
+    {"text": "..."}         -> {"vector": [...]}
+    {"texts": ["...", ...]} -> {"vectors": [[...], ...]}   (one model.embed call)
+Adding "format": "f32" returns a length-prefixed raw float32 frame instead of
+JSON. Errors always come back as a JSON {"error": "..."} line.
+    {"stats": true}         -> {"hits": ..., "misses": ..., "entries": ...}
+
+Vectors are cached on disk (embedding_cache.py) by model + raw text hash, so
+a repeated snippet or prompt skips spaCy and the model entirely.
+
+Concurrency: connections are served by a bounded thread pool, so a liveness
+probe or a cache hit never waits behind another client. spaCy cleaning runs on
+a Cleaner pool of CLEAN_WORKERS threads, each with its own pipelines, so a
+slow clean occupies one cleaner instead of a process-wide lock. Texts from
+requests that arrive within BATCH_WINDOW of each other are coalesced by a
+single MicroBatcher thread into one model.embed call. A request waits on both
+phases through Futures bounded by its REQUEST_TIMEOUT deadline; a clean or
+batch that is still queued when the deadline passes is cancelled.
+"""
+
+import fcntl
 import json
 import logging
 import os
+import queue
 import signal
 import socket
 import sys
+import threading
 import time
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
 
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+from embedding_cache import EmbeddingCache  # noqa: E402
+from embedding_protocol import (  # noqa: E402
+    FORMAT_F32,
+    pack_error,
+    pack_json,
+    pack_vectors,
+)
+from utils import get_embedding_daemon_socket_path, private_project_dir  # noqa: E402
+
 MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 SPACY_MODELS = {"pt": "pt_core_news_sm", "en": "en_core_web_sm"}
 INACTIVITY_TIMEOUT = 30 * 60  # 30 min
+MAX_WORKERS = 8  # concurrent connections being served
+MAX_PENDING = MAX_WORKERS * 4  # accepted-but-queued connections before backpressure
+BATCH_WINDOW = 0.005  # seconds the batcher waits for more requests to coalesce
+MAX_BATCH_TEXTS = 64  # soft cap on texts per model.embed call
+REQUEST_TIMEOUT = 10.0  # seconds, from accept to response
+CLEAN_WORKERS = 2  # spaCy pipeline copies, one per cleaner thread
 
 
 def load_nlp(logger: logging.Logger) -> dict:
@@ -50,12 +113,203 @@ def clean_query(nlp: dict, text: str) -> str:
     return " ".join(tokens) or text
 
 
-def get_socket_path(project_name: str) -> str:
-    return f"/tmp/embedding-daemon-{project_name}.sock"
+class Cleaner:
+    """Runs clean_query on its own small pool. spaCy pipelines aren't
+    guaranteed thread-safe, so each cleaner thread loads its own copy."""
+
+    def __init__(self, logger: logging.Logger, workers: int = CLEAN_WORKERS):
+        self._logger = logger
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="clean")
+        for _ in range(workers):
+            self._pool.submit(self._nlp)  # load the pipelines before the first request
+
+    def _nlp(self) -> dict:
+        nlp = getattr(self._local, "nlp", None)
+        if nlp is None:
+            nlp = self._local.nlp = load_nlp(self._logger)
+        return nlp
+
+    def _clean(self, texts: list[str]) -> list[str]:
+        nlp = self._nlp()
+        return [clean_query(nlp, text) for text in texts]
+
+    def submit(self, texts: list[str]) -> Future:
+        return self._pool.submit(self._clean, texts)
+
+
+class MicroBatcher:
+    """Owns the model: one thread drains queued jobs, waits up to `window`
+    for more to arrive, embeds all their texts in a single `model.embed` call
+    and hands each job its slice of the result through a Future."""
+
+    def __init__(
+        self,
+        model,
+        logger: logging.Logger,
+        window: float = BATCH_WINDOW,
+        max_texts: int = MAX_BATCH_TEXTS,
+    ):
+        self._model = model
+        self._logger = logger
+        self._window = window
+        self._max_texts = max_texts
+        self._queue: queue.Queue[tuple[list[str], Future]] = queue.Queue()
+        threading.Thread(target=self._run, name="MicroBatcher", daemon=True).start()
+
+    def submit(self, texts: list[str]) -> Future:
+        future: Future = Future()
+        self._queue.put((texts, future))
+        return future
+
+    def _collect(self) -> list[tuple[list[str], Future]]:
+        jobs = [self._queue.get()]
+        count = len(jobs[0][0])
+        deadline = time.monotonic() + self._window
+        while count < self._max_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            count += len(job[0])
+        # Drop jobs whose caller already timed out and cancelled.
+        return [job for job in jobs if job[1].set_running_or_notify_cancel()]
+
+    def _run(self) -> None:
+        while True:
+            jobs = self._collect()
+            if not jobs:
+                continue
+            texts = [text for job_texts, _ in jobs for text in job_texts]
+            self._logger.debug(f"batch: {len(jobs)} request(s), {len(texts)} text(s)")
+            try:
+                matrix = np.asarray(list(self._model.embed(texts)), dtype=np.float32)
+            except Exception as e:
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for job_texts, future in jobs:
+                future.set_result(matrix[offset : offset + len(job_texts)])
+                offset += len(job_texts)
+
+
+def wait_for(future: Future, deadline: float, timeout: float):
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        raise TimeoutError(f"embedding timed out after {timeout}s")
+
+
+def handle_request(
+    request: dict,
+    batcher: MicroBatcher,
+    cleaner: Cleaner,
+    logger: logging.Logger,
+    cache: EmbeddingCache | None = None,
+    timeout: float = REQUEST_TIMEOUT,
+) -> bytes:
+    """Embed a single `{"text": ...}` or a batched `{"texts": [...]}` request
+    and return the encoded response in the framing the client asked for.
+
+    Cached texts are answered from `cache`; the rest are embedded in one
+    `model.embed` call, so a client ranking N candidates pays one round trip
+    and at most one ONNX run instead of N.
+    """
+    if request.get("stats"):
+        stats = cache.stats() if cache is not None else {}
+        return (json.dumps(stats) + "\n").encode()
+
+    deadline = time.monotonic() + timeout
+    batched = "texts" in request
+    texts = request["texts"] if batched else [request.get("text", "")]
+    cached = cache.get_many(texts) if cache is not None and texts else {}
+    missing = list(dict.fromkeys(text for text in texts if text not in cached))
+    logger.debug(
+        f"request: {len(texts)} text(s), {len(texts) - len(missing)} cached, "
+        f"format={request.get('format')}"
+    )
+
+    if missing:
+        cleaned = wait_for(cleaner.submit(missing), deadline, timeout)
+        embedded = wait_for(batcher.submit(cleaned), deadline, timeout)
+        fresh = dict(zip(missing, embedded))
+        if cache is not None:
+            cache.put_many(fresh)
+        cached.update(fresh)
+
+    if texts:
+        matrix = np.stack([cached[text] for text in texts])
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+
+    if request.get("format") == FORMAT_F32:
+        return pack_vectors(matrix)
+    return pack_json(matrix, batched)
+
+
+def serve_connection(
+    conn: socket.socket,
+    batcher: MicroBatcher,
+    cleaner: Cleaner,
+    logger: logging.Logger,
+    cache: EmbeddingCache | None = None,
+) -> None:
+    """Read one request off `conn`, answer it, close. Runs on a pool worker."""
+    data = b""
+    try:
+        conn.settimeout(REQUEST_TIMEOUT)
+        while not data.endswith(b"\n"):
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+
+        if not data:
+            # Empty request — a liveness probe (connect+close, no data)
+            return
+
+        request = json.loads(data.decode())
+        conn.sendall(handle_request(request, batcher, cleaner, logger, cache))
+    except Exception as e:
+        logger.warning(f"Request error: {e} — raw data: {data[:200]!r}")
+        logger.warning(traceback.format_exc())
+        try:
+            conn.sendall(pack_error(str(e)))
+        except Exception:
+            pass
+    finally:
+        conn.close()
+
+
+def get_socket_path() -> str:
+    return get_embedding_daemon_socket_path()
 
 
-def get_pid_path(project_name: str) -> str:
-    return f"/tmp/embedding-daemon-{project_name}.pid"
+def get_pid_path() -> str:
+    return f"/tmp/embedding-daemon-{os.getuid()}.pid"
+
+
+def acquire_singleton(pid_path: str):
+    """Take an exclusive flock on the PID file, or return None if another
+    daemon already holds it (running, or still loading the model). Keeps
+    concurrent SessionStart hooks from each loading their own model copy."""
+    handle = open(pid_path, "a+")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
 
 
 def setup_logger() -> logging.Logger:
@@ -70,12 +324,16 @@ def setup_logger() -> logging.Logger:
 
 
 def main():
-    project_name = Path.cwd().name
-    sock_path = get_socket_path(project_name)
-    pid_path = get_pid_path(project_name)
+    sock_path = get_socket_path()
+    pid_path = get_pid_path()
 
     LOG = setup_logger()
-    LOG.debug(f"Daemon starting — project={project_name} socket={sock_path}")
+
+    pid_lock = acquire_singleton(pid_path)
+    if pid_lock is None:
+        LOG.debug(f"Daemon already running or starting — socket={sock_path}")
+        sys.exit(0)
+    LOG.debug(f"Daemon starting — socket={sock_path}")
 
     try:
         from fastembed import TextEmbedding
@@ -83,40 +341,68 @@ def main():
         LOG.error("fastembed not installed")
         sys.exit(1)
 
-    nlp = load_nlp(LOG)
+    cleaner = Cleaner(LOG)
 
     hf_cache = str(Path.home() / ".cache" / "huggingface" / "hub")
     model = TextEmbedding(MODEL_NAME, cache_dir=hf_cache)
     LOG.debug(f"Model '{MODEL_NAME}' loaded")
+    batcher = MicroBatcher(model, LOG)
+
+    cache = None
+    # Content-addressed, so one user-level cache serves every project. Its
+    # vectors steer skill activation and similar-code results, so it only
+    # lives where nobody else can write it.
+    cache_dir = private_project_dir(str(Path.home()), "embedding-cache")
+    if cache_dir is None:
+        LOG.warning("No private cache dir for embeddings, embedding every request")
+    else:
+        try:
+            cache_path = cache_dir / "cache.db"
+            cache = EmbeddingCache(cache_path, MODEL_NAME)
+            LOG.debug(f"Embedding cache at {cache_path} ({cache.stats()['entries']} entries)")
+        except Exception as e:
+            LOG.warning(f"Embedding cache unavailable, embedding every request: {e}")
 
-    # Write PID
-    Path(pid_path).write_text(str(os.getpid()))
-
-    # Clean stale socket
+    # Clean stale socket (we hold the singleton lock, so nobody else owns it)
     if Path(sock_path).exists():
         Path(sock_path).unlink()
 
     server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
     server.bind(sock_path)
-    server.listen(5)
+    os.chmod(sock_path, 0o600)  # shared /tmp: only this user's hooks may connect
+    server.listen(64)
     server.settimeout(60)  # wake up every 60s to check inactivity
 
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="embed")
+    pending = threading.BoundedSemaphore(MAX_PENDING)
     last_activity = time.monotonic()
 
     def shutdown(signum, frame):
         LOG.debug("Daemon shutting down")
         server.close()
+        pool.shutdown(wait=False, cancel_futures=True)
+        if cache is not None:
+            LOG.debug(f"Embedding cache stats: {cache.stats()}")
         for p in (sock_path, pid_path):
             try:
                 Path(p).unlink()
             except FileNotFoundError:
                 pass
+        pid_lock.close()
         sys.exit(0)
 
+    def serve(conn: socket.socket) -> None:
+        nonlocal last_activity
+        try:
+            serve_connection(conn, batcher, cleaner, LOG, cache)
+        finally:
+            last_activity = time.monotonic()
+            pending.release()
+
     signal.signal(signal.SIGTERM, shutdown)
     signal.signal(signal.SIGINT, shutdown)
 
-    LOG.debug("Daemon ready — listening")
+    LOG.debug(f"Daemon ready — listening ({MAX_WORKERS} workers)")
 
     while True:
         if time.monotonic() - last_activity > INACTIVITY_TIMEOUT:
@@ -131,37 +417,10 @@ def main():
             continue
 
         last_activity = time.monotonic()
-        try:
-            data = b""
-            while not data.endswith(b"\n"):
-                chunk = conn.recv(4096)
-                if not chunk:
-                    break
-                data += chunk
-
-            # LOG.debug(f"Received {len(data)} bytes: {data!r}")
-
-            if not data:
-                # LOG.debug(
-                #     "Empty request — likely a liveness probe (connect+close, no data)"
-                # )
-                continue
-
-            request = json.loads(data.decode())
-            text = clean_query(nlp, request.get("text", ""))
-            LOG.debug(f"text: {text}")
-            vector = list(model.embed([text]))[0].tolist()
-            response = json.dumps({"vector": vector}) + "\n"
-            conn.sendall(response.encode())
-        except Exception as e:
-            LOG.warning(f"Request error: {e} — raw data: {data!r}")
-            LOG.warning(traceback.format_exc())
-            try:
-                conn.sendall((json.dumps({"error": str(e)}) + "\n").encode())
-            except Exception:
-                pass
-        finally:
-            conn.close()
+        # Backpressure: once MAX_PENDING connections are in flight, stop
+        # accepting and let further clients wait in the listen backlog.
+        pending.acquire()
+        pool.submit(serve, conn)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+"""Wire protocol shared by embedding_daemon.py and its hook clients.
+
+Requests are one newline-terminated JSON object per connection:
+    {"text": "..."}  or  {"texts": ["...", ...]}
+plus an optional "format": "f32" asking for the binary response framing, or
+    {"stats": true}  -> JSON cache hit/miss counters
+
+Responses:
+    JSON (default / fallback)  {"vector": [...]} | {"vectors": [[...]]} | {"error": "..."} + "\\n"
+    Binary ("format": "f32")   FRAME_HEADER (magic, rows, dim) + rows*dim raw little-endian float32
+
+The client always asks for f32 and sniffs the first 4 bytes: a daemon that
+predates the binary framing ignores "format" and answers JSON, and errors are
+always JSON, so both parse through the same read_vectors() call.
+
+Run directly for a micro-benchmark of both framings, or to dump a running
+daemon's cache stats:
+    python3 embedding_protocol.py [--rows N] [--dim N] [--iterations N] [--socket PATH]
+    python3 embedding_protocol.py --socket PATH --stats
+"""
+
+import argparse
+import json
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+FORMAT_F32 = "f32"
+FRAME_MAGIC = b"EMB1"
+FRAME_HEADER = struct.Struct("<4sII")  # magic, rows, dim
+FLOAT32_LE = np.dtype("<f4")
+RECV_CHUNK = 65536
+
+
+class DaemonError(Exception):
+    """The daemon answered with {"error": ...}."""
+
+
+def build_request(texts: list[str] | str, binary: bool = True) -> bytes:
+    """Encode a single-text or batched request line."""
+    request: dict = {"texts": texts} if isinstance(texts, list) else {"text": texts}
+    if binary:
+        request["format"] = FORMAT_F32
+    return (json.dumps(request) + "\n").encode()
+
+
+def pack_vectors(matrix: np.ndarray) -> bytes:
+    """Binary frame for a (rows, dim) float matrix."""
+    matrix = np.ascontiguousarray(matrix, dtype=FLOAT32_LE)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    rows, dim = matrix.shape
+    return FRAME_HEADER.pack(FRAME_MAGIC, rows, dim) + matrix.tobytes()
+
+
+def pack_json(matrix: np.ndarray, batched: bool) -> bytes:
+    """JSON response line, kept for clients that don't ask for f32."""
+    if batched:
+        payload = {"vectors": matrix.tolist()}
+    else:
+        payload = {"vector": matrix[0].tolist()}
+    return (json.dumps(payload) + "\n").encode()
+
+
+def pack_error(message: str) -> bytes:
+    return (json.dumps({"error": message}) + "\n").encode()
+
+
+def _recv_exact(conn: socket.socket, size: int, buf: bytearray) -> bytearray:
+    while len(buf) < size:
+        chunk = conn.recv(max(RECV_CHUNK, size - len(buf)))
+        if not chunk:
+            raise ConnectionError(f"daemon closed after {len(buf)}/{size} bytes")
+        buf += chunk
+    return buf
+
+
+def read_vectors(conn: socket.socket) -> np.ndarray:
+    """Read one response off `conn` as a (rows, dim) float32 matrix.
+
+    Handles both framings; raises DaemonError on an {"error": ...} reply.
+    """
+    buf = _recv_exact(conn, len(FRAME_MAGIC), bytearray())
+
+    if buf[: len(FRAME_MAGIC)] == FRAME_MAGIC:
+        buf = _recv_exact(conn, FRAME_HEADER.size, buf)
+        _, rows, dim = FRAME_HEADER.unpack_from(buf)
+        total = FRAME_HEADER.size + rows * dim * FLOAT32_LE.itemsize
+        buf = _recv_exact(conn, total, buf)
+        return np.frombuffer(
+            buf, dtype=FLOAT32_LE, count=rows * dim, offset=FRAME_HEADER.size
+        ).reshape(rows, dim)
+
+    while not buf.endswith(b"\n"):
+        chunk = conn.recv(RECV_CHUNK)
+        if not chunk:
+            break
+        buf += chunk
+    response = json.loads(buf.decode())
+    if "error" in response:
+        raise DaemonError(response["error"])
+    if "vectors" in response:
+        return np.array(response["vectors"], dtype=np.float32)
+    return np.array(response["vector"], dtype=np.float32).reshape(1, -1)
+
+
+def request_vectors(
+    sock_path: str,
+    texts: list[str] | str,
+    timeout: float | None = None,
+    binary: bool = True,
+) -> np.ndarray:
+    """One round trip to the daemon at `sock_path`; returns (rows, dim) float32.
+
+    Raises OSError if the daemon isn't reachable and DaemonError if it
+    reports a failure — callers decide whether either is fatal.
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.settimeout(timeout)
+        conn.connect(sock_path)
+        conn.sendall(build_request(texts, binary=binary))
+        return read_vectors(conn)
+    finally:
+        conn.close()
+
+
+def request_stats(sock_path: str, timeout: float | None = None) -> dict:
+    """Fetch the daemon's cache counters ({"hits", "misses", "entries", ...})."""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.settimeout(timeout)
+        conn.connect(sock_path)
+        conn.sendall(b'{"stats": true}\n')
+        buf = bytearray()
+        while not buf.endswith(b"\n"):
+            chunk = conn.recv(RECV_CHUNK)
+            if not chunk:
+                break
+            buf += chunk
+        return json.loads(buf.decode())
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Micro-benchmark
+# ---------------------------------------------------------------------------
+
+
+def _bench_socketpair(matrix: np.ndarray, binary: bool, iterations: int) -> float:
+    """Mean seconds per request for encode + send + recv + decode of `matrix`,
+    isolated from the model (a socketpair + thread stands in for the daemon)."""
+    server, client = socket.socketpair()
+
+    def serve() -> None:
+        for _ in range(iterations):
+            server.recv(RECV_CHUNK)
+            server.sendall(pack_vectors(matrix) if binary else pack_json(matrix, True))
+
+    worker = threading.Thread(target=serve, daemon=True)
+    worker.start()
+    try:
+        request = build_request(["x"] * len(matrix), binary=binary)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            client.sendall(request)
+            read_vectors(client)
+        return (time.perf_counter() - start) / iterations
+    finally:
+        worker.join()
+        server.close()
+        client.close()
+
+
+def _bench_daemon(sock_path: str, rows: int, binary: bool, iterations: int) -> float:
+    texts = [f"def handler_{i}(event): return event" for i in range(rows)]
+    request_vectors(sock_path, texts, binary=binary)  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        request_vectors(sock_path, texts, binary=binary)
+    return (time.perf_counter() - start) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=16)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument(
+        "--socket", help="benchmark a running daemon instead of a socketpair"
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="print the daemon's cache stats and exit"
+    )
+    args = parser.parse_args()
+
+    if args.stats:
+        if not args.socket:
+            parser.error("--stats requires --socket")
+        print(json.dumps(request_stats(args.socket), indent=2))
+        return
+
+    matrix = np.random.default_rng(0).standard_normal((args.rows, args.dim))
+    matrix = matrix.astype(np.float32)
+
+    for label, binary in (("json", False), ("f32", True)):
+        if args.socket:
+            seconds = _bench_daemon(args.socket, args.rows, binary, args.iterations)
+        else:
+            seconds = _bench_socketpair(matrix, binary, args.iterations)
+        print(
+            f"{label:>4}: {seconds * 1e6:9.1f} µs/request "
+            f"(rows={args.rows}, dim={args.dim}, n={args.iterations})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ Cross-platform (Windows, macOS, Linux)
 """
 
 import os
+import shutil
 import subprocess
 import sys
 from pathlib import Path
@@ -20,9 +21,13 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
+from lint_server import queued_lint  # noqa: E402
 from utils import (  # noqa: E402
+    cached_lint_results,
     find_project_root,
     get_hooks_logger,
+    group_lint_targets,
+    not_installed_results,
     parse_json_output,
     run_command_cwd,
     run_jscpd,
@@ -118,25 +123,52 @@ def _run_golangci_lint(resolved: Path, project_root: str) -> dict:
     }
 
 
-def _run_gofmt(resolved: Path, project_root: str) -> dict:
-    """Run gofmt -l to detect formatting diffs. Returns {success, output, error}."""
-    if not _check_tool_installed("gofmt"):
-        logger.debug("gofmt not installed, skipping fmt check for %s", resolved)
-        return {"success": True, "output": "", "error": "", "installed": False}
+def _run_gofmt(paths: list[Path], project_root: str) -> dict[Path, dict]:
+    """Run gofmt -l on paths in one run to detect formatting diffs. Returns
+    {success, output, error} per path.
 
-    cmd = f"gofmt -l {str(resolved)}"
-    logger.debug("Executing: %s (cwd=%s)", cmd, project_root)
-    result = _exec("gofmt", ["-l", str(resolved)], cwd=project_root)
-    # gofmt -l exits 0 even when files need formatting; non-empty output means unformatted.
-    unformatted = bool(result.get("output", "").strip())
-    if unformatted:
-        logger.warning("gofmt found unformatted file: %s", resolved)
-    return {
-        "success": result["success"] and not unformatted,
-        "output": result.get("output", ""),
-        "error": result.get("error", ""),
-        "installed": True,
+    gofmt has no config, so files whose bytes and gofmt binary are unchanged
+    since a previous run are served from the lint result cache.
+    """
+    gofmt_bin = shutil.which("gofmt")
+    if gofmt_bin is None:
+        logger.debug("gofmt not installed, skipping fmt check for %s", paths)
+        return not_installed_results(paths)
+
+    return cached_lint_results(
+        "gofmt",
+        gofmt_bin,
+        paths,
+        project_root,
+        [],
+        lambda misses: _gofmt_check(misses, project_root),
+        logger,
+    )
+
+
+def _gofmt_check(paths: list[Path], project_root: str) -> dict[Path, dict]:
+    args = ["-l", *(str(p) for p in paths)]
+    logger.debug("Executing: gofmt %s (cwd=%s)", " ".join(args), project_root)
+    result = _exec("gofmt", args, cwd=project_root)
+    # gofmt -l exits 0 even when files need formatting; it lists unformatted files.
+    listed = {
+        str((Path(project_root) / line.strip()).resolve()): line
+        for line in result.get("output", "").splitlines()
+        if line.strip()
     }
+    results = {}
+    for p in paths:
+        output = result.get("output", "") if len(paths) == 1 else listed.get(str(p), "")
+        unformatted = bool(output.strip())
+        if unformatted:
+            logger.warning("gofmt found unformatted file: %s", p)
+        results[p] = {
+            "success": result["success"] and not unformatted,
+            "output": output,
+            "error": result.get("error", ""),
+            "installed": True,
+        }
+    return results
 
 
 def maybe_run_golang_lint(file_path: str | None) -> dict[str, dict[str, Any] | None]:
@@ -175,18 +207,49 @@ def maybe_run_golang_lint(file_path: str | None) -> dict[str, dict[str, Any] | N
 
     result["govet"] = _run_govet(resolved, project_root)
     result["golangci_lint"] = _run_golangci_lint(resolved, project_root)
-    result["gofmt"] = _run_gofmt(resolved, project_root)
+    result["gofmt"] = _run_gofmt([resolved], project_root)[resolved]
     result["jscpd"] = run_jscpd(resolved, project_root, logger, "GolangLint")
     return result
 
 
+def maybe_run_golang_lint_batch(
+    file_paths: list[str],
+) -> dict[str, dict[str, dict[str, Any] | None]]:
+    """
+    maybe_run_golang_lint for a set of files: one gofmt run per project root.
+    go vet and golangci-lint only take files of a single package per run, so
+    they (and jscpd) still run per file.
+
+    Returns:
+        Dict keyed by resolved file path, values shaped like
+        maybe_run_golang_lint's result.
+    """
+    results: dict[str, dict[str, dict[str, Any] | None]] = {}
+    for project_root, paths in group_lint_targets(
+        file_paths, _GO_EXTS, logger, "GolangLint"
+    ).items():
+        gofmt = _run_gofmt(paths, project_root)
+        for p in paths:
+            results[str(p)] = {
+                "govet": _run_govet(p, project_root),
+                "golangci_lint": _run_golangci_lint(p, project_root),
+                "gofmt": gofmt[p],
+                "jscpd": run_jscpd(p, project_root, logger, "GolangLint"),
+            }
+    return results
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
 
 def main() -> None:
-    run_lint_hook_main("GolangLint", logger, maybe_run_golang_lint)
+    run_lint_hook_main(
+        "GolangLint",
+        logger,
+        queued_lint("golang_lint", _GO_EXTS, maybe_run_golang_lint),
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""Client shim for hook_host.py — forwards one hook event to the host process.
+
+Wired in claude/settings.json as the single command for an event:
+    python3 $AI_PROJECT_DIR/.claude/hooks/scripts/hook_client.py PreToolUse
+
+It reads the payload from stdin, sends it with this process's environment
+over the host's Unix socket and replays the combined exit code / stdout /
+stderr. This is the only part every
+event still pays for, so it stays stdlib-only and import-light: no utils, no
+uv, no numpy.
+
+If no host is listening (first event, inactivity timeout, or the host just
+exited because a hook script changed on disk) the event runs through
+hook_host.run_fallback() — dispatch.py as a single process — and a host is
+spawned in the background for the next event. The host answers
+{"fallback": true} for a request it won't run (its scripts changed on disk,
+or it failed before starting the hooks), which takes the same path. Once the
+hooks may have run, a failure is reported instead of running them again:
+blocking (exit 2) for PreToolUse, so a deny gate never fails open, and a
+non-blocking error otherwise. Set HOOK_HOST_DISABLED=1 to always take the
+fallback path.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sys
+
+HOST_DISABLE_ENV = "HOOK_HOST_DISABLED"
+# Environment the routed hooks read at import time. A host is keyed by cwd plus
+# these, so it never serves a session it doesn't match; the rest of the client
+# environment is sent with each request and applied per event.
+HOST_ENV_KEYS = (
+    "AI_PROJECT_DIR",
+    "CLAUDE_PROJECT_DIR",
+    "CLAUDE_SETTINGS_PATH",
+    "PROTECTED_BRANCHES",
+    "LINT_SERVERS_DISABLED",
+    "PROTECT_FILES_EXTRA_ALLOWED",
+    "SMART_APPROVE_VERBOSE",
+    "TMUX",
+    "STY",
+)
+CONNECT_TIMEOUT = 0.5  # seconds; a live host accepts immediately
+RESPONSE_TIMEOUT = 75.0  # above DEFAULT_HOOK_TIMEOUT, below the settings.json timeout (90)
+RECV_CHUNK = 65536
+FALLBACK_REPLY = {"fallback": True}
+
+
+def host_key(cwd: str | None = None) -> str:
+    cwd = cwd or os.getcwd()
+    env = "\0".join(f"{key}={os.environ.get(key, '')}" for key in HOST_ENV_KEYS)
+    return hashlib.sha1(f"{cwd}\0{env}".encode()).hexdigest()[:12]
+
+
+def get_socket_path(key: str | None = None) -> str:
+    return f"/tmp/hook-host-{os.getuid()}-{key or host_key()}.sock"
+
+
+def get_pid_path(key: str | None = None) -> str:
+    return f"/tmp/hook-host-{os.getuid()}-{key or host_key()}.pid"
+
+
+def event_name(event: str | None, payload: str) -> str | None:
+    if event:
+        return event
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return None
+    return data.get("hook_event_name") if isinstance(data, dict) else None
+
+
+def failure_result(event: str | None, message: str) -> dict:
+    """Result for an event whose hooks may have partly run."""
+    return {
+        "exit_code": 2 if event == "PreToolUse" else 1,
+        "stdout": "",
+        "stderr": f"hook host failed: {message}\n",
+    }
+
+
+def request_host(event: str | None, payload: str, sock_path: str) -> dict | None:
+    """One round trip to the host; returns {"exit_code", "stdout", "stderr"},
+    or None when the host asks the client to run the event itself.
+
+    Raises OSError if the host isn't reachable or the request couldn't be
+    sent whole: the host runs nothing before the request's final newline.
+    Failures after that come back as failure_result().
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.settimeout(CONNECT_TIMEOUT)
+        conn.connect(sock_path)
+        conn.settimeout(RESPONSE_TIMEOUT)
+        request = {"event": event, "payload": payload, "env": dict(os.environ)}
+        conn.sendall((json.dumps(request) + "\n").encode())
+        try:
+            buf = bytearray()
+            while not buf.endswith(b"\n"):
+                chunk = conn.recv(RECV_CHUNK)
+                if not chunk:
+                    raise ConnectionError("hook host closed the connection")
+                buf += chunk
+            result = json.loads(buf.decode())
+        except (OSError, ValueError) as exc:
+            return failure_result(event_name(event, payload), str(exc))
+        return None if result == FALLBACK_REPLY else result
+    finally:
+        conn.close()
+
+
+def main():
+    event = sys.argv[1] if len(sys.argv) > 1 else None
+    payload = sys.stdin.read()
+    use_host = not os.environ.get(HOST_DISABLE_ENV)
+
+    result = None
+    if use_host:
+        try:
+            result = request_host(event, payload, get_socket_path())
+        except OSError:
+            result = None
+
+    if result is None:
+        from hook_host import run_fallback, spawn_host
+
+        if use_host:
+            spawn_host()
+        result = run_fallback(event, payload)
+
+    sys.stdout.write(result["stdout"])
+    sys.stderr.write(result["stderr"])
+    sys.exit(result["exit_code"])
+
+
+if __name__ == "__main__":
+    main()
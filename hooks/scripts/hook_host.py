@@ -0,0 +1,452 @@
+#!/usr/bin/python3
+"""Persistent hook host — imports the hook scripts once and runs them in-process.
+
+claude/settings.json used to wire ~10 `uv run --project ... <hook>.py`
+commands to every PreToolUse/PostToolUse event. Each one paid uv resolution,
+interpreter startup and the imports of utils/numpy/... before doing a few
+milliseconds of real work. Now a single hook_client.py call per event forwards
+the payload to this host, which keeps a dispatch.Dispatcher alive: every
+routed hook module is imported once at startup, and each event runs the hooks
+dispatch.HOOK_ROUTES selects in parallel threads (Claude Code already ran a
+matcher group's hooks in parallel, so none of them rely on ordering), merged
+into one exit code / stdout / stderr by dispatch.merge_results().
+
+One host per project directory and hook environment (hook_client.host_key),
+flock'd as a singleton. Each request carries the client's environment, which
+becomes os.environ for that event (see ClientEnv). It exits after INACTIVITY_TIMEOUT, and as soon as any
+script in this directory changes on disk, so edits to a hook never run stale;
+the client then runs dispatch.py as one process and spawns a fresh host.
+
+Compare per-event latency of per-script processes, dispatch.py and the host:
+    python3 hook_host.py --bench [--iterations N]
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+from dispatch import (  # noqa: E402
+    DEFAULT_HOOK_TIMEOUT,
+    HOOK_ENV,
+    HOOK_TIMEOUTS,
+    Dispatcher,
+    apply_hook_env,
+    install_stream_proxies,
+    merge_results,
+    parse_event,
+    prepare_process,
+    routed_hooks,
+    select_hooks,
+)
+from hook_client import (  # noqa: E402
+    FALLBACK_REPLY,
+    HOST_DISABLE_ENV,
+    event_name,
+    failure_result,
+    get_pid_path,
+    get_socket_path,
+    host_key,
+)
+from utils import get_hooks_logger  # noqa: E402
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+CLIENT_SCRIPT = SCRIPTS_DIR / "hook_client.py"
+DISPATCH_SCRIPT = SCRIPTS_DIR / "dispatch.py"
+
+INACTIVITY_TIMEOUT = 30 * 60  # 30 min
+MAX_CONNECTIONS = 8  # events served concurrently
+MAX_HOOK_WORKERS = 32  # hooks running concurrently across those events
+STARTUP_TIMEOUT = 30.0  # seconds --bench waits for a spawned host
+RECV_CHUNK = 65536
+
+LOG = get_hooks_logger("HookHost")
+
+
+# ---------------------------------------------------------------------------
+# Fallback: dispatch.py as one process
+# ---------------------------------------------------------------------------
+
+
+def hook_command(script: Path) -> list[str]:
+    """Interpreter command for a hook script: the project's uv environment
+    when available (what settings.json used), else this interpreter."""
+    project_dir = os.environ.get("AI_PROJECT_DIR")
+    if project_dir and shutil.which("uv"):
+        return ["uv", "run", "--project", project_dir, str(script)]
+    return [sys.executable, str(script)]
+
+
+def run_fallback(event: str | None, payload: str) -> dict:
+    """Run the event through dispatch.py in a single process."""
+    timeout = max(HOOK_TIMEOUTS.values(), default=0) + DEFAULT_HOOK_TIMEOUT
+    try:
+        proc = subprocess.run(
+            hook_command(DISPATCH_SCRIPT) + ([event] if event else []),
+            input=payload,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        LOG.warning(f"dispatch.py failed: {exc}")
+        return {"exit_code": 1, "stdout": "", "stderr": f"dispatch.py failed: {exc}\n"}
+    return {"exit_code": proc.returncode, "stdout": proc.stdout, "stderr": proc.stderr}
+
+
+def run_subprocess(hook: str, payload: str) -> dict:
+    timeout = HOOK_TIMEOUTS.get(hook, DEFAULT_HOOK_TIMEOUT)
+    try:
+        proc = subprocess.run(
+            hook_command(SCRIPTS_DIR / f"{hook}.py"),
+            input=payload,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            env={**os.environ, **HOOK_ENV.get(hook, {})},
+        )
+    except subprocess.TimeoutExpired:
+        return {"hook": hook, "exit_code": 1, "stdout": "", "stderr": f"timed out after {timeout}s"}
+    except OSError as exc:
+        return {"hook": hook, "exit_code": 1, "stdout": "", "stderr": str(exc)}
+    return {
+        "hook": hook,
+        "exit_code": proc.returncode,
+        "stdout": proc.stdout,
+        "stderr": proc.stderr,
+    }
+
+
+def run_per_script(event: str | None, payload: str) -> dict:
+    """Run the event's hooks as separate processes (in parallel) and merge —
+    how settings.json ran them before the host; kept as the --bench baseline."""
+    event, tool_name = parse_event(event, payload)
+    hooks = select_hooks(event, tool_name)
+    if not hooks:
+        return {"exit_code": 0, "stdout": "", "stderr": ""}
+    with ThreadPoolExecutor(max_workers=len(hooks)) as pool:
+        results = list(pool.map(lambda hook: run_subprocess(hook, payload), hooks))
+    return merge_results(event, results, payload)
+
+
+def spawn_host() -> None:
+    """Start a detached host for this cwd/environment; a no-op if one holds
+    the singleton lock already."""
+    try:
+        subprocess.Popen(
+            hook_command(Path(__file__).resolve()),
+            cwd=os.getcwd(),
+            start_new_session=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError as exc:
+        LOG.warning(f"Could not spawn hook host: {exc}")
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+
+def scripts_stamp() -> dict[str, int]:
+    return {path.name: path.stat().st_mtime_ns for path in SCRIPTS_DIR.glob("*.py")}
+
+
+def acquire_singleton(pid_path: str):
+    """Exclusive flock on the PID file, or None if another host holds it."""
+    handle = open(pid_path, "a+")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+class ClientEnv:
+    """os.environ is process-wide, so events run concurrently only while they
+    share one client environment; an event from a client with a different
+    one waits for the running events to finish, then swaps it in."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._current: dict | None = None
+        self._active = 0
+
+    def acquire(self, env: dict | None) -> None:
+        with self._cond:
+            while env is not None and self._active and env != self._current:
+                self._cond.wait()
+            if env is not None and env != self._current:
+                os.environ.clear()
+                os.environ.update(env)
+                apply_hook_env()
+                self._current = env
+            self._active += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+
+def send_reply(conn: socket.socket, reply: dict) -> None:
+    try:
+        conn.sendall((json.dumps(reply) + "\n").encode())
+    except OSError as exc:
+        LOG.warning(f"Could not reply to hook client: {exc}")
+
+
+def decline(conn: socket.socket) -> None:
+    """Read the request (so the client's send completes) and answer
+    FALLBACK_REPLY: the client runs the event through dispatch.py."""
+    try:
+        conn.settimeout(5)
+        buf = bytearray()
+        while not buf.endswith(b"\n"):
+            chunk = conn.recv(RECV_CHUNK)
+            if not chunk:
+                return
+            buf += chunk
+        send_reply(conn, FALLBACK_REPLY)
+    except OSError as exc:
+        LOG.warning(f"Could not decline hook request: {exc}")
+    finally:
+        conn.close()
+
+
+def serve_connection(conn: socket.socket, host: Dispatcher, client_env: ClientEnv) -> None:
+    """Every request gets a reply: the result, FALLBACK_REPLY if no hook ran
+    yet, or failure_result() if some may have."""
+    try:
+        request = None
+        try:
+            buf = bytearray()
+            while not buf.endswith(b"\n"):
+                chunk = conn.recv(RECV_CHUNK)
+                if not chunk:
+                    return
+                buf += chunk
+            request = json.loads(buf.decode())
+            start = time.perf_counter()
+            client_env.acquire(request.get("env"))
+            try:
+                result = host.run_event(request.get("event"), request.get("payload", ""))
+            finally:
+                client_env.release()
+            LOG.debug(
+                f"{request.get('event')} served in {(time.perf_counter() - start) * 1000:.1f} ms "
+                f"(exit={result['exit_code']})"
+            )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            LOG.error(f"Hook host request failed: {e}")
+            if not isinstance(request, dict):
+                result = FALLBACK_REPLY
+            else:
+                payload = request.get("payload", "")
+                result = failure_result(event_name(request.get("event"), payload), str(e))
+        send_reply(conn, result)
+    finally:
+        conn.close()
+
+
+def serve() -> None:
+    key = host_key()
+    sock_path, pid_path = get_socket_path(key), get_pid_path(key)
+
+    pid_lock = acquire_singleton(pid_path)
+    if pid_lock is None:
+        LOG.debug(f"Hook host already running — socket={sock_path}")
+        sys.exit(0)
+    LOG.debug(f"Hook host starting — cwd={os.getcwd()} socket={sock_path}")
+
+    prepare_process()
+    host = Dispatcher(install_stream_proxies(), max_workers=MAX_HOOK_WORKERS)
+    host.load(routed_hooks())
+    stamp = scripts_stamp()
+
+    if Path(sock_path).exists():
+        Path(sock_path).unlink()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(sock_path)
+    os.chmod(sock_path, 0o600)  # shared /tmp: only this user's hooks may connect
+    server.listen(64)
+    server.settimeout(60)  # wake up every 60s to check inactivity
+
+    pool = ThreadPoolExecutor(max_workers=MAX_CONNECTIONS, thread_name_prefix="event")
+    client_env = ClientEnv()
+    last_activity = time.monotonic()
+
+    def shutdown(signum, frame):
+        LOG.debug("Hook host shutting down")
+        # Clients already queued on the listener run the event themselves.
+        server.setblocking(False)
+        while True:
+            try:
+                pending, _ = server.accept()
+            except OSError:
+                break
+            decline(pending)
+        server.close()
+        for path in (sock_path, pid_path):
+            try:
+                Path(path).unlink()
+            except FileNotFoundError:
+                pass
+        pid_lock.close()
+        pool.shutdown(wait=True)
+        os._exit(0)  # hook threads that timed out can't be joined
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    LOG.debug("Hook host ready")
+
+    while True:
+        if time.monotonic() - last_activity > INACTIVITY_TIMEOUT:
+            LOG.debug("Inactivity timeout — exiting")
+            shutdown(None, None)
+
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            continue
+
+        last_activity = time.monotonic()
+        if scripts_stamp() != stamp:
+            LOG.debug("Hook scripts changed on disk — exiting so the next event loads them")
+            decline(conn)
+            shutdown(None, None)
+        pool.submit(serve_connection, conn, host, client_env)
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+BENCH_EVENTS = [
+    (
+        "PreToolUse",
+        {
+            "hook_event_name": "PreToolUse",
+            "session_id": "hook-host-bench",
+            "tool_name": "Bash",
+            "tool_input": {"command": "git status"},
+        },
+    ),
+    (
+        "PreToolUse",
+        {
+            "hook_event_name": "PreToolUse",
+            "session_id": "hook-host-bench",
+            "tool_name": "Read",
+            "tool_input": {"file_path": "README.md"},
+        },
+    ),
+]
+
+
+def _time_per_script(event: str, payload: dict, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run_per_script(event, json.dumps(payload))
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _time_client(event: str, payload: dict, iterations: int, env: dict) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(CLIENT_SCRIPT), event],
+            input=json.dumps(payload),
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _wait_for_host(sock_path: str) -> bool:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(sock_path)
+            return True
+        except OSError:
+            time.sleep(0.1)
+        finally:
+            probe.close()
+    return False
+
+
+def benchmark(iterations: int) -> None:
+    """Per-event latency as Claude Code sees it: one process per hook script
+    (the old settings.json wiring), hook_client.py falling back to a single
+    dispatch.py process (HOOK_HOST_DISABLED=1), and hook_client.py talking
+    to the running host."""
+    print(f"runner: {' '.join(hook_command(Path('<hook>.py')))}")
+    without_host = {**os.environ, HOST_DISABLE_ENV: "1"}
+    with_host = {k: v for k, v in os.environ.items() if k != HOST_DISABLE_ENV}
+
+    spawn_host()
+    if not _wait_for_host(get_socket_path()):
+        print("hook host did not come up; see ~/.claude/logs/hooks.log")
+        return
+
+    for event, payload in BENCH_EVENTS:
+        hooks = select_hooks(event, payload["tool_name"])
+        label = f"{event}:{payload['tool_name']} ({len(hooks)} hooks)"
+        runs = (
+            ("scripts", lambda: _time_per_script(event, payload, iterations)),
+            ("dispatch", lambda: _time_client(event, payload, iterations, without_host)),
+            ("host", lambda: _time_client(event, payload, iterations, with_host)),
+        )
+        for mode, run in runs:
+            samples = run()
+            print(
+                f"{label:<28} {mode:>8}: mean {statistics.mean(samples) * 1000:8.1f} ms  "
+                f"p50 {statistics.median(samples) * 1000:8.1f} ms  (n={iterations})"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--bench", action="store_true", help="compare per-event latency of scripts, dispatch.py and the host"
+    )
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.iterations)
+        return
+    serve()
+
+
+if __name__ == "__main__":
+    main()
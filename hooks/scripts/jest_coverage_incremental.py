@@ -2,12 +2,15 @@
 """
 Incremental Jest coverage hook.
 
-After a JS/TS file is edited, if the project has jest installed, spawns a
-detached background process that:
-  1. runs jest --coverage scoped to the edited file into a partial dir
+After a JS/TS file is edited, if the project has jest installed, queues the
+file for the project's background coverage worker (jest_coverage_worker.py)
+and starts the worker if none is running. The worker:
+  1. waits for the burst of edits to settle, then runs one
+     jest --coverage --findRelatedTests for every queued file into a
+     partial dir
   2. merges the partial coverage into the project's existing coverage dir
-     (coverage-final.json, coverage-summary.json, and the changed file's
-     lcov-report HTML page) so total coverage stays up to date.
+     (coverage-final.json, coverage-summary.json) in a single pass, so
+     total coverage stays up to date.
 
 Fire-and-forget: does not block the PostToolUse hook response.
 """
@@ -22,13 +25,11 @@ if script_dir not in sys.path:
     sys.path.append(script_dir)
 
 from utils import (  # noqa: E402
-    acquire_lock,
-    find_last_coverage_dir,
+    coverage_queue_entry,
     find_project_root,
     get_by_key,
     get_hooks_logger,
     jest_installed,
-    lock_path_for,
     spawn_background,
     tmp_project_dir,
 )
@@ -38,6 +39,26 @@ logger = get_hooks_logger("CoverageIncremental")
 _JS_TS_EXTS = {".js", ".jsx", ".ts", ".tsx"}
 
 
+def queue_coverage_update(tmp_dir: Path, rel_path: str) -> None:
+    """Add rel_path to the worker's queue, replacing an entry still waiting
+    for the same file."""
+    entry = coverage_queue_entry(tmp_dir, "queue", rel_path)
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp_entry = entry.with_name(f".{entry.name}.{os.getpid()}")
+    tmp_entry.write_text(rel_path)
+    os.replace(tmp_entry, entry)
+
+
+def worker_running(tmp_dir: Path) -> bool:
+    """The worker keeps its PID in worker.pid until its queue is drained."""
+    try:
+        pid = int((tmp_dir / "worker.pid").read_text().strip())
+        os.kill(pid, 0)
+    except (ValueError, OSError):
+        return False
+    return True
+
+
 def maybe_run_incremental_coverage(file_path: str | None) -> None:
     if not file_path:
         return
@@ -55,31 +76,24 @@ def maybe_run_incremental_coverage(file_path: str | None) -> None:
         logger.debug("Jest not installed in %s, skipping.", project_root)
         return
 
-    coverage_dir = find_last_coverage_dir(project_root)
     rel_path = os.path.relpath(str(resolved), project_root)
     tmp_dir = tmp_project_dir(project_root, "jest-coverage-incremental")
 
-    lock_file = lock_path_for(tmp_dir, rel_path)
-    if not acquire_lock(lock_file):
-        logger.debug("Coverage run already in progress for %s, skipping.", rel_path)
+    # Queue first, then look for the worker: a worker that is about to exit
+    # re-checks the queue after dropping its PID file, so the entry is never
+    # stranded.
+    queue_coverage_update(tmp_dir, rel_path)
+    if worker_running(tmp_dir):
+        logger.debug("Queued %s for the running coverage worker.", rel_path)
         return
 
-    partial_dir = str(tmp_dir / "partials" / rel_path.replace("/", "_"))
-
-    jest_cmd = (
-        f"node_modules/.bin/jest --findRelatedTests {json.dumps(rel_path)} "
-        f"--coverage --coverageDirectory={json.dumps(partial_dir)} "
-        f"--collectCoverageFrom={json.dumps(rel_path)} --passWithNoTests"
+    worker_cmd = (
+        f"{json.dumps(sys.executable)} "
+        f"{json.dumps(str(Path(script_dir) / 'jest_coverage_worker.py'))} "
+        f"{json.dumps(project_root)}"
     )
-    merge_cmd = (
-        f"{json.dumps(sys.executable)} {json.dumps(str(Path(script_dir) / 'merge_coverage.py'))} "
-        f"{json.dumps(partial_dir)} {json.dumps(coverage_dir)} {json.dumps(rel_path)}"
-    )
-
-    release_cmd = f"rm -f {json.dumps(str(lock_file))}"
-    full_cmd = f"{jest_cmd}; {merge_cmd}; {release_cmd}"
-    logger.debug("Spawning background coverage update: %s", full_cmd)
-    spawn_background(full_cmd, project_root, tmp_dir / "coverage-incremental.log")
+    logger.debug("Queued %s, spawning coverage worker: %s", rel_path, worker_cmd)
+    spawn_background(worker_cmd, project_root, tmp_dir / "coverage-incremental.log")
 
 
 def main() -> None:
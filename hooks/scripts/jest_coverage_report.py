@@ -21,12 +21,12 @@ if script_dir not in sys.path:
     sys.path.append(script_dir)
 
 from utils import (  # noqa: E402
+    coverage_update_pending,
     find_last_coverage_dir,
     find_project_root,
     get_by_key,
     get_hooks_logger,
     jest_installed,
-    lock_path_for,
     tmp_project_dir,
 )
 
@@ -92,8 +92,7 @@ def build_coverage_context(file_path: str | None) -> str | None:
 
     rel_path_for_lock = os.path.relpath(str(resolved), project_root)
     tmp_dir = tmp_project_dir(project_root, "jest-coverage-incremental")
-    lock_file = lock_path_for(tmp_dir, rel_path_for_lock)
-    if lock_file.exists():
+    if coverage_update_pending(tmp_dir, rel_path_for_lock):
         logger.debug(
             "Incremental coverage run still in progress for %s, coverage may be stale.",
             rel_path_for_lock,
@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+"""Incremental Jest coverage worker — one per project, started on demand.
+
+jest_coverage_incremental.py used to spawn `jest --findRelatedTests <file>;
+merge_coverage.py ...` for every edited file. N edits meant N cold Jest
+boots running side by side, each merging into coverage-final.json on its
+own, so later merges could overwrite earlier ones. Now the hook only drops
+the file into this project's queue (utils.coverage_queue_entry, one entry
+per file so repeat edits collapse) and starts this worker if none is
+running.
+
+The worker waits until no new edit has been queued for COVERAGE_DEBOUNCE
+(at most COVERAGE_MAX_DELAY after it started waiting). It then moves the
+whole queue to running/ and runs one jest --coverage --findRelatedTests for
+every file in it. The partial coverage is merged into the coverage dir in
+one pass (merge_coverage.merge_partials). Files edited during a run are
+queued again and go into the next batch. With a single worker per project,
+the coverage dir has one writer at a time. The worker exits when the queue
+is empty.
+
+Usage: jest_coverage_worker.py <project_root>
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+from merge_coverage import merge_partials  # noqa: E402
+from utils import (  # noqa: E402
+    find_last_coverage_dir,
+    get_hooks_logger,
+    tmp_project_dir,
+)
+
+logger = get_hooks_logger("CoverageWorker")
+
+COVERAGE_DEBOUNCE = 2.0  # seconds without a new edit before a batch runs
+COVERAGE_MAX_DELAY = 15.0  # a steady stream of edits still runs this often
+JEST_TIMEOUT = 15 * 60  # seconds for one batched jest run
+
+
+def acquire_singleton(pid_path: Path):
+    """Exclusive flock on the PID file, or None if another worker holds it."""
+    handle = open(pid_path, "a+")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+def queued_entries(queue_dir: Path) -> list[Path]:
+    """Queue entries, skipping ones the hook is still writing (".<key>.<pid>")."""
+    try:
+        return [p for p in queue_dir.iterdir() if not p.name.startswith(".")]
+    except FileNotFoundError:
+        return []
+
+
+def requeue_interrupted(tmp_dir: Path) -> None:
+    """Put back entries a crashed worker left in running/; an entry queued
+    again since then is newer and wins."""
+    for entry in queued_entries(tmp_dir / "running"):
+        target = tmp_dir / "queue" / entry.name
+        if target.exists():
+            entry.unlink(missing_ok=True)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(entry, target)
+
+
+def wait_for_quiet(queue_dir: Path) -> list[Path]:
+    """Queue entries once no edit has been queued for COVERAGE_DEBOUNCE."""
+    deadline = time.time() + COVERAGE_MAX_DELAY
+    while True:
+        entries = queued_entries(queue_dir)
+        if not entries:
+            return []
+        newest = 0.0
+        for entry in entries:
+            try:
+                newest = max(newest, entry.stat().st_mtime)
+            except FileNotFoundError:
+                pass
+        wait = min(newest + COVERAGE_DEBOUNCE, deadline) - time.time()
+        if wait <= 0:
+            return entries
+        time.sleep(wait)
+
+
+def take_batch(tmp_dir: Path, entries: list[Path]) -> dict[Path, str]:
+    """Move entries to running/ and read their files; {running entry: rel_path}."""
+    running_dir = tmp_dir / "running"
+    running_dir.mkdir(parents=True, exist_ok=True)
+    batch = {}
+    for entry in entries:
+        target = running_dir / entry.name
+        try:
+            os.replace(entry, target)
+            batch[target] = target.read_text().strip()
+        except OSError:
+            continue
+    return batch
+
+
+def run_batch(project_root: str, tmp_dir: Path, rel_paths: list[str]) -> None:
+    """One jest run for every file in the batch, merged in one pass."""
+    partial_dir = tmp_dir / "partials" / "batch"
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    cmd = [
+        "node_modules/.bin/jest",
+        "--findRelatedTests",
+        *rel_paths,
+        "--coverage",
+        f"--coverageDirectory={partial_dir}",
+        f"--collectCoverageFrom={json.dumps(rel_paths)}",
+        "--passWithNoTests",
+    ]
+    logger.debug("Running batched coverage for %d file(s): %s", len(rel_paths), cmd)
+    start = time.monotonic()
+    try:
+        # Failing tests still produce coverage, so the exit code is ignored
+        subprocess.run(
+            cmd,
+            cwd=project_root,
+            stdin=subprocess.DEVNULL,
+            timeout=JEST_TIMEOUT,
+        )
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        logger.warning("Batched jest run failed: %s", exc)
+        return
+    coverage_dir = Path(find_last_coverage_dir(project_root))
+    merged = merge_partials([partial_dir], coverage_dir)
+    logger.debug(
+        "Coverage batch of %d file(s) done in %.1fs (merged=%s)",
+        len(rel_paths),
+        time.monotonic() - start,
+        merged,
+    )
+
+
+def drain_queue(project_root: str, tmp_dir: Path) -> None:
+    queue_dir = tmp_dir / "queue"
+    while True:
+        entries = wait_for_quiet(queue_dir)
+        if not entries:
+            return
+        batch = take_batch(tmp_dir, entries)
+        rel_paths = sorted(
+            {rel for rel in batch.values() if (Path(project_root) / rel).exists()}
+        )
+        try:
+            if rel_paths:
+                run_batch(project_root, tmp_dir, rel_paths)
+        finally:
+            for running_entry in batch:
+                running_entry.unlink(missing_ok=True)
+
+
+def main() -> None:
+    project_root = os.path.abspath(sys.argv[1])
+    tmp_dir = tmp_project_dir(project_root, "jest-coverage-incremental")
+    pid_path = tmp_dir / "worker.pid"
+    while True:
+        handle = acquire_singleton(pid_path)
+        if handle is None:
+            logger.debug("Coverage worker already running for %s", project_root)
+            return
+        try:
+            requeue_interrupted(tmp_dir)
+            drain_queue(project_root, tmp_dir)
+        finally:
+            # Drop the PID file before the final queue check below: a hook
+            # that still saw it queued its file before that check runs.
+            pid_path.unlink(missing_ok=True)
+            handle.close()
+        if not queued_entries(tmp_dir / "queue"):
+            return
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.debug("Error: %s", exc)
+        sys.exit(0)
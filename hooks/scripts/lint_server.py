@@ -0,0 +1,637 @@
+#!/usr/bin/python3
+"""Per-project lint server — keeps long-lived checkers warm for the lint hooks.
+
+typescript_lint.py used to spawn `tsc-files --noEmit` for every Edit/Write,
+and each run paid a full TypeScript cold start: load the compiler, read the
+tsconfig, parse and bind every file the edited one imports. On large
+projects that's seconds per edit. This server holds one tsserver process per
+project root instead. The project graph stays loaded, so a re-check after an
+edit only re-reads the changed file and re-runs its diagnostics.
+
+mypy and ESLint don't go through here: they ship their own daemons with a
+one-shot client (dmypy, eslint_d), which the lint hooks call directly.
+
+The server also runs the per-project lint queue (LintQueue). The lint hooks
+hand each edited file to it via queued_lint() and return at once with the
+latest finished result for that file. Bursts of Edit/Write calls are
+coalesced per file, debounced, and linted in one batched run per tool
+instead of one run per edit.
+
+Started lazily: the first lint request for a project finds no socket,
+spawns this server (spawn_lint_server) with that file to warm up, and lints
+cold for that one edit. Later requests reuse it until INACTIVITY_TIMEOUT.
+Set LINT_SERVERS_DISABLED=1 to always lint cold.
+
+Protocol: one newline-terminated JSON request per connection.
+    {"check": "typescript", "file": "/abs/path.ts"}
+        -> {"success": ..., "output": "...", "error": "", "installed": true}
+    {"queue": "python_lint", "file": "/abs/path.py"}
+        -> {"result": {...latest finished hook result...} | null}
+Errors come back as {"error": "..."} with no "success" key; the client then
+falls back to the cold path.
+"""
+
+import argparse
+import collections
+import fcntl
+import hashlib
+import importlib
+import json
+import logging
+import os
+import queue
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.append(script_dir)
+
+from utils import find_project_root  # noqa: E402
+
+LINT_SERVERS_DISABLE_ENV = "LINT_SERVERS_DISABLED"
+# Lint hook module -> its batch function (list of files -> result per file)
+LINT_BATCHES = {
+    "python_lint": "maybe_run_python_lint_batch",
+    "typescript_lint": "maybe_run_typescript_lint_batch",
+    "golang_lint": "maybe_run_golang_lint_batch",
+    "md_json_lint": "maybe_run_md_json_lint_batch",
+}
+LINT_DEBOUNCE = 0.5  # seconds without a new edit before a batch runs
+LINT_MAX_DELAY = 5.0  # a steady stream of edits is still linted this often
+MAX_QUEUE_RESULTS = 1000  # finished per-file results kept for submit()
+INACTIVITY_TIMEOUT = 30 * 60  # 30 min
+MAX_WORKERS = 4  # concurrent connections being served
+CONNECT_TIMEOUT = 0.5  # seconds; a live server accepts immediately
+REQUEST_TIMEOUT = 30.0  # seconds, same budget as a cold run_command_cwd
+MAX_OPEN_FILES = 64  # files kept open in tsserver before the oldest is closed
+RECV_CHUNK = 65536
+
+
+class LintServerError(Exception):
+    pass
+
+
+_local_server: "LintServer | None" = None  # set inside the server process
+
+
+# ---------------------------------------------------------------------------
+# Client side (imported by the lint hooks)
+# ---------------------------------------------------------------------------
+
+
+def lint_servers_enabled() -> bool:
+    return not os.environ.get(LINT_SERVERS_DISABLE_ENV)
+
+
+def server_key(project_root: str) -> str:
+    return hashlib.sha1(project_root.encode()).hexdigest()[:12]
+
+
+def get_socket_path(project_root: str) -> str:
+    return f"/tmp/lint-server-{os.getuid()}-{server_key(project_root)}.sock"
+
+
+def get_pid_path(project_root: str) -> str:
+    return f"/tmp/lint-server-{os.getuid()}-{server_key(project_root)}.pid"
+
+
+def request_server(project_root: str, request: dict) -> dict | None:
+    """One round trip to the project's lint server.
+
+    Returns None when no server is listening (one is spawned, warmed with
+    the request's file, for the next edit) or it hung up without answering.
+    Inside the server itself (queued batches) the request is handled
+    in-process.
+    """
+    if _local_server is not None and _local_server.project_root == project_root:
+        try:
+            return _local_server.handle_request(request)
+        except (LintServerError, OSError) as e:
+            return {"error": str(e)}
+
+    sock_path = get_socket_path(project_root)
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.settimeout(CONNECT_TIMEOUT)
+        conn.connect(sock_path)
+        conn.settimeout(REQUEST_TIMEOUT)
+        conn.sendall((json.dumps(request) + "\n").encode())
+        buf = bytearray()
+        while not buf.endswith(b"\n"):
+            chunk = conn.recv(RECV_CHUNK)
+            if not chunk:
+                return None
+            buf += chunk
+        return json.loads(buf.decode())
+    except (FileNotFoundError, ConnectionRefusedError):
+        spawn_lint_server(project_root, request.get("file"))
+        return None
+    except (OSError, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def request_lint(project_root: str, check: str, file_path: str) -> dict | None:
+    """Ask the project's lint server to run `check` on file_path.
+
+    Returns the {success, output, error, installed} result, or None when the
+    server isn't there yet or couldn't answer. On None the caller lints cold.
+    """
+    response = request_server(project_root, {"check": check, "file": file_path})
+    if response is None or "success" not in response:
+        return None
+    return response
+
+
+def queued_lint(hook: str, exts: set[str], maybe_run_lint):
+    """Wrap a hook's maybe_run_*_lint so edits go through the project's
+    background lint queue.
+
+    The returned function enqueues the edited file and returns at once with
+    the latest finished result for it ({} until its first batch finishes),
+    so the PostToolUse hook never blocks on the linters. Without a server it
+    spawns one and lints this edit in the foreground, as before.
+    """
+
+    def run(file_path: str | None) -> dict:
+        if not file_path or not lint_servers_enabled():
+            return maybe_run_lint(file_path)
+        resolved = Path(file_path).resolve()
+        if resolved.suffix.lower() not in exts or not resolved.exists():
+            return maybe_run_lint(file_path)
+        project_root = find_project_root(str(resolved.parent))
+        response = request_server(project_root, {"queue": hook, "file": str(resolved)})
+        if response is None or "error" in response:
+            return maybe_run_lint(file_path)
+        return response.get("result") or {}
+
+    return run
+
+
+def spawn_lint_server(project_root: str, warm_file: str | None = None) -> None:
+    """Start a detached lint server for project_root (no-op if one holds the lock)."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--project-root", project_root]
+    if warm_file:
+        cmd += ["--warm", warm_file]
+    subprocess.Popen(
+        cmd,
+        cwd=project_root,
+        start_new_session=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def tsserver_path(project_root: str) -> Path | None:
+    """The project's own tsserver, so diagnostics match its TypeScript version."""
+    path = Path(project_root) / "node_modules" / "typescript" / "lib" / "tsserver.js"
+    return path if path.exists() else None
+
+
+# ---------------------------------------------------------------------------
+# tsserver
+# ---------------------------------------------------------------------------
+
+
+class TsServer:
+    """One tsserver process for a project root, driven over its stdio protocol.
+
+    Requests go in as JSON lines; responses and events come back as
+    Content-Length framed JSON, read by a background thread. Checks are
+    serialized: tsserver answers in order, and one project never needs two
+    concurrent checks.
+    """
+
+    def __init__(self, project_root: str, tsserver_js: Path, logger: logging.Logger):
+        self.project_root = project_root
+        self.logger = logger
+        node = shutil.which("node")
+        if node is None:
+            raise LintServerError("node not found")
+        self.proc = subprocess.Popen(
+            [
+                node,
+                str(tsserver_js),
+                "--disableAutomaticTypingAcquisition",
+                "--suppressDiagnosticEvents",
+            ],
+            cwd=project_root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.open_files: collections.OrderedDict[str, None] = collections.OrderedDict()
+        self.responses: queue.Queue = queue.Queue()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        logger.debug(f"tsserver started for {project_root} (pid {self.proc.pid})")
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def close(self) -> None:
+        if self.alive():
+            self.proc.kill()
+
+    def _read_loop(self) -> None:
+        stdout = self.proc.stdout
+        while True:
+            length = None
+            while True:
+                line = stdout.readline()
+                if not line:
+                    self.responses.put(None)
+                    return
+                line = line.strip()
+                if not line:
+                    if length is not None:
+                        break
+                    continue
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            try:
+                message = json.loads(stdout.read(length))
+            except ValueError:
+                continue
+            if message.get("type") == "response":
+                self.responses.put(message)
+
+    def _send(self, command: str, arguments: dict) -> int:
+        self.seq += 1
+        message = {"seq": self.seq, "type": "request", "command": command, "arguments": arguments}
+        self.proc.stdin.write((json.dumps(message) + "\n").encode())
+        self.proc.stdin.flush()
+        return self.seq
+
+    def _request(self, command: str, arguments: dict, deadline: float) -> dict:
+        seq = self._send(command, arguments)
+        while True:
+            try:
+                message = self.responses.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise LintServerError(f"tsserver timed out on {command}")
+            if message is None:
+                raise LintServerError("tsserver exited")
+            if message.get("request_seq") == seq:
+                if not message.get("success", False):
+                    raise LintServerError(message.get("message", f"{command} failed"))
+                return message
+
+    def _sync_file(self, file_path: str, deadline: float) -> None:
+        """Make tsserver see file_path's current bytes on disk."""
+        if file_path in self.open_files:
+            self.open_files.move_to_end(file_path)
+            self._request("reload", {"file": file_path, "tmpfile": file_path}, deadline)
+            return
+        self._send("open", {"file": file_path, "projectRootPath": self.project_root})
+        self.open_files[file_path] = None
+        while len(self.open_files) > MAX_OPEN_FILES:
+            oldest, _ = self.open_files.popitem(last=False)
+            self._send("close", {"file": oldest})
+
+    def warm(self, file_path: str) -> None:
+        """Open file_path so its project loads before the first real check."""
+        with self.lock:
+            deadline = time.monotonic() + REQUEST_TIMEOUT
+            self._sync_file(file_path, deadline)
+            self._request("syntacticDiagnosticsSync", {"file": file_path}, deadline)
+
+    def diagnostics(self, file_path: str) -> list[dict]:
+        with self.lock:
+            deadline = time.monotonic() + REQUEST_TIMEOUT
+            self._sync_file(file_path, deadline)
+            diagnostics = []
+            for command in ("syntacticDiagnosticsSync", "semanticDiagnosticsSync"):
+                response = self._request(command, {"file": file_path}, deadline)
+                diagnostics.extend(response.get("body") or [])
+            return diagnostics
+
+
+def format_ts_diagnostics(
+    file_path: str, diagnostics: list[dict], project_root: str
+) -> tuple[bool, str]:
+    """tsc's plain-text format ("a.ts(3,7): error TS2322: ..."), as tsc-files prints it."""
+    rel = os.path.relpath(file_path, project_root)
+    lines = []
+    success = True
+    for diag in diagnostics:
+        category = diag.get("category", "error")
+        if category == "error":
+            success = False
+        start = diag.get("start", {})
+        lines.append(
+            f"{rel}({start.get('line', 1)},{start.get('offset', 1)}): "
+            f"{category} TS{diag.get('code', '')}: {diag.get('text', '')}"
+        )
+    return success, "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Background lint queue
+# ---------------------------------------------------------------------------
+
+
+class LintQueue:
+    """Coalescing, debounced background lint queue for one project.
+
+    submit() records (hook, file) and returns the latest finished result
+    for it straight away. Repeat edits of a file while it's pending collapse
+    into one entry. A worker thread waits until edits pause for
+    LINT_DEBOUNCE (or LINT_MAX_DELAY has passed since the oldest pending
+    one), then hands each hook its whole pending file set in one call to
+    its batch function (LINT_BATCHES), which runs each tool once per
+    project root.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.cond = threading.Condition()
+        self.pending: dict[str, set[str]] = {}
+        self.first_pending = 0.0
+        self.last_submit = 0.0
+        self.running = False
+        self.results: collections.OrderedDict[tuple[str, str], dict] = (
+            collections.OrderedDict()
+        )
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def submit(self, hook: str, file_path: str) -> dict | None:
+        if hook not in LINT_BATCHES:
+            raise LintServerError(f"unknown lint hook: {hook}")
+        with self.cond:
+            now = time.monotonic()
+            if not self.pending:
+                self.first_pending = now
+            self.pending.setdefault(hook, set()).add(file_path)
+            self.last_submit = now
+            self.cond.notify()
+            return self.results.get((hook, file_path))
+
+    def busy(self) -> bool:
+        with self.cond:
+            return self.running or bool(self.pending)
+
+    def _take_batch(self) -> dict[str, set[str]]:
+        with self.cond:
+            while True:
+                if not self.pending:
+                    self.cond.wait()
+                    continue
+                due = min(
+                    self.last_submit + LINT_DEBOUNCE,
+                    self.first_pending + LINT_MAX_DELAY,
+                )
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                    continue
+                batch, self.pending = self.pending, {}
+                self.running = True
+                return batch
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._take_batch()
+            try:
+                for hook, files in batch.items():
+                    self._run(hook, sorted(files))
+            finally:
+                with self.cond:
+                    self.running = False
+
+    def _run(self, hook: str, files: list[str]) -> None:
+        start = time.monotonic()
+        try:
+            module = importlib.import_module(hook)
+            results = getattr(module, LINT_BATCHES[hook])(files)
+        except Exception as e:
+            self.logger.warning(f"{hook} batch failed for {files}: {e}")
+            self.logger.warning(traceback.format_exc())
+            return
+        with self.cond:
+            for file_path, result in results.items():
+                self.results[(hook, file_path)] = result
+                self.results.move_to_end((hook, file_path))
+            while len(self.results) > MAX_QUEUE_RESULTS:
+                self.results.popitem(last=False)
+        self.logger.debug(
+            f"{hook}: linted {len(files)} file(s) in one batch "
+            f"in {time.monotonic() - start:.2f}s"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+
+class LintServer:
+    def __init__(self, project_root: str, logger: logging.Logger):
+        self.project_root = project_root
+        self.logger = logger
+        self.tsserver: TsServer | None = None
+        self.tsserver_lock = threading.Lock()
+        self.queue = LintQueue(logger)
+
+    def get_tsserver(self) -> TsServer:
+        with self.tsserver_lock:
+            if self.tsserver is None or not self.tsserver.alive():
+                tsserver_js = tsserver_path(self.project_root)
+                if tsserver_js is None:
+                    raise LintServerError("typescript not installed")
+                self.tsserver = TsServer(self.project_root, tsserver_js, self.logger)
+            return self.tsserver
+
+    def reset_tsserver(self, server: TsServer) -> None:
+        with self.tsserver_lock:
+            server.close()
+            if self.tsserver is server:
+                self.tsserver = None
+
+    def check_typescript(self, file_path: str) -> dict:
+        server = self.get_tsserver()
+        try:
+            diagnostics = server.diagnostics(file_path)
+        except (LintServerError, OSError):
+            # A hung or dead tsserver is restarted on the next request.
+            self.reset_tsserver(server)
+            raise
+        success, output = format_ts_diagnostics(file_path, diagnostics, self.project_root)
+        return {"success": success, "output": output, "error": "", "installed": True}
+
+    def warm(self, file_path: str) -> None:
+        try:
+            if file_path.endswith((".ts", ".tsx")):
+                self.get_tsserver().warm(file_path)
+                self.logger.debug(f"tsserver warmed with {file_path}")
+        except Exception as e:
+            self.logger.debug(f"Warm-up failed for {file_path}: {e}")
+
+    def handle_request(self, request: dict) -> dict:
+        check = request.get("check")
+        file_path = request.get("file")
+        if not isinstance(file_path, str) or not os.path.isabs(file_path):
+            raise LintServerError("file must be an absolute path")
+        if "queue" in request:
+            return {"result": self.queue.submit(request["queue"], file_path)}
+        if check == "typescript":
+            return self.check_typescript(file_path)
+        raise LintServerError(f"unknown check: {check}")
+
+    def close(self) -> None:
+        if self.tsserver is not None:
+            self.tsserver.close()
+
+
+def serve_connection(conn: socket.socket, server: LintServer, logger: logging.Logger) -> None:
+    """Read one request off `conn`, answer it, close. Runs on a pool worker."""
+    data = b""
+    try:
+        conn.settimeout(REQUEST_TIMEOUT)
+        while not data.endswith(b"\n"):
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+        if not data:
+            return  # liveness probe
+        response = server.handle_request(json.loads(data.decode()))
+    except Exception as e:
+        logger.warning(f"Lint request error: {e} — raw data: {data[:200]!r}")
+        if not isinstance(e, LintServerError):
+            logger.warning(traceback.format_exc())
+        response = {"error": str(e)}
+    try:
+        conn.sendall((json.dumps(response) + "\n").encode())
+    except OSError:
+        pass
+    finally:
+        conn.close()
+
+
+def acquire_singleton(pid_path: str):
+    """Exclusive flock on the PID file, or None if another server holds it."""
+    handle = open(pid_path, "a+")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+def scripts_stamp() -> tuple:
+    """mtime/size of the hook scripts the queue imports."""
+    return tuple(
+        (p.name, p.stat().st_mtime_ns, p.stat().st_size)
+        for p in sorted(Path(script_dir).glob("*.py"))
+    )
+
+
+def setup_logger() -> logging.Logger:
+    logger = logging.getLogger("LintServer")
+    logger.setLevel(logging.DEBUG)
+    handler = logging.FileHandler(str(Path.home() / ".claude" / "logs" / "hooks.log"))
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s [%(levelname)s]-[%(name)s]: %(message)s")
+    )
+    logger.addHandler(handler)
+    return logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--project-root", required=True)
+    parser.add_argument("--warm", help="file to open before the first request")
+    args = parser.parse_args()
+
+    project_root = os.path.abspath(args.project_root)
+    sock_path = get_socket_path(project_root)
+    pid_path = get_pid_path(project_root)
+    LOG = setup_logger()
+
+    pid_lock = acquire_singleton(pid_path)
+    if pid_lock is None:
+        LOG.debug(f"Lint server already running for {project_root}")
+        sys.exit(0)
+
+    if Path(sock_path).exists():
+        Path(sock_path).unlink()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(sock_path)
+    os.chmod(sock_path, 0o600)
+    listener.listen(16)
+    listener.settimeout(60)  # wake up every 60s to check inactivity/scripts
+
+    # The lint hooks imported by queued batches `import lint_server`; point
+    # that at this module so their request_lint() calls reach `server`
+    # in-process instead of dialling our own socket.
+    global _local_server
+    sys.modules.setdefault("lint_server", sys.modules[__name__])
+    server = LintServer(project_root, LOG)
+    _local_server = server
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="lint")
+    last_activity = time.monotonic()
+    started_stamp = scripts_stamp()
+
+    def shutdown(signum, frame):
+        LOG.debug(f"Lint server for {project_root} shutting down")
+        listener.close()
+        server.close()
+        for p in (sock_path, pid_path):
+            try:
+                Path(p).unlink()
+            except FileNotFoundError:
+                pass
+        pid_lock.close()
+        os._exit(0)
+
+    def serve(conn: socket.socket) -> None:
+        nonlocal last_activity
+        try:
+            serve_connection(conn, server, LOG)
+        finally:
+            last_activity = time.monotonic()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    LOG.debug(f"Lint server ready for {project_root} — socket={sock_path}")
+    if args.warm:
+        pool.submit(server.warm, os.path.abspath(args.warm))
+
+    while True:
+        if not server.queue.busy():
+            if time.monotonic() - last_activity > INACTIVITY_TIMEOUT:
+                LOG.debug("Inactivity timeout — exiting")
+                shutdown(None, None)
+            if scripts_stamp() != started_stamp:
+                # queued batches import the hooks' code; don't keep serving
+                # a stale copy after the scripts are updated
+                LOG.debug("Hook scripts changed — exiting")
+                shutdown(None, None)
+        try:
+            conn, _ = listener.accept()
+        except socket.timeout:
+            continue
+        last_activity = time.monotonic()
+        pool.submit(serve, conn)
+
+
+if __name__ == "__main__":
+    main()
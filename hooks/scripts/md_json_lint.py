@@ -17,10 +17,13 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
+from lint_server import queued_lint  # noqa: E402
 from utils import (  # noqa: E402
     detect_formatter,
     find_project_root,
     get_hooks_logger,
+    group_lint_targets,
+    not_installed_results,
     resolve_formatter_bin,
     run_command_cwd,
     run_lint_hook_main,
@@ -57,29 +60,59 @@ def _run_biome_check(resolved: Path, project_root: str) -> dict:
     }
 
 
-def _run_prettier_check(resolved: Path, project_root: str) -> dict:
+def _split_prettier_check(
+    result: dict, paths: list[Path], project_root: str
+) -> dict[Path, dict]:
+    """Per-file results from one `prettier --check a b ...` run, which names
+    each unformatted file on a "[warn] <path>" line."""
+    if len(paths) == 1:
+        return {
+            p: {
+                "success": result["success"],
+                "output": result.get("output", ""),
+                "error": result.get("error", ""),
+                "installed": True,
+            }
+            for p in paths
+        }
+    batch = {str(p) for p in paths}
+    warned = {}
+    text = result.get("output", "") + "\n" + result.get("error", "")
+    for line in text.splitlines():
+        if line.startswith("[warn] "):
+            key = str((Path(project_root) / line[len("[warn] ") :].strip()).resolve())
+            if key in batch:
+                warned[key] = line
+    failed_all = not result["success"] and not warned  # crash, bad config
+    return {
+        p: {
+            "success": not failed_all and str(p) not in warned,
+            "output": result.get("output", "") if failed_all else "",
+            "error": result.get("error", "") if failed_all else warned.get(str(p), ""),
+            "installed": True,
+        }
+        for p in paths
+    }
+
+
+def _run_prettier_check(paths: list[Path], project_root: str) -> dict[Path, dict]:
     fmt_bin = resolve_formatter_bin(project_root, "prettier", logger)
     if not fmt_bin:
         logger.debug(
-            "Prettier configured but binary not found, skipping %s", resolved
+            "Prettier configured but binary not found, skipping %s", paths
         )
-        return {"success": True, "output": "", "error": "", "installed": False}
+        return not_installed_results(paths)
 
-    args = [*fmt_bin["prefix"], "--check", str(resolved)]
+    args = [*fmt_bin["prefix"], "--check", *(str(p) for p in paths)]
     result = _exec(fmt_bin["bin"], args, cwd=project_root)
     logger.debug(
-        "Prettier check result for %s: success=%s", resolved, result["success"]
+        "Prettier check result for %s: success=%s", paths, result["success"]
     )
     if not result["success"]:
         logger.warning(
-            "Prettier found issues in %s:\n%s", resolved, result.get("output", "")
+            "Prettier found issues in %s:\n%s", paths, result.get("output", "")
         )
-    return {
-        "success": result["success"],
-        "output": result.get("output", ""),
-        "error": result.get("error", ""),
-        "installed": True,
-    }
+    return _split_prettier_check(result, paths, project_root)
 
 
 def maybe_run_md_json_lint(file_path: str | None) -> dict:
@@ -106,15 +139,37 @@ def maybe_run_md_json_lint(file_path: str | None) -> dict:
     if formatter == "biome":
         result["biome"] = _run_biome_check(resolved, project_root)
     elif formatter == "prettier":
-        result["prettier"] = _run_prettier_check(resolved, project_root)
+        result["prettier"] = _run_prettier_check([resolved], project_root)[resolved]
     else:
         logger.debug("No formatter configured for %s, skipping.", resolved)
 
     return result
 
 
+def maybe_run_md_json_lint_batch(file_paths: list[str]) -> dict[str, dict]:
+    """maybe_run_md_json_lint for a set of files: one Prettier check per
+    project root; Biome still checks file by file. Keyed by resolved path."""
+    results: dict[str, dict] = {}
+    for project_root, paths in group_lint_targets(
+        file_paths, _MD_JSON_EXTS, logger, "MdJsonLint"
+    ).items():
+        formatter = detect_formatter(project_root, logger)
+        logger.debug("Detected formatter for %s: %s", project_root, formatter)
+        prettier = {}
+        if formatter == "prettier":
+            prettier = _run_prettier_check(paths, project_root)
+        for p in paths:
+            biome = _run_biome_check(p, project_root) if formatter == "biome" else None
+            results[str(p)] = {"biome": biome, "prettier": prettier.get(p)}
+    return results
+
+
 def main() -> None:
-    run_lint_hook_main("MdJsonLint", logger, maybe_run_md_json_lint)
+    run_lint_hook_main(
+        "MdJsonLint",
+        logger,
+        queued_lint("md_json_lint", _MD_JSON_EXTS, maybe_run_md_json_lint),
+    )
 
 
 if __name__ == "__main__":
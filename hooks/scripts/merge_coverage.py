@@ -1,13 +1,18 @@
 #!/usr/bin/python3
 """Merge a partial Istanbul coverage run into a project's coverage dir.
 
-Replaces nyc merge/report: merges coverage-final.json (sum s/f/b counters,
-keep statementMap/fnMap/branchMap from whichever side has them), recomputes
-coverage-summary.json from the merged final json, and swaps in the updated
-per-file HTML page(s) from the partial run's lcov-report.
+Replaces nyc merge: merges coverage-final.json (sum s/f/b counters, keep
+statementMap/fnMap/branchMap from whichever side has them) and recomputes
+coverage-summary.json from the merged final json. HTML reports are not
+touched.
+
+Usage: merge_coverage.py <partial_dir> <coverage_dir>
+(jest_coverage_worker.py calls merge_partials() directly.)
 """
 
+import fcntl
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -141,28 +146,50 @@ def build_summary(merged_final: dict) -> dict:
     return summary
 
 
+def _merge_lock_path(coverage_dir: Path) -> Path:
+    return coverage_dir / ".merge.lock"
 
-def main() -> None:
-    partial_dir = Path(sys.argv[1])
-    coverage_dir = Path(sys.argv[2])
-    rel_path = sys.argv[3] if len(sys.argv) > 3 else None
-    coverage_dir.mkdir(parents=True, exist_ok=True)
 
-    partial_file = partial_dir / "coverage-final.json"
-    if not partial_file.exists():
-        return
+def _write_atomic(path: Path, text: str) -> None:
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
 
-    partial = json.loads(partial_file.read_text())
 
-    coverage_file = coverage_dir / "coverage-final.json"
-    base = json.loads(coverage_file.read_text()) if coverage_file.exists() else {}
+def merge_partials(partial_dirs: list[Path], coverage_dir: Path) -> bool:
+    """Merge every partial run into coverage_dir in one pass: the base is
+    read once, each partial folded in, and coverage-final.json /
+    coverage-summary.json written once. Concurrent mergers into the same
+    coverage_dir are serialized by a lock, and each file is replaced
+    atomically so readers never see a half-written one. Returns False if
+    there was nothing to merge."""
+    partials = [
+        json.loads((d / "coverage-final.json").read_text())
+        for d in partial_dirs
+        if (d / "coverage-final.json").exists()
+    ]
+    if not partials:
+        return False
 
-    merged = merge_coverage(base, partial)
-    coverage_file.write_text(json.dumps(merged))
+    coverage_dir.mkdir(parents=True, exist_ok=True)
+    with open(_merge_lock_path(coverage_dir), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        coverage_file = coverage_dir / "coverage-final.json"
+        merged = json.loads(coverage_file.read_text()) if coverage_file.exists() else {}
+        for partial in partials:
+            merged = merge_coverage(merged, partial)
+        _write_atomic(coverage_file, json.dumps(merged))
+        _write_atomic(
+            coverage_dir / "coverage-summary.json",
+            json.dumps(build_summary(merged), indent=2),
+        )
+    return True
 
-    summary_file = coverage_dir / "coverage-summary.json"
-    summary_file.write_text(json.dumps(build_summary(merged), indent=2))
 
+def main() -> None:
+    partial_dir = Path(sys.argv[1])
+    coverage_dir = Path(sys.argv[2])
+    merge_partials([partial_dir], coverage_dir)
 
 
 if __name__ == "__main__":
@@ -16,7 +16,7 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
-from utils import get_by_key, get_hooks_logger, split_on_operators  # noqa: E402
+from utils import get_by_key, get_hooks_logger, parse_command  # noqa: E402
 
 logger = get_hooks_logger("ProtectBranches")
 
@@ -171,7 +171,7 @@ def main() -> None:
     if not command or "git" not in command:
         sys.exit(0)
 
-    for segment in split_on_operators(command):
+    for segment in parse_command(command).segments:
         if "git" not in segment:
             continue
         try:
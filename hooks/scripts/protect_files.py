@@ -3,14 +3,14 @@
 
 import fnmatch
 import glob
+import hashlib
 import json
 import os
 import re
 import shlex
-import shutil
-import subprocess
+import sqlite3
 import sys
-import tempfile
+import time
 import unicodedata
 from pathlib import Path
 from typing import Mapping
@@ -19,7 +19,12 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
-from utils import get_by_key, get_hooks_logger, split_on_operators  # noqa: E402
+from utils import (  # noqa: E402
+    get_by_key,
+    get_hooks_logger,
+    parse_command,
+    private_project_dir,
+)
 
 logger = get_hooks_logger("ProtectFiles")
 
@@ -218,10 +223,6 @@ INPUT_REDIRECT_OPERATORS = {"<", "<<"}
 
 SHELL_OPERATORS = {"|", ">", ">>", "<", "&&", "||", ";", "\n"}
 
-# bash process substitution: <(cmd) / >(cmd) — smuggles a command whose
-# output/input is a target file, bypassing normal tokenization entirely
-PROCESS_SUBSTITUTION_RE = re.compile(r"[<>]\(([^()]*)\)")
-
 # Shell keywords that are structural, not commands to scan for targets —
 # they appear as segments after splitting on ;/newlines inside for/while/if
 # blocks (e.g. "do", "done"). Ported from smart_approve.py.
@@ -273,37 +274,103 @@ def is_within_project(path: str) -> bool:
     return norm == PROJECT_ROOT or norm.startswith(PROJECT_ROOT.rstrip("/") + os.sep)
 
 
+FNMATCH_SPECIAL = frozenset("*?[")
+
+
+class PathPolicy:
+    """A pattern list compiled once for single-pass lookup.
+
+    A pattern matches a path when fnmatch.fnmatch(path, pattern) or
+    Path(path).match(pattern) accepts it, and match() returns the first such
+    pattern in list order — the same answer as trying each pattern in turn
+    with both, which is what this replaces.
+
+    - fnmatch: every pattern's fnmatch.translate() regex goes into one
+      alternation. re tries alternatives in order, so the named group that
+      matched is the first pattern fnmatch accepts.
+    - Path.match compares components from the right, so it can only accept
+      a path carrying the pattern's literal components at the same offsets.
+      Patterns are indexed by their rightmost literal component
+      (offset from the right, text), or by extension for a "*.ext" basename.
+      A path's components select a few candidates. Only those, plus
+      the patterns with no literal component at all, reach Path.match.
+    """
+
+    def __init__(self, patterns: list[str], casefold: bool = False):
+        self.patterns = patterns
+        self.casefold = casefold
+        self.keys = [p.lower() if casefold else p for p in patterns]
+        self.fnmatch_re = re.compile(
+            "|".join(f"(?P<p{i}>{fnmatch.translate(key)})" for i, key in enumerate(self.keys))
+        )
+        self.by_component: dict[tuple[int, str], list[int]] = {}
+        self.by_extension: dict[str, list[int]] = {}
+        self.unindexed: list[int] = []
+        for i, key in enumerate(self.keys):
+            self._index(i, key)
+        self.offsets = sorted({offset for offset, _ in self.by_component})
+
+    def _index(self, i: int, key: str) -> None:
+        pure = Path(key)
+        parts = pure.parts[1:] if pure.anchor else pure.parts
+        basename = parts[-1] if parts else ""
+        ext = basename[2:]
+        if basename[:2] == "*." and ext and "." not in ext and not FNMATCH_SPECIAL & set(ext):
+            self.by_extension.setdefault(ext, []).append(i)
+            return
+        for offset, part in enumerate(reversed(parts)):
+            if not FNMATCH_SPECIAL & set(part):
+                self.by_component.setdefault((offset, part), []).append(i)
+                return
+        self.unindexed.append(i)
+
+    def _path_match_candidates(self, p: Path) -> list[int]:
+        parts = p.parts[1:] if p.anchor else p.parts
+        if not parts:
+            return sorted(self.unindexed)
+        candidates = list(self.unindexed)
+        candidates += self.by_extension.get(parts[-1].rpartition(".")[2], ())
+        for offset in self.offsets:
+            if offset >= len(parts):
+                break
+            candidates += self.by_component.get((offset, parts[-1 - offset]), ())
+        return sorted(candidates)
+
+    def match(self, path: str) -> str | None:
+        """First pattern matching `path`, or None."""
+        if not self.patterns:
+            return None
+        key = path.lower() if self.casefold else path
+        found = self.fnmatch_re.match(key)
+        first = int(found.lastgroup[1:]) if found else len(self.patterns)
+        p = Path(key)
+        for i in self._path_match_candidates(p):
+            if i >= first:
+                break
+            if p.match(self.keys[i]):
+                first = i
+                break
+        return self.patterns[first] if first < len(self.patterns) else None
+
+
+ALLOWED_POLICY = PathPolicy(ALLOWED_PATTERNS)
+PROTECTED_POLICY = PathPolicy(PROTECTED_PATTERNS, casefold=True)
+
+
 def is_allowed(path: str) -> bool:
     """Check if path is in allowed patterns (safe to access)."""
-    p = Path(path)
-    for pattern in ALLOWED_PATTERNS:
-        if fnmatch.fnmatch(path, pattern) or p.match(pattern):
-            return True
-    return False
+    return ALLOWED_POLICY.match(path) is not None
 
 
 def matches_pattern(path: str) -> tuple[bool, str]:
-    """Match against protected patterns using pathlib semantics.
+    """Match against protected patterns using fnmatch + pathlib semantics.
 
     Matching is case-folded so a case-insensitive filesystem (macOS,
     Windows) can't be used to read ".env" via a differently-cased path
     like ".ENV" that would otherwise miss every pattern below.
     """
-    path_lower = path.lower()
-    p = Path(path_lower)
-
-    for pattern in PROTECTED_PATTERNS:
-        pattern_lower = pattern.lower()
-
-        # direct fnmatch (string-based)
-        if fnmatch.fnmatch(path_lower, pattern_lower):
-            return True, pattern
-
-        # pathlib match (more robust for **)
-        if p.match(pattern_lower):
-            return True, pattern
-
-    return False, ""
+    pattern = PROTECTED_POLICY.match(path)
+    return (True, pattern) if pattern is not None else (False, "")
 
 
 def expand_targets(targets: list[str]) -> list[str]:
@@ -340,88 +407,6 @@ def expand_env_vars(text: str) -> str:
     return ENV_VAR_RE.sub(repl, text)
 
 
-def extract_subshells(command: str) -> list[str]:
-    """Pull inner text out of $(...) / `...`, recursively, so it gets
-    scanned too. Depth-tracked (unlike a single regex), and skips $((...))
-    arithmetic expansion. Ported from smart_approve.py."""
-    subshells = []
-
-    i = 0
-    while i < len(command):
-        if (
-            command[i] == "$"
-            and i + 1 < len(command)
-            and command[i + 1] == "("
-            and not (i + 2 < len(command) and command[i + 2] == "(")
-        ):
-            depth = 0
-            start = i + 2
-            j = i + 1
-            while j < len(command):
-                if command[j] == "(":
-                    depth += 1
-                elif command[j] == ")":
-                    depth -= 1
-                    if depth == 0:
-                        content = command[start:j]
-                        subshells.append(content)
-                        subshells.extend(extract_subshells(content))
-                        break
-                j += 1
-            i = j + 1
-        else:
-            i += 1
-
-    parts = command.split("`")
-    for idx in range(1, len(parts), 2):
-        content = parts[idx]
-        if content.strip():
-            subshells.append(content)
-            subshells.extend(extract_subshells(content))
-
-    return subshells
-
-
-def neutralize_subshells(command: str) -> str:
-    """Replace each top-level $(...) / `...` span with a placeholder word.
-
-    Their contents are already scanned independently via extract_subshells()
-    — this just keeps shlex from mis-tokenizing the raw "$(...)" text when
-    splitting the outer command into argv (e.g. `cat $(echo .env)` would
-    otherwise shlex-split into the garbage tokens "$(echo" and ".env)").
-    """
-    result = []
-    i = 0
-    n = len(command)
-    while i < n:
-        if command[i] == "$" and i + 1 < n and command[i + 1] == "(":
-            depth = 0
-            j = i + 1
-            while j < n:
-                if command[j] == "(":
-                    depth += 1
-                elif command[j] == ")":
-                    depth -= 1
-                    if depth == 0:
-                        j += 1
-                        break
-                j += 1
-            result.append("__SUBSHELL__")
-            i = j
-            continue
-        if command[i] == "`":
-            end = command.find("`", i + 1)
-            if end == -1:
-                result.append(command[i:])
-                break
-            result.append("__SUBSHELL__")
-            i = end + 1
-            continue
-        result.append(command[i])
-        i += 1
-    return "".join(result)
-
-
 def is_shell_structural(cmd: str) -> bool:
     """True if cmd is a shell keyword or compound-statement header, not an
     actual command with file targets. Ported from smart_approve.py."""
@@ -677,29 +662,16 @@ def extract_file_targets(command: str) -> list[str]:
     subcommands and command substitutions ($(...) / `...`)."""
     targets = []
 
-    raw_commands = split_on_operators(command, protect_exec=True)
-    for sub in extract_subshells(command):
-        raw_commands.extend(split_on_operators(sub, protect_exec=True))
-    for m in PROCESS_SUBSTITUTION_RE.finditer(command):
-        raw_commands.extend(split_on_operators(m.group(1), protect_exec=True))
-
-    raw_commands = [
-        c
-        for c in raw_commands
-        if not is_shell_structural(c) and not is_standalone_assignment(c)
-    ]
-
-    for sub in raw_commands:
-        # nested $(...) / `...` inside this segment are scanned separately
-        # via extract_subshells() above — neutralize them here so shlex
-        # doesn't choke tokenizing them as literal argument text (e.g.
-        # `cat $(echo .env)` shlex-splits into garbage tokens otherwise).
-        neutralized = neutralize_subshells(sub)
-        try:
-            tokens = shlex.split(neutralized)
-        except ValueError:
-            tokens = neutralized.split()
-        targets.extend(extract_targets_from_tokens(tokens))
+    # The command, its subshells and process substitutions, split and
+    # tokenized once (shared, memoized parse — see utils.parse_command).
+    # Nested $(...) / `...` inside a segment are neutralized before shlex
+    # and scanned separately as their own segments, since e.g.
+    # `cat $(echo .env)` shlex-splits into garbage tokens otherwise.
+    parsed = parse_command(command)
+    for sub, tokens in zip(parsed.exec_commands, parsed.exec_tokens):
+        if is_shell_structural(sub) or is_standalone_assignment(sub):
+            continue
+        targets.extend(extract_targets_from_tokens(list(tokens)))
 
     # eval/xargs can smuggle a target through stdin or a nested string that the
     # per-subcommand tokenizer can't resolve (e.g. `echo .env | xargs cat`) —
@@ -741,11 +713,8 @@ def deny(file_path: str, pattern: str, source: str) -> None:
 # a secret can sit in a file whose path doesn't match PROTECTED_PATTERNS)
 # ─────────────────────────────────────────────────────────────
 
-DETECT_SECRETS_BIN = shutil.which("detect-secrets")
-
-# Regex fallback used only when detect-secrets isn't installed, so content
-# scanning doesn't silently no-op on a machine without the binary. Ported
-# from the project's JS secret-scan hook.
+# Secret patterns, ported from the project's JS secret-scan hook. They are
+# matched line by line: a finding is (pattern, line number).
 FALLBACK_SECRET_PATTERNS = [
     ("AWS Access Key", re.compile(r"AKIA[0-9A-Z]{16}")),
     (
@@ -775,17 +744,80 @@ FALLBACK_SECRET_PATTERNS = [
 ]
 
 
-def scan_content_fallback(content: str) -> list[dict]:
-    """Regex-based secret scan used when detect-secrets isn't installed."""
+REGEX_SPECIAL = set(".^$*+?{}[]\\|()")
+
+
+def required_literal(regex: re.Pattern) -> str:
+    """Leading literal text every match of `regex` must contain (lowercased
+    for IGNORECASE patterns), or "" when the pattern doesn't start with one
+    or has an alternation that could make it optional."""
+    if "|" in regex.pattern:
+        return ""
+    literal = ""
+    for char in regex.pattern:
+        if char in REGEX_SPECIAL:
+            if char in "?*{" and literal:
+                literal = literal[:-1]  # the last char is optional/repeated
+            break
+        literal += char
+    return literal.lower() if regex.flags & re.IGNORECASE else literal
+
+
+# (name, regex, literal, ignorecase) — built once per process.
+SECRET_SCANNERS = [
+    (name, regex, required_literal(regex), bool(regex.flags & re.IGNORECASE))
+    for name, regex in FALLBACK_SECRET_PATTERNS
+]
+SECRET_PATTERN_ORDER = {name: i for i, (name, _) in enumerate(FALLBACK_SECRET_PATTERNS)}
+# Any change to the patterns invalidates the clean-scan cache.
+SECRET_PATTERNS_SIGNATURE = hashlib.sha1(
+    "\0".join(regex.pattern for _, regex in FALLBACK_SECRET_PATTERNS).encode()
+).hexdigest()[:12]
+SCAN_CHUNK_CHARS = 1024 * 1024  # files are streamed through the scanner in ~1 MB chunks
+MAX_CLEAN_CACHE_ENTRIES = 5000
+
+
+def scan_chunk(chunk: str, first_line: int) -> list[dict]:
+    """Findings in `chunk`, a run of whole lines starting at line `first_line`.
+
+    Each pattern sweeps the whole chunk in one regex call (skipped outright
+    when its required literal is absent) instead of a Python loop per line.
+    A whole-chunk match can run across a newline, where the per-line
+    semantics can't, so it only nominates the lines it touches; those are
+    then confirmed one by one. Findings are identical to searching every line
+    with every pattern, ordered by pattern, then line."""
+    # str.lower() and re.IGNORECASE only agree on ASCII (e.g. "ſ" matches "s").
+    lowered = chunk.lower() if chunk.isascii() else None
+    lines = None
     findings = []
-    lines = content.split("\n")
-    for name, regex in FALLBACK_SECRET_PATTERNS:
-        for i, line in enumerate(lines):
-            if regex.search(line):
-                findings.append({"type": name, "line": i + 1})
+    for name, regex, literal, ignorecase in SECRET_SCANNERS:
+        if literal:
+            if not ignorecase:
+                if literal not in chunk:
+                    continue
+            elif lowered is not None and literal not in lowered:
+                continue
+        candidates: set[int] = set()
+        pos, line = 0, 0
+        for match in regex.finditer(chunk):
+            line += chunk.count("\n", pos, match.start())
+            last = line + chunk.count("\n", match.start(), max(match.start(), match.end() - 1))
+            candidates.update(range(line, last + 1))
+            pos = match.start()
+        if not candidates:
+            continue
+        lines = chunk.split("\n") if lines is None else lines
+        for index in sorted(candidates):
+            if regex.search(lines[index]):
+                findings.append({"type": name, "line": first_line + index})
     return findings
 
 
+def scan_content_fallback(content: str) -> list[dict]:
+    """Secret scan of an in-memory string (Write/Edit content)."""
+    return scan_chunk(content, 1)
+
+
 def deny_secret(file_path: str, findings: list[dict]) -> None:
     types = ", ".join(sorted({f["type"] for f in findings}))
     print(
@@ -804,63 +836,125 @@ def deny_secret(file_path: str, findings: list[dict]) -> None:
 
 
 def scan_content_for_secrets(content: str, file_path: str) -> list[dict]:
-    """Run detect-secrets against `content` as if it were `file_path`. Scans
-    by writing to a tempdir under the target's basename and cwd'ing into it —
-    scanning by absolute path silently yields empty results, since
-    detect-secrets' filters key off a repo-relative path."""
-    if not DETECT_SECRETS_BIN:
-        return scan_content_fallback(content)
+    """Scan content about to be written to `file_path` (Write/Edit)."""
+    return scan_content_fallback(content)
+
+
+def scan_file_stream(file_path: str) -> list[dict]:
+    """Scan a file on disk without loading it whole: ~SCAN_CHUNK_CHARS at a
+    time, each chunk cut back to its last newline so no line is split.
+    Non-UTF-8 bytes are replaced rather than skipping the scan — a secret in a
+    differently-encoded file must still be caught."""
+    findings: list[dict] = []
+    carry, first_line = "", 1
+    with open(file_path, encoding="utf-8", errors="replace") as handle:
+        while True:
+            block = handle.read(SCAN_CHUNK_CHARS)
+            if not block:
+                break
+            chunk = carry + block
+            cut = chunk.rfind("\n")
+            if cut == -1:
+                carry = chunk
+                continue
+            findings.extend(scan_chunk(chunk[:cut], first_line))
+            first_line += chunk.count("\n", 0, cut + 1)
+            carry = chunk[cut + 1 :]
+    if carry:
+        findings.extend(scan_chunk(carry, first_line))
+    return sorted(findings, key=lambda f: (SECRET_PATTERN_ORDER[f["type"]], f["line"]))
 
-    suffix = Path(file_path).name or "scanned_file"
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        target = Path(tmpdir) / suffix
-        target.write_text(content, encoding="utf-8")
+# Files already scanned clean, keyed by (path, mtime, size): a file that is
+# read over and over in a session is only scanned again once it changes.
+# Only clean results are stored, so a secret is never served from cache, and
+# the cache lives in a dir only this user can write, so nobody else can
+# pre-seed it to skip the scan.
 
-        try:
-            result = subprocess.run(
-                [DETECT_SECRETS_BIN, "scan", suffix],
-                cwd=tmpdir,
-                capture_output=True,
-                text=True,
-                timeout=15,
+
+def clean_cache_path() -> Path | None:
+    cache_dir = private_project_dir(PROJECT_ROOT, "protect-files")
+    return cache_dir / "clean-scans.db" if cache_dir is not None else None
+
+
+def open_clean_cache() -> sqlite3.Connection | None:
+    path = clean_cache_path()
+    if path is None:
+        logger.debug("Clean-scan cache unavailable: no private cache dir")
+        return None
+    try:
+        conn = sqlite3.connect(str(path), timeout=1)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS clean ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "signature TEXT NOT NULL, checked REAL NOT NULL)"
+        )
+        return conn
+    except sqlite3.Error as exc:
+        logger.debug(f"Clean-scan cache unavailable: {exc}")
+        return None
+
+
+def is_known_clean(conn: sqlite3.Connection, path: str, stat: os.stat_result) -> bool:
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM clean WHERE path = ? AND mtime_ns = ? AND size = ? AND signature = ?",
+            (path, stat.st_mtime_ns, stat.st_size, SECRET_PATTERNS_SIGNATURE),
+        ).fetchone()
+    except sqlite3.Error:
+        return False
+    return row is not None
+
+
+def mark_clean(conn: sqlite3.Connection, path: str, stat: os.stat_result) -> None:
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO clean VALUES (?, ?, ?, ?, ?)",
+                (path, stat.st_mtime_ns, stat.st_size, SECRET_PATTERNS_SIGNATURE, time.time()),
             )
-        except (subprocess.TimeoutExpired, OSError) as exc:
-            logger.debug(f"detect-secrets invocation failed: {exc}")
-            return []
+            conn.execute(
+                "DELETE FROM clean WHERE path IN (SELECT path FROM clean "
+                "ORDER BY checked DESC LIMIT -1 OFFSET ?)",
+                (MAX_CLEAN_CACHE_ENTRIES,),
+            )
+    except sqlite3.Error as exc:
+        logger.debug(f"Clean-scan cache write failed: {exc}")
+
 
+def scan_file_for_secrets(file_path: str) -> list[dict]:
+    """Secret scan of a file being read (Read, or a Bash command target),
+    skipped when the same (path, mtime, size) already scanned clean."""
+    try:
+        real = os.path.realpath(file_path)
+        stat = os.stat(real)
+    except OSError:
+        return []
+    conn = open_clean_cache()
+    try:
+        if conn is not None and is_known_clean(conn, real, stat):
+            logger.debug(f"Secret scan cache hit: {file_path}")
+            return []
         try:
-            report = json.loads(result.stdout)
-        except json.JSONDecodeError:
-            logger.debug(f"detect-secrets non-JSON output: {result.stdout[:500]}")
+            findings = scan_file_stream(real)
+        except OSError:
             return []
-
-        return report.get("results", {}).get(suffix, [])
+        if not findings and conn is not None:
+            mark_clean(conn, real, stat)
+        return findings
+    finally:
+        if conn is not None:
+            conn.close()
 
 
-def get_write_content(
-    tool_input: Mapping, tool_name: str, file_path: str
-) -> str | None:
-    """Content about to enter the file, or the file's current content on
-    disk when the tool is only reading it (Read, or a Bash command target)."""
+def get_write_content(tool_input: Mapping, tool_name: str) -> str | None:
+    """Content about to enter the file for Write/Edit; None for tools that
+    only read it (those are scanned on disk by scan_file_for_secrets)."""
     if tool_name == "Write":
         return get_by_key(tool_input, "content")
     if tool_name == "Edit":
         return get_by_key(tool_input, "new_string")
-    try:
-        return Path(file_path).read_text(encoding="utf-8")
-    except UnicodeDecodeError:
-        # Non-UTF-8 content (UTF-16, latin-1, or a few stray bad bytes) must
-        # still reach the secret scanner — silently returning None here let
-        # any secret stored in a differently-encoded file skip detect-secrets
-        # entirely. errors="replace" degrades gracefully instead of losing
-        # the scan outright.
-        try:
-            return Path(file_path).read_text(encoding="utf-8", errors="replace")
-        except OSError:
-            return None
-    except OSError:
-        return None
+    return None
 
 
 # ─────────────────────────────────────────────────────────────
@@ -901,11 +995,15 @@ def main():
         if blocked:
             deny(file_path, pattern, "file_path")
 
-        content = get_write_content(tool_input, tool_name, file_path)
-        if content:
-            findings = scan_content_for_secrets(content, file_path)
-            if findings:
-                deny_secret(file_path, findings)
+        if tool_name in ("Write", "Edit"):
+            content = get_write_content(tool_input, tool_name)
+            findings = scan_content_for_secrets(content, file_path) if content else []
+        elif os.path.isfile(file_path):
+            findings = scan_file_for_secrets(file_path)
+        else:
+            findings = []
+        if findings:
+            deny_secret(file_path, findings)
 
         logger.debug(f"Allowed file access: {file_path}")
 
@@ -930,11 +1028,9 @@ def main():
                 deny(target, pattern, "command_read")
 
             if os.path.isfile(target):
-                content = get_write_content(tool_input, "Bash", target)
-                if content:
-                    findings = scan_content_for_secrets(content, target)
-                    if findings:
-                        deny_secret(target, findings)
+                findings = scan_file_for_secrets(target)
+                if findings:
+                    deny_secret(target, findings)
 
             logger.debug(f"Allowed command: {command} access: {target}")
 
@@ -6,11 +6,14 @@ Runs mypy (type checking) and ruff (linting) on Python files after edit.
 - Skips if mypy or ruff not installed locally
 - Reports type errors and lint issues
 - Falls back to no-op when tools unavailable
+- Type checks through a per-project dmypy daemon, falling back to a cold
+  mypy run when the daemon can't answer
 
 Cross-platform (Windows, macOS, Linux)
 """
 
 import os
+import shutil
 import subprocess
 import sys
 from pathlib import Path
@@ -20,14 +23,20 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
+from lint_server import lint_servers_enabled, queued_lint  # noqa: E402
 from utils import (  # noqa: E402
+    cached_lint_results,
     find_project_root,
     get_hooks_logger,
+    group_lint_targets,
+    not_installed_results,
     parse_json_output,
     parse_jsonlines_output,
+    private_project_dir,
     run_command_cwd,
     run_jscpd,
     run_lint_hook_main,
+    split_lint_records,
 )
 
 logger = get_hooks_logger("PythonLint")
@@ -38,6 +47,9 @@ logger = get_hooks_logger("PythonLint")
 
 MAX_STDIN = 1024 * 1024  # 1 MB
 _PY_EXTS = {".py"}
+DMYPY_TIMEOUT = 30 * 60  # daemon exits after 30 min idle, like the other servers
+DMYPY_RUN_TIMEOUT = 60  # first run starts the daemon and checks cold
+_RUFF_CONFIGS = ["pyproject.toml", "ruff.toml", ".ruff.toml"]
 
 
 def _exec(bin_: str, args: list[str], cwd: str | None = None) -> dict:
@@ -46,22 +58,75 @@ def _exec(bin_: str, args: list[str], cwd: str | None = None) -> dict:
     return run_command_cwd(cmd, cwd=cwd)
 
 
-def _check_tool_installed(tool: str, project_root: str) -> bool:
-    """Check if tool is installed locally via pip."""
+def _tool_bin(tool: str, project_root: str) -> str | None:
+    """Path to tool from the project venv, else from PATH; None if missing."""
     local_bin = Path(project_root) / "venv" / "bin" / tool
     if local_bin.exists():
-        return True
-    # Also check system PATH
-    result = subprocess.run(
-        ["which", tool],
-        capture_output=True,
-        timeout=5,
-    )
-    return result.returncode == 0
+        return str(local_bin)
+    return shutil.which(tool)
+
+
+def _check_tool_installed(tool: str, project_root: str) -> bool:
+    """Check if tool is installed locally via pip."""
+    return _tool_bin(tool, project_root) is not None
+
+
+def _run_dmypy(paths: list[Path], project_root: str) -> dict | None:
+    """mypy through the project's dmypy daemon; `dmypy run` starts it on
+    first use and later runs only re-check what changed.
+
+    Returns a raw {success, output, error} like _exec, or None when dmypy is
+    missing, the daemon itself failed (exit 2), or there is no private dir
+    for its status file (it names the daemon the client trusts), so the
+    caller runs mypy cold.
+    """
+    dmypy_bin = _tool_bin("dmypy", project_root)
+    if dmypy_bin is None:
+        return None
+    status_dir = private_project_dir(project_root, "lint-servers")
+    if status_dir is None:
+        return None
+    status_file = status_dir / "dmypy.json"
+    cmd = [
+        dmypy_bin,
+        "--status-file",
+        str(status_file),
+        "run",
+        "--timeout",
+        str(DMYPY_TIMEOUT),
+        "--",
+        "--output",
+        "json",
+        *(str(p) for p in paths),
+    ]
+    logger.debug("Executing: %s (cwd=%s)", " ".join(cmd), project_root)
+    try:
+        proc = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=DMYPY_RUN_TIMEOUT,
+            cwd=project_root,
+        )
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        logger.debug("dmypy failed to run: %s", exc)
+        return None
+    if proc.returncode not in (0, 1):
+        logger.debug("dmypy exited %s: %s", proc.returncode, proc.stderr.strip())
+        return None
+    # dmypy adds status lines ("Daemon started", "Success: ...") that a cold
+    # `mypy --output json` doesn't print; keep only the JSON records.
+    records = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+    return {
+        "success": proc.returncode == 0,
+        "output": "\n".join(records),
+        "error": proc.stderr.strip(),
+    }
 
 
-def _run_mypy(resolved: Path, project_root: str) -> dict:
-    """Run mypy type checking. Returns {success, output, error}.
+def _run_mypy(paths: list[Path], project_root: str) -> dict[Path, dict]:
+    """Run mypy type checking on paths in one run. Returns {success, output,
+    error} per path.
 
     `output` is parsed from mypy's `--output json` jsonlines format (one
     JSON object per error) since agents parse structured data far more
@@ -70,61 +135,76 @@ def _run_mypy(resolved: Path, project_root: str) -> dict:
     if not _check_tool_installed("mypy", project_root):
         logger.debug(
             "mypy not installed, skipping type check for %s",
-            resolved,
+            paths,
         )
-        return {"success": True, "output": "", "error": "", "installed": False}
+        return not_installed_results(paths)
 
-    cmd = f"mypy --output json {str(resolved)}"
-    logger.debug("Executing: %s (cwd=%s)", cmd, project_root)
-    result = _exec("mypy", ["--output", "json", str(resolved)], cwd=project_root)
+    result = _run_dmypy(paths, project_root) if lint_servers_enabled() else None
+    if result is None:
+        args = ["--output", "json", *(str(p) for p in paths)]
+        logger.debug("Executing: mypy %s (cwd=%s)", " ".join(args), project_root)
+        result = _exec("mypy", args, cwd=project_root)
     logger.debug("mypy result: success=%s", result["success"])
     output = parse_jsonlines_output(
         result.get("output", ""), "PythonLint", "mypy", logger
     )
     if result["success"]:
-        logger.debug("mypy passed for %s", resolved)
+        logger.debug("mypy passed for %s", paths)
     else:
-        logger.warning("mypy found type errors in %s:\n%s", resolved, output)
+        logger.warning("mypy found type errors in %s:\n%s", paths, output)
     if result.get("error"):
         logger.warning("mypy stderr: %s", result.get("error", ""))
-    return {
-        "success": result["success"],
-        "output": output,
-        "error": result.get("error", ""),
-        "installed": True,
-    }
+    return split_lint_records(
+        result,
+        output,
+        paths,
+        project_root,
+        lambda record: record.get("file"),
+        lambda records: any(r.get("severity") == "error" for r in records),
+    )
 
 
-def _run_ruff(resolved: Path, project_root: str) -> dict:
-    """Run ruff linting. Returns {success, output, error}.
+def _run_ruff(paths: list[Path], project_root: str) -> dict[Path, dict]:
+    """Run ruff linting on paths in one run. Returns {success, output,
+    error} per path.
 
     `output` is parsed from ruff's `--output-format json` (structured
     violations list) since agents parse structured data far more reliably
-    than the default text output.
+    than the default text output. Files whose bytes, ruff binary and ruff
+    config are unchanged since a previous run are served from the lint
+    result cache.
     """
-    if not _check_tool_installed("ruff", project_root):
-        logger.debug("ruff not installed, skipping lint for %s", resolved)
-        return {"success": True, "output": "", "error": "", "installed": False}
-
-    cmd = f"ruff check --output-format json {str(resolved)}"
-    logger.debug("Executing: %s (cwd=%s)", cmd, project_root)
-    result = _exec(
-        "ruff", ["check", "--output-format", "json", str(resolved)], cwd=project_root
+    ruff_bin = _tool_bin("ruff", project_root)
+    if ruff_bin is None:
+        logger.debug("ruff not installed, skipping lint for %s", paths)
+        return not_installed_results(paths)
+
+    return cached_lint_results(
+        "ruff",
+        ruff_bin,
+        paths,
+        project_root,
+        _RUFF_CONFIGS,
+        lambda misses: _ruff_check(misses, project_root),
+        logger,
     )
+
+
+def _ruff_check(paths: list[Path], project_root: str) -> dict[Path, dict]:
+    args = ["check", "--output-format", "json", *(str(p) for p in paths)]
+    logger.debug("Executing: ruff %s (cwd=%s)", " ".join(args), project_root)
+    result = _exec("ruff", args, cwd=project_root)
     logger.debug("ruff result: success=%s", result["success"])
     output = parse_json_output(result.get("output", ""), "PythonLint", "ruff", logger)
     if result["success"]:
-        logger.debug("ruff passed for %s", resolved)
+        logger.debug("ruff passed for %s", paths)
     else:
-        logger.warning("ruff found issues in %s:\n%s", resolved, output)
+        logger.warning("ruff found issues in %s:\n%s", paths, output)
     if result.get("error"):
         logger.warning("ruff stderr: %s", result.get("error", ""))
-    return {
-        "success": result["success"],
-        "output": output,
-        "error": result.get("error", ""),
-        "installed": True,
-    }
+    return split_lint_records(
+        result, output, paths, project_root, lambda record: record.get("filename")
+    )
 
 
 def maybe_run_python_lint(file_path: str | None) -> dict[str, dict[str, Any] | None]:
@@ -160,19 +240,49 @@ def maybe_run_python_lint(file_path: str | None) -> dict[str, dict[str, Any] | N
     project_root = find_project_root(str(resolved.parent))
     logger.debug("Project root for %s: %s", resolved, project_root)
 
-    result["mypy"] = _run_mypy(resolved, project_root)
-    result["ruff"] = _run_ruff(resolved, project_root)
+    result["mypy"] = _run_mypy([resolved], project_root)[resolved]
+    result["ruff"] = _run_ruff([resolved], project_root)[resolved]
     result["jscpd"] = run_jscpd(resolved, project_root, logger, "PythonLint")
     return result
 
 
+def maybe_run_python_lint_batch(
+    file_paths: list[str],
+) -> dict[str, dict[str, dict[str, Any] | None]]:
+    """
+    maybe_run_python_lint for a set of files: one mypy and one ruff run per
+    project root, split back per file. jscpd still runs per file.
+
+    Returns:
+        Dict keyed by resolved file path, values shaped like
+        maybe_run_python_lint's result.
+    """
+    results: dict[str, dict[str, dict[str, Any] | None]] = {}
+    for project_root, paths in group_lint_targets(
+        file_paths, _PY_EXTS, logger, "PythonLint"
+    ).items():
+        mypy = _run_mypy(paths, project_root)
+        ruff = _run_ruff(paths, project_root)
+        for p in paths:
+            results[str(p)] = {
+                "mypy": mypy[p],
+                "ruff": ruff[p],
+                "jscpd": run_jscpd(p, project_root, logger, "PythonLint"),
+            }
+    return results
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
 
 def main() -> None:
-    run_lint_hook_main("PythonLint", logger, maybe_run_python_lint)
+    run_lint_hook_main(
+        "PythonLint",
+        logger,
+        queued_lint("python_lint", _PY_EXTS, maybe_run_python_lint),
+    )
 
 
 if __name__ == "__main__":
@@ -4,8 +4,9 @@ Similar-Code-Ref Hook (POC)
 
 PreToolUse hook for Edit|Write. Extracts imports/symbols from the content
 being written, greps the repo for existing usages via ripgrep (cheap,
-no index), then — if the project's embedding daemon is already running —
-ranks candidates by cosine similarity against the new content and keeps
+no index), then — if the shared embedding daemon is already running —
+embeds the new content plus every candidate in one batched request, ranks
+candidates by cosine similarity against the new content and keeps
 only the ones that are actually close. Falls back to raw rg results if
 the daemon isn't up; never starts it (would add latency to every edit).
 """
@@ -13,7 +14,6 @@ the daemon isn't up; never starts it (would add latency to every edit).
 import json
 import os
 import re
-import socket
 import subprocess
 import sys
 from pathlib import Path
@@ -24,7 +24,12 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
-from utils import get_by_key, get_hooks_logger, get_project_name  # noqa: E402
+from embedding_protocol import DaemonError, request_vectors  # noqa: E402
+from utils import (  # noqa: E402
+    get_by_key,
+    get_embedding_daemon_socket_path,
+    get_hooks_logger,
+)
 
 logger = get_hooks_logger("SimilarCodeRef")
 
@@ -175,80 +180,48 @@ def rg_snippet(term: str, file_path: str) -> str:
     return out
 
 
-def daemon_socket_path() -> str:
-    return f"/tmp/embedding-daemon-{get_project_name()}.sock"
-
-
-def is_daemon_running(sock_path: str) -> bool:
+def encode_batch_via_daemon(texts: list[str], sock_path: str) -> np.ndarray | None:
+    """Best-effort embed of `texts` in one batched round trip via the
+    already-running daemon. Returns a (len(texts), dim) matrix, or None when the
+    daemon isn't up. Never starts it — a cold start (~seconds to load the
+    model) would stall every Edit/Write."""
     try:
-        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        conn.settimeout(1)
-        conn.connect(sock_path)
-        conn.close()
-        logger.debug("daemon running at %s", sock_path)
-        return True
-    except (ConnectionRefusedError, FileNotFoundError, OSError) as exc:
+        matrix = request_vectors(sock_path, texts, timeout=3)
+    except DaemonError as exc:
+        logger.debug("daemon error: %s", exc)
+        return None
+    except (ConnectionRefusedError, FileNotFoundError) as exc:
         logger.debug("daemon not running at %s: %s", sock_path, exc)
-        return False
-
-
-def encode_via_daemon(text: str, sock_path: str) -> np.ndarray | None:
-    """Best-effort embed via the already-running daemon. Never starts it —
-    a cold start (~seconds to load the model) would stall every Edit/Write."""
-    try:
-        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        conn.settimeout(3)
-        conn.connect(sock_path)
-        conn.sendall((json.dumps({"text": text}) + "\n").encode())
-        data = b""
-        while not data.endswith(b"\n"):
-            chunk = conn.recv(4096)
-            if not chunk:
-                break
-            data += chunk
-        conn.close()
-        response = json.loads(data.decode())
-        if "error" in response:
-            logger.debug("daemon error: %s", response["error"])
-            return None
-        vec = np.array(response["vector"], dtype=np.float32)
-        logger.debug("encode_via_daemon ok, vec shape=%s", vec.shape)
-        return vec
+        return None
     except Exception as exc:
         logger.debug("daemon communication failed: %s", exc)
         return None
+    logger.debug("encode_batch_via_daemon ok, matrix shape=%s", matrix.shape)
+    return matrix
 
 
-def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-    denom = np.linalg.norm(a) * np.linalg.norm(b)
-    if denom == 0:
-        return 0.0
-    return float(np.dot(a, b) / denom)
+def cosine_similarities(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Cosine similarity of `query` against every row of `matrix`."""
+    denom = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    denom[denom == 0] = np.inf
+    return (matrix @ query) / denom
 
 
 def rank_by_similarity(
     content: str, candidates: list[tuple[str, str, str]]
 ) -> list[tuple[str, str, str]]:
     """Filter+sort (term, file, snippet) candidates by cosine similarity to
-    `content`. Returns candidates unranked if the embedding daemon isn't up."""
-    sock_path = daemon_socket_path()
-    if not is_daemon_running(sock_path):
-        logger.debug("embedding daemon not running, skipping similarity rank")
-        return candidates[:MAX_RESULTS]
-
-    new_vec = encode_via_daemon(content[:MAX_EMBED_CHARS], sock_path)
-    if new_vec is None:
-        logger.debug("could not encode new content, skipping similarity rank")
+    `content`. The new content and every snippet are embedded in a single
+    daemon request. Returns candidates unranked if the daemon isn't up."""
+    texts = [content[:MAX_EMBED_CHARS]] + [snippet for _, _, snippet in candidates]
+    matrix = encode_batch_via_daemon(texts, get_embedding_daemon_socket_path())
+    if matrix is None or len(matrix) != len(texts):
+        logger.debug("could not encode batch, skipping similarity rank")
         return candidates[:MAX_RESULTS]
 
+    sims = cosine_similarities(matrix[0], matrix[1:])
     scored: list[tuple[float, tuple[str, str, str]]] = []
-    for candidate in candidates:
-        _, _, snippet = candidate
-        vec = encode_via_daemon(snippet, sock_path)
-        if vec is None:
-            logger.debug("could not encode candidate=%s, skipping", candidate[1])
-            continue
-        sim = cosine_similarity(new_vec, vec)
+    for sim, candidate in zip(sims.tolist(), candidates):
         logger.debug("similarity=%.3f candidate=%s", sim, candidate[1])
         if sim >= MIN_SIMILARITY:
             scored.append((sim, candidate))
@@ -1,4 +1,5 @@
 #!/usr/bin/python3
+import hashlib
 import json
 import os
 import re
@@ -13,12 +14,13 @@ from pathlib import Path
 import numpy as np
 
 sys.path.insert(0, str(Path(__file__).parent))
+from embedding_protocol import DaemonError, request_vectors
 from utils import (
     detect_skill,
     extract_query_text,
     get_by_key,
+    get_embedding_daemon_socket_path,
     get_hooks_logger,
-    get_project_name,
     get_session_id_short,
     read_file,
     write_file,
@@ -30,13 +32,14 @@ DB_PATH = Path(os.environ["AI_PROJECT_DIR"]) / ".claude/skills/skills.db"
 MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 MIN_SIMILARITY = 0.5
 MAX_SUGGESTIONS = 3
+COSINE_TOP_K = 100  # cosine candidates kept for RRF/BM25 gating
 DEDUP_HOURS = 1
 DAEMON_SCRIPT = Path(__file__).parent / "embedding_daemon.py"
 DAEMON_START_TIMEOUT = 90
 
 
 def getDaemonSocketPath() -> str:
-    return f"/tmp/embedding-daemon-{get_project_name()}.sock"
+    return get_embedding_daemon_socket_path()
 
 
 def isDaemonRunning(sock_path: str) -> bool:
@@ -77,21 +80,10 @@ def encodeViaDaemon(text: str) -> np.ndarray | None:
             LOG.warning("Daemon failed to start within timeout")
             return None
     try:
-        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        conn.connect(sock_path)
-        conn.sendall((json.dumps({"text": text}) + "\n").encode())
-        data = b""
-        while not data.endswith(b"\n"):
-            chunk = conn.recv(4096)
-            if not chunk:
-                break
-            data += chunk
-        conn.close()
-        response = json.loads(data.decode())
-        if "error" in response:
-            LOG.warning(f"Daemon error: {response['error']}")
-            return None
-        return np.array(response["vector"], dtype=np.float32)
+        return request_vectors(sock_path, text)[0]
+    except DaemonError as e:
+        LOG.warning(f"Daemon error: {e}")
+        return None
     except Exception as e:
         LOG.warning(f"Daemon communication failed: {e}")
         return None
@@ -130,18 +122,66 @@ def shouldSuggest(skill_name, rec_log):
 def loadDbSkills(db_path: Path):
     """Return list of (name, hint, embedding_array)."""
     conn = sqlite3.connect(db_path)
-    rows = conn.execute("SELECT name, hint, embedding FROM skills").fetchall()
+    rows = conn.execute("SELECT name, hint, embedding FROM skills ORDER BY id").fetchall()
     conn.close()
     return [
         (name, hint, np.frombuffer(emb, dtype=np.float32)) for name, hint, emb in rows
     ]
 
 
-def cosineSimilarity(a: np.ndarray, b: np.ndarray) -> float:
-    denom = np.linalg.norm(a) * np.linalg.norm(b)
-    if denom == 0:
-        return 0.0
-    return float(np.dot(a, b) / denom)
+def loadSkillMatrix(db_path: Path):
+    """Return ([(name, hint)], matrix) with matrix rows L2-normalized, by skill id.
+
+    Memory-maps the skills.npy written by build-skill-index.py when its
+    skills.npy.stamp matches the DB rows (same digest of (id, content_hash)
+    as build-skill-index.skill_matrix_stamp); if it is missing or out of step
+    with the DB, rebuilds it in memory from the embedding blobs instead.
+    """
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT id, content_hash, name, hint FROM skills ORDER BY id").fetchall()
+    conn.close()
+    skills = [(name, hint) for _id, _hash, name, hint in rows]
+    digest = hashlib.sha256()
+    for row_id, row_hash, _name, _hint in rows:
+        digest.update(f"{row_id}:{row_hash}\n".encode())
+
+    matrix_path = db_path.with_suffix(".npy")
+    try:
+        stamp = matrix_path.with_suffix(".npy.stamp").read_text().strip()
+        matrix = np.load(matrix_path, mmap_mode="r")
+        if stamp == digest.hexdigest() and matrix.shape[0] == len(skills):
+            return skills, matrix
+        LOG.debug(f"{matrix_path} is out of step with the DB")
+    except (OSError, ValueError) as e:
+        LOG.debug(f"Skill matrix unavailable ({e}) — normalizing DB embeddings")
+
+    embeddings = [emb for _name, _hint, emb in loadDbSkills(db_path)]
+    if not embeddings:
+        return skills, np.empty((0, 0), dtype=np.float32)
+    matrix = np.stack(embeddings)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return skills, matrix / norms
+
+
+def topCosine(matrix: np.ndarray, query_vector: np.ndarray, k: int):
+    """Top-k (similarity, row) pairs by cosine, best first.
+
+    matrix rows are pre-normalized, so one matrix-vector product gives every
+    cosine; argpartition picks the top k without sorting the whole catalog.
+    """
+    if matrix.shape[0] == 0:
+        return []
+    norm = np.linalg.norm(query_vector)
+    if norm == 0:
+        return []
+    sims = matrix @ (query_vector / norm)
+    if k < len(sims):
+        top = np.argpartition(-sims, k)[:k]
+    else:
+        top = np.arange(len(sims))
+    top = top[np.argsort(-sims[top])]
+    return [(float(sims[i]), int(i)) for i in top]
 
 
 _FTS_TOKEN_RE = re.compile(r"[a-zA-Z0-9À-ÿ]+")
@@ -270,13 +310,13 @@ def findSkills(
     db_path: Path, query: str, query_vector: np.ndarray, min_sim: float, limit: int
 ):
     """Fuse cosine-similarity and BM25 rankings via RRF, return sorted [(score, name, hint)]."""
-    skills = loadDbSkills(db_path)
-    hints = {name: hint for name, hint, _emb in skills}
-    cosine_scored = sorted(
-        ((cosineSimilarity(query_vector, emb), name) for name, _hint, emb in skills),
-        key=lambda x: x[0],
-        reverse=True,
-    )
+    skills, matrix = loadSkillMatrix(db_path)
+    LOG.debug(f"Loaded {len(skills)} skills, matrix {matrix.shape}")
+    hints = {name: hint for name, hint in skills}
+    cosine_scored = [
+        (sim, skills[row][0])
+        for sim, row in topCosine(matrix, query_vector, COSINE_TOP_K)
+    ]
     cosine_names = [name for sim, name in cosine_scored if sim >= min_sim]
     cosine_name_set = set(cosine_names)
     bm25_names = [
@@ -336,9 +376,6 @@ def main():
             LOG.warning("Failed to get embedding — skipping")
             sys.exit(0)
 
-        skills_raw = loadDbSkills(DB_PATH)
-        LOG.debug(f"Loaded {len(skills_raw)} skills from DB")
-
         candidates = findSkills(
             DB_PATH, prompt, query_vector, MIN_SIMILARITY, MAX_SUGGESTIONS * 2
         )
@@ -21,7 +21,7 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
-from utils import split_on_operators  # noqa: E402
+from utils import parse_command, private_project_dir  # noqa: E402
 
 
 def load_settings(path=None):
@@ -136,52 +136,180 @@ def command_matches_pattern(cmd, patterns):
     return False
 
 
-def extract_subshells(command):
-    """Extract contents of $() and backtick subshells, recursively.
+GLOB_SPECIAL = frozenset("*?[")
+RULE_INDEX_VERSION = 1
+UNINDEXED_KEY = "\0unindexed"
 
-    Returns a list of subshell content strings.
+
+def literal_first_token(glob_pat):
+    """Return the first space-delimited token of a glob if it is wildcard-free.
+
+    Any command fnmatch accepts for "git status *" starts with "git ", so its
+    first token is "git"; "ls" only accepts "ls". Returns None when the token
+    itself has wildcards ("/opt/adb*") and the rule can't be keyed.
     """
-    subshells = []
-
-    # Extract $(...) — handle nested parens, but skip $((...)) arithmetic
-    i = 0
-    while i < len(command):
-        if (
-            command[i] == "$"
-            and i + 1 < len(command)
-            and command[i + 1] == "("
-            and not (i + 2 < len(command) and command[i + 2] == "(")
-        ):
-            # Find matching closing paren
-            depth = 0
-            start = i + 2
-            j = i + 1
-            while j < len(command):
-                if command[j] == "(":
-                    depth += 1
-                elif command[j] == ")":
-                    depth -= 1
-                    if depth == 0:
-                        content = command[start:j]
-                        subshells.append(content)
-                        # Recurse into content for nested subshells
-                        subshells.extend(extract_subshells(content))
-                        break
-                j += 1
-            i = j + 1
-        else:
-            i += 1
+    token = glob_pat.partition(" ")[0]
+    if not token or GLOB_SPECIAL.intersection(token):
+        return None
+    return token
+
 
-    # Extract backtick subshells (no nesting)
-    parts = command.split("`")
-    # Odd-indexed parts are inside backticks
-    for idx in range(1, len(parts), 2):
-        content = parts[idx]
-        if content.strip():
-            subshells.append(content)
-            subshells.extend(extract_subshells(content))
+class BashRuleSet:
+    """Bash(...) rules from one permission list, indexed by first command token.
+
+    matches() gives the same answer as command_matches_pattern() over the
+    same rules: a set lookup for bare prefixes, then one combined regex for
+    the rules keyed by the command's first token and one for the rules that
+    couldn't be keyed. Regexes are compiled on first use, so a lookup only
+    pays for the tokens it actually sees.
+    """
+
+    def __init__(self, exact=(), by_token=None, unindexed=()):
+        self.exact = set(exact)
+        self.by_token = by_token or {}
+        self.unindexed = list(unindexed)
+        self._compiled = {}
+
+    @classmethod
+    def from_patterns(cls, patterns):
+        """Build from permission strings like "Bash(git status:*)"."""
+        rules = cls()
+        for prefix, glob_pat in parse_bash_patterns(patterns):
+            rules.exact.add(prefix)
+            token = literal_first_token(glob_pat)
+            if token is None:
+                rules.unindexed.append(glob_pat)
+            else:
+                rules.by_token.setdefault(token, []).append(glob_pat)
+        return rules
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["exact"], data["by_token"], data["unindexed"])
+
+    def to_json(self):
+        return {
+            "exact": sorted(self.exact),
+            "by_token": self.by_token,
+            "unindexed": self.unindexed,
+        }
 
-    return subshells
+    def _regex(self, key, globs):
+        regex = self._compiled.get(key)
+        if regex is None:
+            regex = re.compile("|".join(fnmatch.translate(g) for g in globs))
+            self._compiled[key] = regex
+        return regex
+
+    def matches(self, cmd):
+        if cmd in self.exact:
+            return True
+        token = cmd.partition(" ")[0]
+        globs = self.by_token.get(token)
+        if globs and self._regex(token, globs).match(cmd):
+            return True
+        if self.unindexed and self._regex(UNINDEXED_KEY, self.unindexed).match(cmd):
+            return True
+        return False
+
+
+class RuleIndex:
+    """Compiled allow/deny rules for decide()."""
+
+    def __init__(self, allow, deny):
+        self.allow = allow
+        self.deny = deny
+
+    @classmethod
+    def from_settings(cls, settings):
+        permissions = settings.get("permissions", {})
+        return cls(
+            BashRuleSet.from_patterns(permissions.get("allow", [])),
+            BashRuleSet.from_patterns(permissions.get("deny", [])),
+        )
+
+
+def settings_sources(global_path=None):
+    """The settings files load_merged_settings() reads, in merge order."""
+    paths = [os.path.expanduser(global_path or "~/.claude/settings.json")]
+    project_dir = os.environ.get("CLAUDE_PROJECT_DIR")
+    if project_dir:
+        paths.append(os.path.join(project_dir, ".claude", "settings.json"))
+        paths.append(os.path.join(project_dir, ".claude", "settings.local.json"))
+    return paths
+
+
+def source_stamps(paths):
+    """[path, mtime_ns, size] per settings file; None fields if it's missing."""
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamps.append([path, st.st_mtime_ns, st.st_size])
+        except OSError:
+            stamps.append([path, None, None])
+    return stamps
+
+
+_rule_index_memo = {}
+
+
+def rule_index_cache_path(paths):
+    """rules.json in a dir only this user can write (a planted allow rule
+    would approve anything), or None when there is no such dir."""
+    cache_dir = private_project_dir("\0".join(paths), "smart-approve")
+    return cache_dir / "rules.json" if cache_dir is not None else None
+
+
+def load_rule_index(global_path=None):
+    """RuleIndex for the merged settings, cached on disk in the user's
+    private cache dir.
+
+    The cache holds the parsed, token-keyed rules and is reused while every
+    settings file keeps its mtime and size, so a warm call is a few stat()s
+    and one small JSON read instead of parsing every settings layer. Inside
+    the hook host the index (and its compiled regexes) also stays in memory.
+    """
+    paths = settings_sources(global_path)
+    stamps = source_stamps(paths)
+    memo = _rule_index_memo.get(tuple(paths))
+    if memo and memo[0] == stamps:
+        return memo[1]
+    index = _load_rule_index(paths, stamps, global_path)
+    _rule_index_memo[tuple(paths)] = (stamps, index)
+    return index
+
+
+def _load_rule_index(paths, stamps, global_path):
+    cache_path = rule_index_cache_path(paths)
+    if cache_path is None:
+        return RuleIndex.from_settings(load_merged_settings(global_path))
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached.get("version") == RULE_INDEX_VERSION and cached.get("sources") == stamps:
+            return RuleIndex(
+                BashRuleSet.from_json(cached["allow"]),
+                BashRuleSet.from_json(cached["deny"]),
+            )
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    index = RuleIndex.from_settings(load_merged_settings(global_path))
+    data = {
+        "version": RULE_INDEX_VERSION,
+        "sources": stamps,
+        "allow": index.allow.to_json(),
+        "deny": index.deny.to_json(),
+    }
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return index
 
 
 def _skip_shell_value(cmd, i):
@@ -357,18 +485,16 @@ def decompose_command(command):
     """
     all_commands = []
 
-    # Get top-level segments
-    segments = split_on_operators(command)
+    # Top-level segments, each with its subshells already split (shared,
+    # memoized parse — see utils.parse_command)
+    parsed = parse_command(command)
 
-    for seg in segments:
+    for seg, sub_segments in zip(parsed.segments, parsed.segment_subshells):
         # Also decompose any subshells found in this segment
-        subshells = extract_subshells(seg)
-        for sub in subshells:
-            sub_segments = split_on_operators(sub)
-            for ss in sub_segments:
-                normalized = normalize_command(ss)
-                if normalized:
-                    all_commands.append(normalized)
+        for ss in sub_segments:
+            normalized = normalize_command(ss)
+            if normalized:
+                all_commands.append(normalized)
 
         # Normalize the top-level segment itself
         normalized = normalize_command(seg)
@@ -383,9 +509,11 @@ def decompose_command(command):
     ]
 
 
-def decide(command, settings):
+def decide(command, settings=None, rules=None):
     """Make a permission decision for a compound command.
 
+    Pass either the merged settings dict or a prebuilt RuleIndex as rules.
+
     Returns:
         ("allow", reason) if all sub-commands match allow patterns
         ("deny", reason) if any sub-command matches a deny pattern
@@ -394,9 +522,8 @@ def decide(command, settings):
     if not command or not command.strip():
         return None, None
 
-    permissions = settings.get("permissions", {})
-    allow_patterns = parse_bash_patterns(permissions.get("allow", []))
-    deny_patterns = parse_bash_patterns(permissions.get("deny", []))
+    if rules is None:
+        rules = RuleIndex.from_settings(settings or {})
 
     sub_commands = decompose_command(command)
     if not sub_commands:
@@ -404,13 +531,13 @@ def decide(command, settings):
 
     # Check deny first
     for cmd in sub_commands:
-        if command_matches_pattern(cmd, deny_patterns):
+        if rules.deny.matches(cmd):
             return "deny", f"Sub-command '{cmd}' matches deny pattern"
 
     # Check if ALL match allow
     all_allowed = True
     for cmd in sub_commands:
-        if not command_matches_pattern(cmd, allow_patterns):
+        if not rules.allow.matches(cmd):
             all_allowed = False
             break
 
@@ -450,6 +577,8 @@ def _build_reason(reason):
 
 
 def main():
+    # The hook host keeps this module loaded between events
+    _log_lines.clear()
     try:
         input_data = json.load(sys.stdin)
     except (json.JSONDecodeError, EOFError):
@@ -470,12 +599,12 @@ def main():
     log(f"checking: {cmd_preview}{'...' if len(command) > 80 else ''}")
 
     settings_path = os.environ.get("CLAUDE_SETTINGS_PATH")
-    settings = load_merged_settings(settings_path)
+    rules = load_rule_index(settings_path)
 
     sub_commands = decompose_command(command)
     log(f"sub-commands: {sub_commands[:5]}{'...' if len(sub_commands) > 5 else ''}")
 
-    decision, reason = decide(command, settings)
+    decision, reason = decide(command, rules=rules)
 
     log(f"decision={decision or 'passthrough'} reason={reason or 'no pattern matched'}")
 
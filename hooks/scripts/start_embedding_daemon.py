@@ -10,7 +10,7 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
-from utils import get_hooks_logger, get_project_name  # noqa: E402
+from utils import get_embedding_daemon_socket_path, get_hooks_logger  # noqa: E402
 
 DAEMON_SCRIPT = Path(__file__).parent / "embedding_daemon.py"
 
@@ -18,7 +18,7 @@ logger = get_hooks_logger("StartEmbedding")
 
 
 def prewarmEmbeddingDaemon() -> None:
-    sock_path = f"/tmp/embedding-daemon-{get_project_name()}.sock"
+    sock_path = get_embedding_daemon_socket_path()
     if Path(sock_path).exists():
         return
     logger.debug("Pre-warming embedding daemon")
@@ -6,11 +6,15 @@ Runs TypeScript and ESLint checks on JS/TS files after edit.
 - Skips if typescript or eslint not installed locally
 - Reports type errors and lint issues
 - Falls back to no-op when tools unavailable
+- Type checks through the project's warm tsserver (lint_server.py) and lints
+  through eslint_d when installed; cold tsc-files / eslint otherwise
 
 Cross-platform (Windows, macOS, Linux)
 """
 
 import os
+import re
+import shutil
 import sys
 from pathlib import Path
 
@@ -18,13 +22,24 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 if script_dir not in sys.path:
     sys.path.append(script_dir)
 
+from lint_server import (  # noqa: E402
+    lint_servers_enabled,
+    queued_lint,
+    request_lint,
+    tsserver_path,
+)
 from utils import (  # noqa: E402
+    cached_lint_results,
     find_project_root,
     get_hooks_logger,
+    group_lint_targets,
+    not_installed_results,
     parse_json_output,
     run_command_cwd,
     run_jscpd,
     run_lint_hook_main,
+    split_lint_lines,
+    split_lint_records,
 )
 
 logger = get_hooks_logger("TypeScriptLint")
@@ -34,6 +49,32 @@ logger = get_hooks_logger("TypeScriptLint")
 # ---------------------------------------------------------------------------
 
 _TS_JS_EXTS = {".ts", ".tsx"}
+_TSC_LINE_RE = re.compile(r"^(\S[^(]*)\(\d+,\d+\): ")
+_ESLINT_CONFIGS = [
+    "eslint.config.js",
+    "eslint.config.mjs",
+    "eslint.config.cjs",
+    "eslint.config.ts",
+    "eslint.config.mts",
+    "eslint.config.cts",
+    ".eslintrc",
+    ".eslintrc.js",
+    ".eslintrc.cjs",
+    ".eslintrc.json",
+    ".eslintrc.yaml",
+    ".eslintrc.yml",
+    "package.json",
+]
+# Also part of the cache key: ignore rules, parser settings, and the lockfile
+# pinning ESLint's plugins
+_ESLINT_CACHE_INPUTS = [
+    ".eslintignore",
+    "tsconfig.json",
+    "package-lock.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+]
+_TYPED_LINT_RE = re.compile(r"\bproject(?:Service)?[\"']?\s*:")
 
 
 def _exec(bin_: str, args: list[str], cwd: str | None = None) -> dict:
@@ -48,69 +89,137 @@ def _check_tool_installed(tool: str, project_root: str) -> bool:
     return local_bin.exists()
 
 
-def _run_typescript(resolved: Path, project_root: str) -> dict:
-    """Run TypeScript type checking. Returns {success, output, error}."""
+def _eslint_d_bin(project_root: str) -> str | None:
+    """eslint_d from the project, else from PATH; None if not installed."""
+    local_bin = Path(project_root) / "node_modules" / ".bin" / "eslint_d"
+    if local_bin.exists():
+        return str(local_bin)
+    return shutil.which("eslint_d")
+
+
+def _tsc_line_path(line: str) -> str | None:
+    """File a tsc diagnostic line ("src/a.ts(3,7): error TS2322: ...") is about."""
+    match = _TSC_LINE_RE.match(line)
+    return match.group(1) if match else None
+
+
+def _run_typescript(paths: list[Path], project_root: str) -> dict[Path, dict]:
+    """Run TypeScript type checking. Returns {success, output, error} per path."""
     if not _check_tool_installed("tsc-files", project_root):
         logger.debug(
             "t] tsc-files not installed, skipping type check for %s",
-            resolved,
+            paths,
         )
-        return {"success": True, "output": "", "error": "", "installed": False}
+        return not_installed_results(paths)
+
+    results: dict[Path, dict] = {}
+    if lint_servers_enabled() and tsserver_path(project_root):
+        for p in paths:
+            served = request_lint(project_root, "typescript", str(p))
+            if served is None:
+                logger.debug("t] Lint server not ready, running tsc-files cold")
+                break
+            logger.debug("t] tsserver result for %s: %s", p, served)
+            results[p] = served
+    cold = [p for p in paths if p not in results]
+    if not cold:
+        return results
 
     tsc_files_bin = Path(project_root) / "node_modules" / ".bin" / "tsc-files"
+    args = ["--noEmit", *(str(p) for p in cold)]
     logger.debug(
-        "t] Running: %s --noEmit %s (cwd=%s)",
+        "t] Running: %s %s (cwd=%s)",
         tsc_files_bin,
-        resolved,
+        " ".join(args),
         project_root,
     )
-    result = _exec(str(tsc_files_bin), ["--noEmit", str(resolved)], cwd=project_root)
-    logger.debug("t] tsc-files result for %s: %s", resolved, result)
+    result = _exec(str(tsc_files_bin), args, cwd=project_root)
+    logger.debug("t] tsc-files result for %s: %s", cold, result)
     if not result["success"]:
-        logger.debug("t] Type errors in %s:\n%s", resolved, result.get("error", ""))
-    return {
-        "success": result["success"],
-        "output": result.get("output", ""),
-        "error": result.get("error", ""),
-        "installed": True,
-    }
-
-
-def _run_eslint(resolved: Path, project_root: str) -> dict:
-    """Run ESLint checks. Returns {success, output, error}.
+        logger.debug("t] Type errors in %s:\n%s", cold, result.get("error", ""))
+    results.update(split_lint_lines(result, cold, project_root, _tsc_line_path))
+    return results
+
+
+def _eslint_type_aware(paths: list[Path], project_root: str) -> bool:
+    """Whether an ESLint config for paths enables typed linting
+    (parserOptions.project / projectService). Typed rules read the files a
+    file imports, so its findings can't be cached by its own bytes."""
+    root = Path(project_root)
+    seen: set[Path] = set()
+    for p in paths:
+        for directory in [p.parent, *p.parent.parents]:
+            if directory not in seen:
+                seen.add(directory)
+                for name in _ESLINT_CONFIGS:
+                    config = directory / name
+                    try:
+                        if _TYPED_LINT_RE.search(config.read_text(errors="replace")):
+                            return True
+                    except OSError:
+                        pass
+            if directory == root:
+                break
+    return False
+
+
+def _run_eslint(paths: list[Path], project_root: str) -> dict[Path, dict]:
+    """Run ESLint checks. Returns {success, output, error} per path.
 
     `output` is parsed from ESLint's `--format json` (structured messages
     list) since agents parse structured data far more reliably than the
-    default text output.
+    default text output. Unless the config enables typed linting, files
+    whose bytes, ESLint install, configs and lockfile are unchanged since a
+    previous run are served from the lint result cache.
     """
     if not _check_tool_installed("eslint", project_root):
-        logger.debug("t] ESLint not installed, skipping lint for %s", resolved)
-        return {"success": True, "output": "", "error": "", "installed": False}
+        logger.debug("t] ESLint not installed, skipping lint for %s", paths)
+        return not_installed_results(paths)
+
+    if _eslint_type_aware(paths, project_root):
+        return _eslint_check(paths, project_root)
+    return cached_lint_results(
+        "eslint",
+        str(Path(project_root) / "node_modules" / ".bin" / "eslint"),
+        paths,
+        project_root,
+        _ESLINT_CONFIGS + _ESLINT_CACHE_INPUTS,
+        lambda misses: _eslint_check(misses, project_root),
+        logger,
+    )
+
 
+def _eslint_check(paths: list[Path], project_root: str) -> dict[Path, dict]:
     eslint_bin = Path(project_root) / "node_modules" / ".bin" / "eslint"
+    eslint_d_bin = _eslint_d_bin(project_root) if lint_servers_enabled() else None
+    if eslint_d_bin:
+        # Same CLI and JSON output as eslint, served by a warm daemon that
+        # loads the project's own eslint
+        eslint_bin = Path(eslint_d_bin)
+    args = ["--quiet", "--format", "json", *(str(p) for p in paths)]
     logger.debug(
-        "t] Running: %s --quiet --format json %s (cwd=%s)",
+        "t] Running: %s %s (cwd=%s)",
         eslint_bin,
-        resolved,
+        " ".join(args),
         project_root,
     )
-    result = _exec(
-        str(eslint_bin),
-        ["--quiet", "--format", "json", str(resolved)],
-        cwd=project_root,
-    )
-    logger.debug("t] eslint result for %s: %s", resolved, result)
+    result = _exec(str(eslint_bin), args, cwd=project_root)
+    logger.debug("t] eslint result for %s: %s", paths, result)
     output = parse_json_output(
         result.get("output", ""), "TypeScriptLint", "eslint", logger
     )
     if not result["success"]:
-        logger.debug("t] Lint issues in %s:\n%s", resolved, output)
-    return {
-        "success": result["success"],
-        "output": output,
-        "error": result.get("error", ""),
-        "installed": True,
-    }
+        logger.debug("t] Lint issues in %s:\n%s", paths, output)
+    return split_lint_records(
+        result,
+        output,
+        paths,
+        project_root,
+        lambda entry: entry.get("filePath"),
+        lambda entries: any(
+            e.get("errorCount") or e.get("fatalErrorCount") for e in entries
+        ),
+    )
 
 
 def maybe_run_typescript_lint(file_path: str | None) -> dict:
@@ -142,19 +251,48 @@ def maybe_run_typescript_lint(file_path: str | None) -> dict:
     project_root = find_project_root(str(resolved.parent))
     logger.debug("t] Project root for %s: %s", resolved, project_root)
 
-    result["typescript"] = _run_typescript(resolved, project_root)
-    result["eslint"] = _run_eslint(resolved, project_root)
+    result["typescript"] = _run_typescript([resolved], project_root)[resolved]
+    result["eslint"] = _run_eslint([resolved], project_root)[resolved]
     result["jscpd"] = run_jscpd(resolved, project_root, logger, "TypeScriptLint")
     return result
 
 
+def maybe_run_typescript_lint_batch(file_paths: list[str]) -> dict[str, dict]:
+    """
+    maybe_run_typescript_lint for a set of files: one tsc-files (or warm
+    tsserver) pass and one ESLint run per project root, split back per file.
+    jscpd still runs per file.
+
+    Returns:
+        Dict keyed by resolved file path, values shaped like
+        maybe_run_typescript_lint's result.
+    """
+    results: dict[str, dict] = {}
+    for project_root, paths in group_lint_targets(
+        file_paths, _TS_JS_EXTS, logger, "TypeScriptLint"
+    ).items():
+        typescript = _run_typescript(paths, project_root)
+        eslint = _run_eslint(paths, project_root)
+        for p in paths:
+            results[str(p)] = {
+                "typescript": typescript[p],
+                "eslint": eslint[p],
+                "jscpd": run_jscpd(p, project_root, logger, "TypeScriptLint"),
+            }
+    return results
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
 
 def main() -> None:
-    run_lint_hook_main("TypeScriptLint", logger, maybe_run_typescript_lint)
+    run_lint_hook_main(
+        "TypeScriptLint",
+        logger,
+        queued_lint("typescript_lint", _TS_JS_EXTS, maybe_run_typescript_lint),
+    )
 
 
 if __name__ == "__main__":
@@ -1,14 +1,19 @@
+import functools
 import hashlib
 import json
 import logging
 import os
 import re
+import shlex
+import sqlite3
+import stat
 import subprocess
 import sys
 import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Mapping, Optional
+from typing import Any, Mapping, NamedTuple, Optional
 
 # ---------------------------------------------------------------------------
 # Utility helpers
@@ -49,6 +54,11 @@ def get_project_name() -> str:
     return Path.cwd().name
 
 
+def get_embedding_daemon_socket_path() -> str:
+    """Socket of the user-level embedding daemon shared by every project."""
+    return f"/tmp/embedding-daemon-{os.getuid()}.sock"
+
+
 def ensure_dir(directory: Path) -> None:
     directory.mkdir(parents=True, exist_ok=True)
 
@@ -169,6 +179,279 @@ def run_jscpd(
     }
 
 
+def group_lint_targets(
+    file_paths: list[str], exts: set[str], logger: logging.Logger, tag: str
+) -> dict[str, list[Path]]:
+    """Resolve file_paths and group the existing ones with a suffix in exts by
+    project root, so a batch lints each root in one tool run."""
+    groups: dict[str, list[Path]] = {}
+    for file_path in file_paths:
+        resolved = Path(file_path).resolve()
+        if resolved.suffix.lower() not in exts or not resolved.exists():
+            logger.debug("[%s] Skipping %s in batch", tag, resolved)
+            continue
+        project_root = find_project_root(str(resolved.parent))
+        groups.setdefault(project_root, [])
+        if resolved not in groups[project_root]:
+            groups[project_root].append(resolved)
+    return groups
+
+
+def not_installed_results(paths: list[Path]) -> dict[Path, dict]:
+    """Per-path result for a check whose tool isn't installed."""
+    return {
+        p: {"success": True, "output": "", "error": "", "installed": False}
+        for p in paths
+    }
+
+
+def _batch_entry(result: dict, success: bool, output: Any) -> dict:
+    return {
+        "success": success,
+        "output": output,
+        "error": result.get("error", ""),
+        "installed": True,
+    }
+
+
+def split_lint_records(
+    result: dict,
+    output: Any,
+    paths: list[Path],
+    project_root: str,
+    file_of,
+    failed=bool,
+) -> dict[Path, dict]:
+    """Split one batched run of a JSON-reporting tool into per-file results.
+
+    `output` is the parsed record list and file_of(record) the path it is
+    about (relative to project_root or absolute). Records about files outside
+    the batch — mypy errors in an imported module — go to every file, as a
+    single-file run reports them too. failed(records) decides a file's
+    success when the batch as a whole failed. A single path, or output that
+    didn't parse into records, gets the run exactly as a per-file call would.
+    """
+    if len(paths) == 1 or not isinstance(output, list):
+        return {p: _batch_entry(result, result["success"], output) for p in paths}
+    by_path: dict[str, list] = {str(p): [] for p in paths}
+    shared = []
+    for record in output:
+        name = file_of(record) if isinstance(record, dict) else None
+        key = str((Path(project_root) / name).resolve()) if name else None
+        by_path.get(key, shared).append(record)
+    split = {}
+    for p in paths:
+        records = by_path[str(p)] + shared
+        split[p] = _batch_entry(result, result["success"] or not failed(records), records)
+    return split
+
+
+def split_lint_lines(
+    result: dict, paths: list[Path], project_root: str, path_of_line
+) -> dict[Path, dict]:
+    """Split one batched run of a text-reporting tool into per-file results.
+
+    path_of_line(line) returns the path a line starts reporting on, or None;
+    unattributed lines continue the previous file's report. Lines about files
+    outside the batch — tsc errors in a module that imports an edited one —
+    go to every file, and fail it when the batch failed, as in
+    split_lint_records. Lines before the first attributed one (headers,
+    summaries) are shared by every file that has findings. A file with no
+    findings passed.
+    """
+    output = result.get("output", "")
+    if len(paths) == 1:
+        return {p: _batch_entry(result, result["success"], output) for p in paths}
+    by_path: dict[str, list[str]] = {str(p): [] for p in paths}
+    header: list[str] = []
+    shared: list[str] = []
+    current: list[str] | None = None
+    for line in output.splitlines():
+        name = path_of_line(line)
+        if name:
+            key = str((Path(project_root) / name).resolve())
+            current = by_path.get(key, shared)
+        (current if current is not None else header).append(line)
+    if not result["success"] and not any(by_path.values()) and not shared:
+        # Failed without naming any file (crash, bad config): report it everywhere
+        return {p: _batch_entry(result, False, output) for p in paths}
+    split = {}
+    for p in paths:
+        findings = by_path[str(p)] + shared
+        text = "\n".join(header + findings) if findings else ""
+        split[p] = _batch_entry(result, result["success"] or not findings, text)
+    return split
+
+
+# Lint results keyed by what actually determines them: the file's bytes, its
+# path relative to the project, the tool binary, and the tool's config files.
+# A no-op Edit, a revert, or re-linting an untouched file is served from here
+# instead of re-running the tool. Only for tools whose findings depend on the
+# one file alone (not type checkers, which also read its imports).
+LINT_CACHE_VERSION = 1  # bump when the stored result shape changes
+LINT_CACHE_MAX_BYTES = 32 * 1024 * 1024  # per project; least recently used go first
+
+
+def _sha256_file(path: Path) -> str | None:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def tool_stamp(tool_bin: str | None) -> str | None:
+    """Identity of an installed tool binary: real path, mtime, size.
+
+    Stands in for `tool --version` without spawning it; pip and npm rewrite
+    the binary (or its entry script) on every install or upgrade.
+    """
+    if not tool_bin:
+        return None
+    try:
+        real = os.path.realpath(tool_bin)
+        st = os.stat(real)
+    except OSError:
+        return None
+    return f"{real}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def config_hashes(path: Path, project_root: str, names: list[str]) -> list[tuple]:
+    """(relative path, sha256) of each config file named in `names` found in
+    path's directory or any parent up to project_root."""
+    root = Path(project_root)
+    found = []
+    for directory in [path.parent, *path.parent.parents]:
+        for name in names:
+            candidate = directory / name
+            if candidate.is_file():
+                rel = os.path.relpath(candidate, root)
+                found.append((rel, _sha256_file(candidate)))
+        if directory == root:
+            break
+    return found
+
+
+def lint_cache_key(
+    tool: str, stamp: str, path: Path, project_root: str, config_names: list[str]
+) -> str | None:
+    content = _sha256_file(path)
+    if content is None:
+        return None
+    parts = [
+        LINT_CACHE_VERSION,
+        tool,
+        stamp,
+        os.path.relpath(path, project_root),
+        content,
+        config_hashes(path, project_root, config_names),
+    ]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def open_lint_cache(project_root: str, logger: logging.Logger):
+    # A cached clean result stands in for the real lint run, so the cache
+    # only lives where nobody else can write it.
+    cache_dir = private_project_dir(project_root, "lint-cache")
+    if cache_dir is None:
+        logger.debug("Lint result cache unavailable: no private cache dir")
+        return None
+    try:
+        conn = sqlite3.connect(str(cache_dir / "results.db"), timeout=1)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL, size INTEGER NOT NULL, "
+            "used REAL NOT NULL)"
+        )
+        return conn
+    except sqlite3.Error as exc:
+        logger.debug(f"Lint result cache unavailable: {exc}")
+        return None
+
+
+def _load_lint_results(conn, keys: list[str]) -> dict[str, dict]:
+    found = {}
+    now = time.time()
+    with conn:
+        for key in keys:
+            row = conn.execute(
+                "SELECT result FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                found[key] = json.loads(row[0])
+                conn.execute("UPDATE results SET used = ? WHERE key = ?", (now, key))
+    return found
+
+
+def _store_lint_results(conn, results: dict[str, dict]) -> None:
+    now = time.time()
+    with conn:
+        for key, result in results.items():
+            blob = json.dumps(result)
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), now),
+            )
+        conn.execute(
+            "DELETE FROM results WHERE key IN (SELECT key FROM ("
+            "SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS total "
+            "FROM results) WHERE total > ?)",
+            (LINT_CACHE_MAX_BYTES,),
+        )
+
+
+def cached_lint_results(
+    tool: str,
+    tool_bin: str | None,
+    paths: list[Path],
+    project_root: str,
+    config_names: list[str],
+    run,
+    logger: logging.Logger,
+) -> dict[Path, dict]:
+    """run(paths) -> {path: result}, but only for paths whose result isn't
+    already cached under lint_cache_key. Fresh results are stored unless the
+    tool failed without output (crash, timeout), which is never cached.
+    """
+    stamp = tool_stamp(tool_bin)
+    conn = open_lint_cache(project_root, logger) if stamp else None
+    if conn is None:
+        return run(paths)
+    try:
+        keys = {
+            p: lint_cache_key(tool, stamp, p, project_root, config_names)
+            for p in paths
+        }
+        try:
+            cached = _load_lint_results(conn, [k for k in keys.values() if k])
+        except (sqlite3.Error, ValueError) as exc:
+            logger.debug(f"Lint result cache read failed: {exc}")
+            cached = {}
+        results = {p: cached[k] for p, k in keys.items() if k in cached}
+        misses = [p for p in paths if p not in results]
+        if results:
+            logger.debug(f"{tool} cache hit for {sorted(map(str, results))}")
+        if not misses:
+            return results
+        fresh = run(misses)
+        results.update(fresh)
+        storable = {
+            keys[p]: result
+            for p, result in fresh.items()
+            if keys.get(p)
+            and result.get("installed", True)
+            and (result.get("success") or result.get("output"))
+            # edited again while the tool ran: the result may be for either version
+            and lint_cache_key(tool, stamp, p, project_root, config_names) == keys[p]
+        }
+        try:
+            _store_lint_results(conn, storable)
+        except sqlite3.Error as exc:
+            logger.debug(f"Lint result cache write failed: {exc}")
+        return results
+    finally:
+        conn.close()
+
+
 def run_lint_hook_main(tag: str, logger: logging.Logger, maybe_run_lint) -> None:
     """Shared PostToolUse hook entrypoint: read stdin, run lint checks, emit output."""
     max_stdin = 1024 * 1024  # 1 MB
@@ -224,6 +507,14 @@ def get_hooks_logger(
 
     logger = logging.getLogger(name)
     logger.setLevel(logging.DEBUG)
+    # Long-lived callers (hook_host.py) reach this once per event: don't stack
+    # a new handler, and a new open file, on every call.
+    log_path = os.path.abspath(LOG_FILE)
+    if any(
+        isinstance(handler, logging.FileHandler) and handler.baseFilename == log_path
+        for handler in logger.handlers
+    ):
+        return logger
 
     file_handler = logging.FileHandler(LOG_FILE)
     file_handler.setLevel(logging.DEBUG)
@@ -358,6 +649,29 @@ def tmp_project_dir(project_root: str, namespace: str) -> Path:
     return tmp_dir
 
 
+def private_project_dir(project_root: str, namespace: str) -> Path | None:
+    """Per-project cache dir the calling user alone controls, for state a hook
+    trusts (e.g. to skip a check): under $XDG_CACHE_HOME or ~/.cache rather
+    than the shared tmp dir, created 0700, and only returned when every level
+    is a real directory owned by this user that nobody else can write to.
+    None if that can't be guaranteed — callers then skip the cache."""
+    key = hashlib.sha1(project_root.encode()).hexdigest()[:12]
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "claude-hooks"
+    directory = base
+    try:
+        base.parent.mkdir(parents=True, exist_ok=True)
+        for part in (None, namespace, key):
+            if part is not None:
+                directory = directory / part
+            directory.mkdir(mode=0o700, exist_ok=True)
+            st = directory.lstat()
+            if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+                return None
+    except OSError:
+        return None
+    return directory
+
+
 def find_last_coverage_dir(project_root: str) -> str:
     """Return existing coverage dir if present, else default 'coverage'."""
     default_dir = Path(project_root) / "coverage"
@@ -387,6 +701,22 @@ def lock_path_for(tmp_dir: Path, rel_path: str) -> Path:
     return tmp_dir / "locks" / f"{key}.lock"
 
 
+def coverage_queue_entry(tmp_dir: Path, state: str, rel_path: str) -> Path:
+    """Incremental-coverage work item for a project-relative file: under
+    tmp_dir/queue while waiting for the coverage worker, tmp_dir/running
+    while its batch runs. One entry per file, so repeat edits collapse."""
+    key = hashlib.sha1(rel_path.encode()).hexdigest()[:16]
+    return tmp_dir / state / key
+
+
+def coverage_update_pending(tmp_dir: Path, rel_path: str) -> bool:
+    """True while the file's incremental coverage is queued or running."""
+    return any(
+        coverage_queue_entry(tmp_dir, state, rel_path).exists()
+        for state in ("queue", "running")
+    )
+
+
 def acquire_lock(lock_file: Path) -> bool:
     """Create lock_file if absent or its owning PID is dead. Returns True if acquired."""
     lock_file.parent.mkdir(parents=True, exist_ok=True)
@@ -713,3 +1043,148 @@ def split_on_operators(command: str, protect_exec: bool = False) -> list[str]:
 
     segments.append("".join(current))
     return [s.replace("\x00", ";").strip() for s in segments if s.strip()]
+
+
+# bash process substitution: <(cmd) / >(cmd) — smuggles a command whose
+# output/input is a target file, bypassing normal tokenization entirely
+PROCESS_SUBSTITUTION_RE = re.compile(r"[<>]\(([^()]*)\)")
+
+
+def extract_subshells(command: str) -> list[str]:
+    """Pull inner text out of $(...) / `...`, recursively, so it gets
+    scanned too. Depth-tracked (unlike a single regex), and skips $((...))
+    arithmetic expansion."""
+    subshells = []
+
+    i = 0
+    while i < len(command):
+        if (
+            command[i] == "$"
+            and i + 1 < len(command)
+            and command[i + 1] == "("
+            and not (i + 2 < len(command) and command[i + 2] == "(")
+        ):
+            depth = 0
+            start = i + 2
+            j = i + 1
+            while j < len(command):
+                if command[j] == "(":
+                    depth += 1
+                elif command[j] == ")":
+                    depth -= 1
+                    if depth == 0:
+                        content = command[start:j]
+                        subshells.append(content)
+                        subshells.extend(extract_subshells(content))
+                        break
+                j += 1
+            i = j + 1
+        else:
+            i += 1
+
+    parts = command.split("`")
+    for idx in range(1, len(parts), 2):
+        content = parts[idx]
+        if content.strip():
+            subshells.append(content)
+            subshells.extend(extract_subshells(content))
+
+    return subshells
+
+
+def neutralize_subshells(command: str) -> str:
+    """Replace each top-level $(...) / `...` span with a placeholder word.
+
+    Their contents are already scanned independently via extract_subshells()
+    — this just keeps shlex from mis-tokenizing the raw "$(...)" text when
+    splitting the outer command into argv (e.g. `cat $(echo .env)` would
+    otherwise shlex-split into the garbage tokens "$(echo" and ".env)").
+    """
+    result = []
+    i = 0
+    n = len(command)
+    while i < n:
+        if command[i] == "$" and i + 1 < n and command[i + 1] == "(":
+            depth = 0
+            j = i + 1
+            while j < n:
+                if command[j] == "(":
+                    depth += 1
+                elif command[j] == ")":
+                    depth -= 1
+                    if depth == 0:
+                        j += 1
+                        break
+                j += 1
+            result.append("__SUBSHELL__")
+            i = j
+            continue
+        if command[i] == "`":
+            end = command.find("`", i + 1)
+            if end == -1:
+                result.append(command[i:])
+                break
+            result.append("__SUBSHELL__")
+            i = end + 1
+            continue
+        result.append(command[i])
+        i += 1
+    return "".join(result)
+
+
+class ParsedCommand(NamedTuple):
+    """A Bash command split the ways the Bash hooks inspect it.
+
+    segments / segment_subshells: top-level split_on_operators() segments and,
+    per segment, the split_on_operators() segments of every subshell inside
+    it (smart_approve, protect_branches).
+    exec_commands / exec_tokens: the find -exec safe split of the command, its
+    subshells and process substitutions, and the shlex tokens of each with
+    nested subshells neutralized (protect_files).
+    """
+
+    segments: tuple[str, ...]
+    segment_subshells: tuple[tuple[str, ...], ...]
+    exec_commands: tuple[str, ...]
+    exec_tokens: tuple[tuple[str, ...], ...]
+
+
+def shell_tokens(command: str) -> list[str]:
+    try:
+        return shlex.split(command)
+    except ValueError:
+        return command.split()
+
+
+def _parse_command(command: str) -> ParsedCommand:
+    segments = split_on_operators(command)
+    segment_subshells = tuple(
+        tuple(
+            sub_segment
+            for sub in extract_subshells(segment)
+            for sub_segment in split_on_operators(sub)
+        )
+        for segment in segments
+    )
+
+    exec_commands = split_on_operators(command, protect_exec=True)
+    for sub in extract_subshells(command):
+        exec_commands.extend(split_on_operators(sub, protect_exec=True))
+    for m in PROCESS_SUBSTITUTION_RE.finditer(command):
+        exec_commands.extend(split_on_operators(m.group(1), protect_exec=True))
+    exec_tokens = tuple(
+        tuple(shell_tokens(neutralize_subshells(sub))) for sub in exec_commands
+    )
+
+    return ParsedCommand(
+        tuple(segments), segment_subshells, tuple(exec_commands), exec_tokens
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_command(command: str) -> ParsedCommand:
+    """Parse a Bash command once for every hook that inspects it.
+
+    Memoized in-process: an LRU, which lasts across events in the hook host.
+    """
+    return _parse_command(command)
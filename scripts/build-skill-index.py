@@ -1,24 +1,94 @@
 #!/usr/bin/env python3
-"""Build SQLite vector index and name->path manifest from skills/index.yaml."""
+"""Build SQLite vector index and name->path manifest from skills/index.yaml.
+
+Alongside skills.db it writes skills.npy: the embeddings as one contiguous,
+L2-normalized float32 matrix (row i = i-th skill by id), which
+hooks/scripts/skill_activation.py memory-maps so matching is a single
+matrix-vector product, and skills.npy.stamp: a digest of the (id,
+content_hash) rows the matrix was built from. The hook recomputes it from the
+DB and only uses the matrix when the two agree.
+
+Rebuilds are incremental: each row stores a hash of its name + description,
+so only new or changed skills are re-embedded (in one batched call) and
+skills dropped from index.yaml are deleted. Skill dirs whose mtimes haven't
+moved reuse their cached manifest entry. --force rebuilds everything.
+"""
 
 import argparse
+import hashlib
 import json
+import os
 import re
 import sqlite3
+import stat
 import sys
 from pathlib import Path
 
+import numpy as np
 import yaml
 
 _FRONTMATTER_NAME_RE = re.compile(r"^name:\s*(.+)$", re.MULTILINE)
 
 
-def build_manifest(skills_dir: Path) -> dict:
-    """Walk skills_dir for SKILL.md files, map frontmatter name -> path + adjacent files."""
+def manifest_cache_path(skills_dir: Path) -> Path | None:
+    """Manifest cache under a per-user dir (same layout and checks as
+    hooks/scripts/utils.private_project_dir): every level created 0700 and
+    required to be a real directory owned by us that nobody else can write.
+    None if that can't be guaranteed — the manifest is then built uncached."""
+    key = hashlib.sha1(str(skills_dir.resolve()).encode()).hexdigest()[:12]
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "claude-hooks"
+    directory = base
+    try:
+        base.parent.mkdir(parents=True, exist_ok=True)
+        for part in (None, "skill-index", key):
+            if part is not None:
+                directory = directory / part
+            directory.mkdir(mode=0o700, exist_ok=True)
+            st = directory.lstat()
+            if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+                return None
+    except OSError:
+        return None
+    return directory / "manifest-cache.json"
+
+
+def skill_dir_stamp(skill_md: Path) -> int:
+    """Newest mtime_ns of SKILL.md and every directory under its skill dir.
+
+    Adding, removing or renaming a file at any depth bumps its parent
+    directory's mtime, so this changes whenever the manifest entry could —
+    without stat-ing every file.
+    """
+    stamp = skill_md.stat().st_mtime_ns
+    for dirpath, _dirnames, _filenames in os.walk(skill_md.parent):
+        stamp = max(stamp, os.stat(dirpath).st_mtime_ns)
+    return stamp
+
+
+def build_manifest(skills_dir: Path, cache: dict | None = None) -> tuple[dict, dict]:
+    """Walk skills_dir for SKILL.md files, map frontmatter name -> path + adjacent files.
+
+    `cache` maps SKILL.md rel path -> {"stamp", "name", "entry"} from the
+    previous run; skill dirs whose stamp is unchanged reuse their entry
+    instead of re-reading SKILL.md and re-listing files. Returns
+    (manifest, new_cache).
+    """
+    cache = cache or {}
     manifest = {}
+    new_cache = {}
     for skill_md in sorted(skills_dir.glob("**/SKILL.md")):
+        rel = str(skill_md.relative_to(skills_dir))
+        stamp = skill_dir_stamp(skill_md)
+        cached = cache.get(rel)
+        if cached and cached.get("stamp") == stamp:
+            new_cache[rel] = cached
+            if cached["name"] is not None:
+                manifest[cached["name"]] = cached["entry"]
+            continue
+
         match = _FRONTMATTER_NAME_RE.search(skill_md.read_text())
         if not match:
+            new_cache[rel] = {"stamp": stamp, "name": None, "entry": None}
             continue
         name = match.group(1).strip().strip("'\"")
         skill_dir = skill_md.parent
@@ -27,11 +97,174 @@ def build_manifest(skills_dir: Path) -> dict:
             for p in skill_dir.rglob("*")
             if p.is_file() and p != skill_md
         )
-        manifest[name] = {
-            "skill_md": str(skill_md.relative_to(skills_dir)),
-            "files": files,
-        }
-    return manifest
+        entry = {"skill_md": rel, "files": files}
+        manifest[name] = entry
+        new_cache[rel] = {"stamp": stamp, "name": name, "entry": entry}
+    return manifest, new_cache
+
+
+def load_manifest_cache(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def skill_text(name: str, desc: str) -> str:
+    return f"{name}: {desc}"
+
+
+def content_hash(name: str, desc: str) -> str:
+    return hashlib.sha256(skill_text(name, desc).encode()).hexdigest()
+
+
+def ensure_schema(conn: sqlite3.Connection, force: bool) -> None:
+    """Create the tables; drop them first on --force or a pre-content_hash schema."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(skills)")}
+    if force or (columns and "content_hash" not in columns):
+        conn.execute("DROP TABLE IF EXISTS skills")
+        conn.execute("DROP TABLE IF EXISTS skills_fts")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS skills (
+            id           INTEGER PRIMARY KEY,
+            name         TEXT NOT NULL,
+            description  TEXT NOT NULL,
+            hint         TEXT NOT NULL,
+            embedding    BLOB NOT NULL,
+            content_hash TEXT NOT NULL DEFAULT ''
+        )
+    """)
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS skills_fts USING fts5(
+            name, description, content='skills', content_rowid='id'
+        )
+    """)
+
+
+def sync_skills(conn: sqlite3.Connection, skills: list[dict], embed) -> dict:
+    """Bring the skills table in line with index.yaml entries.
+
+    Only new or changed skills (by content_hash of name + description) are
+    embedded, all in one `embed(texts)` call; skills no longer in the index
+    are deleted. Returns {"added", "updated", "deleted", "unchanged"} counts.
+    """
+    desired: dict[str, str] = {}
+    for skill in skills:
+        names = skill.get("name", [])
+        name = names[0] if isinstance(names, list) else names
+        desired[name] = skill.get("description", "")
+
+    existing = {
+        name: (row_id, digest, desc)
+        for row_id, name, digest, desc in conn.execute(
+            "SELECT id, name, content_hash, description FROM skills"
+        )
+    }
+
+    deleted = [name for name in existing if name not in desired]
+    for name in deleted:
+        row_id, _digest, desc = existing[name]
+        conn.execute(
+            "INSERT INTO skills_fts (skills_fts, rowid, name, description) "
+            "VALUES ('delete', ?, ?, ?)",
+            (row_id, name, desc),
+        )
+        conn.execute("DELETE FROM skills WHERE id = ?", (row_id,))
+
+    stale = [
+        name
+        for name, desc in desired.items()
+        if name not in existing or existing[name][1] != content_hash(name, desc)
+    ]
+    vectors = embed([skill_text(name, desired[name]) for name in stale]) if stale else []
+
+    added = updated = 0
+    for name, vector in zip(stale, vectors):
+        desc = desired[name]
+        row = (desc, desc, np.asarray(vector, dtype=np.float32).tobytes())
+        digest = content_hash(name, desc)
+        if name in existing:
+            row_id, _digest, old_desc = existing[name]
+            conn.execute(
+                "INSERT INTO skills_fts (skills_fts, rowid, name, description) "
+                "VALUES ('delete', ?, ?, ?)",
+                (row_id, name, old_desc),
+            )
+            conn.execute(
+                "UPDATE skills SET description = ?, hint = ?, embedding = ?, "
+                "content_hash = ? WHERE id = ?",
+                (*row, digest, row_id),
+            )
+            updated += 1
+        else:
+            row_id = conn.execute(
+                "INSERT INTO skills (name, description, hint, embedding, content_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (name, *row, digest),
+            ).lastrowid
+            added += 1
+        conn.execute(
+            "INSERT INTO skills_fts (rowid, name, description) VALUES (?, ?, ?)",
+            (row_id, name, desc),
+        )
+
+    return {
+        "added": added,
+        "updated": updated,
+        "deleted": len(deleted),
+        "unchanged": len(desired) - len(stale),
+    }
+
+
+def matrix_path_for(db_path: Path) -> Path:
+    return db_path.with_suffix(".npy")
+
+
+def stamp_path_for(matrix_path: Path) -> Path:
+    return matrix_path.with_suffix(".npy.stamp")
+
+
+def skill_matrix_stamp(conn: sqlite3.Connection) -> str:
+    """Digest of the rows behind the matrix; skill_activation.py computes the
+    same one (keep them in sync)."""
+    digest = hashlib.sha256()
+    for row_id, row_hash in conn.execute("SELECT id, content_hash FROM skills ORDER BY id"):
+        digest.update(f"{row_id}:{row_hash}\n".encode())
+    return digest.hexdigest()
+
+
+def read_matrix_stamp(matrix_path: Path) -> str | None:
+    try:
+        return stamp_path_for(matrix_path).read_text().strip()
+    except OSError:
+        return None
+
+
+def write_skill_matrix(conn: sqlite3.Connection, matrix_path: Path) -> int:
+    """Dump skill embeddings (ordered by id) as an L2-normalized float32 .npy.
+
+    Written to a temp file and renamed so a hook memory-mapping the old
+    matrix never sees a half-written one. The stamp is replaced after the
+    matrix, so a reader in between sees a mismatch, never a stale match.
+    """
+    rows = conn.execute("SELECT embedding FROM skills ORDER BY id").fetchall()
+    if rows:
+        matrix = np.stack([np.frombuffer(emb, dtype=np.float32) for (emb,) in rows])
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+    tmp_path = matrix_path.with_suffix(".npy.tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, matrix)
+    tmp_path.replace(matrix_path)
+    stamp_path = stamp_path_for(matrix_path)
+    tmp_stamp = stamp_path.with_suffix(".stamp.tmp")
+    tmp_stamp.write_text(skill_matrix_stamp(conn) + "\n")
+    tmp_stamp.replace(stamp_path)
+    return len(rows)
 
 
 def main():
@@ -51,20 +284,27 @@ def main():
         sys.exit(1)
 
     manifest_path.parent.mkdir(parents=True, exist_ok=True)
-    manifest = build_manifest(index_path.parent)
+    cache_path = manifest_cache_path(index_path.parent)
+    manifest, manifest_cache = build_manifest(
+        index_path.parent,
+        None if args.force or cache_path is None else load_manifest_cache(cache_path),
+    )
     manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + "\n")
+    if cache_path is not None:
+        cache_path.write_text(json.dumps(manifest_cache))
     print(f"Built manifest: {len(manifest)} skills → {manifest_path}")
 
+    matrix_path = matrix_path_for(db_path)
     if not args.force and db_path.exists():
         if db_path.stat().st_mtime > index_path.stat().st_mtime:
+            conn = sqlite3.connect(db_path)
+            if read_matrix_stamp(matrix_path) != skill_matrix_stamp(conn):
+                count = write_skill_matrix(conn, matrix_path)
+                print(f"Built matrix: {count} skills → {matrix_path}")
+            conn.close()
             print("Index up-to-date")
             sys.exit(0)
 
-    from fastembed import TextEmbedding
-
-    print("Loading model...")
-    model = TextEmbedding("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
-
     with open(index_path) as f:
         data = yaml.safe_load(f)
 
@@ -73,47 +313,35 @@ def main():
         print("No skills found in index.yaml", file=sys.stderr)
         sys.exit(1)
 
+    model = None
+
+    def embed(texts: list[str]):
+        nonlocal model
+        if model is None:
+            from fastembed import TextEmbedding
+
+            print("Loading model...")
+            model = TextEmbedding(
+                "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+            )
+        print(f"Embedding {len(texts)} skills...")
+        return list(model.embed(texts))
+
     db_path.parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(db_path)
-    conn.execute("DROP TABLE IF EXISTS skills")
-    conn.execute("DROP TABLE IF EXISTS skills_fts")
-    conn.execute("""
-        CREATE TABLE skills (
-            id          INTEGER PRIMARY KEY,
-            name        TEXT NOT NULL,
-            description TEXT NOT NULL,
-            hint        TEXT NOT NULL,
-            embedding   BLOB NOT NULL
-        )
-    """)
-    conn.execute("""
-        CREATE VIRTUAL TABLE skills_fts USING fts5(
-            name, description, content='skills', content_rowid='id'
-        )
-    """)
-
-    rows = []
-    for skill in skills:
-        names = skill.get("name", [])
-        name = names[0] if isinstance(names, list) else names
-        desc = skill.get("description", "")
-        text = f"{name}: {desc}"
-        vector = list(model.embed([text]))[0].astype("float32")
-        rows.append((name, desc, desc, vector.tobytes()))
-
-    for name, desc, hint, embedding in rows:
-        cur = conn.execute(
-            "INSERT INTO skills (name, description, hint, embedding) VALUES (?, ?, ?, ?)",
-            (name, desc, hint, embedding),
-        )
-        conn.execute(
-            "INSERT INTO skills_fts (rowid, name, description) VALUES (?, ?, ?)",
-            (cur.lastrowid, name, desc),
-        )
+    ensure_schema(conn, args.force)
+    counts = sync_skills(conn, skills, embed)
     conn.commit()
+    total = write_skill_matrix(conn, matrix_path)
     conn.close()
+    # Bump mtime even when nothing changed so the up-to-date check holds.
+    os.utime(db_path)
 
-    print(f"Built index: {len(rows)} skills → {db_path}")
+    print(
+        f"Built index: {total} skills → {db_path} (+ {matrix_path.name}) — "
+        f"{counts['added']} added, {counts['updated']} updated, "
+        f"{counts['deleted']} deleted, {counts['unchanged']} unchanged"
+    )
 
 
 if __name__ == "__main__":
@@ -140,6 +140,8 @@ find "$LOCAL/$DEFAULT_FOLDER/skills" -maxdepth 1 -type l | while read -r link; d
 done
 ln -s "$SOURCE/skills/index.yaml" "$LOCAL/$DEFAULT_FOLDER/skills/index.yaml"
 ln -s "$SOURCE/skills/skills.db" "$LOCAL/$DEFAULT_FOLDER/skills/skills.db"
+ln -s "$SOURCE/skills/skills.npy" "$LOCAL/$DEFAULT_FOLDER/skills/skills.npy"
+ln -s "$SOURCE/skills/skills.npy.stamp" "$LOCAL/$DEFAULT_FOLDER/skills/skills.npy.stamp"
 # Procurar por todos os SKILL.md e criar symlinks para seus diretórios pai
 find "$SOURCE/skills" -name "SKILL.md" -type f | while read skill_file; do
     # Obter o diretório pai de SKILL.md (diretório da skill)
@@ -240,6 +242,12 @@ fi
 if ! grep -qF "skills.db" .git/info/exclude; then
     echo "skills.db" >> .git/info/exclude
 fi
+if ! grep -qF "skills.npy" .git/info/exclude; then
+    echo "skills.npy" >> .git/info/exclude
+fi
+if ! grep -qF "skills.npy.stamp" .git/info/exclude; then
+    echo "skills.npy.stamp" >> .git/info/exclude
+fi
 if ! grep -qF ".mcp.json" .git/info/exclude; then
     echo ".mcp.json" >> .git/info/exclude
 fi
@@ -9,7 +9,7 @@ import shutil
 import subprocess
 from pathlib import Path
 
-from office.soffice import get_soffice_env
+from office.soffice import get_soffice_env, run_worker_jobs
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +52,19 @@ def accept_changes(
     except Exception as e:
         return None, f"Error: Failed to copy input file to output location: {e}"
 
+    outcomes = run_worker_jobs(
+        _accept_all_tracked_changes, [str(output_path.absolute())], timeout=30
+    )
+    if outcomes is not None:
+        if isinstance(outcomes[0], TimeoutError):
+            return None, "Error: LibreOffice timed out accepting tracked changes"
+        if outcomes[0] is not None:
+            return None, f"Error: LibreOffice failed: {outcomes[0]}"
+        return (
+            None,
+            f"Successfully accepted all tracked changes: {input_file} -> {output_file}",
+        )
+
     if not _setup_libreoffice_macro():
         return None, "Error: Failed to setup LibreOffice macro"
 
@@ -88,6 +101,15 @@ def accept_changes(
     )
 
 
+def _accept_all_tracked_changes(document, context) -> None:
+    dispatcher = context.ServiceManager.createInstanceWithContext(
+        "com.sun.star.frame.DispatchHelper", context
+    )
+    dispatcher.executeDispatch(
+        document.CurrentController.Frame, ".uno:AcceptAllTrackedChanges", "", 0, ()
+    )
+
+
 def _setup_libreoffice_macro() -> bool:
     macro_dir = Path(MACRO_DIR)
     macro_file = macro_dir / "Module1.xba"
@@ -13,16 +13,52 @@ the env dict carries the shim but names no user profile, and a non-root sandbox
 cannot bootstrap the default one -- soffice aborts with "User installation could
 not be completed" and converts nothing. get_soffice_env() stays public for the
 callers that build their own argv (they must pass -env:UserInstallation too).
+
+Jobs that open documents and change them (recalculating a workbook, accepting
+tracked changes) can run in a shared worker instead. The worker is opt-in
+(OFFICE_SOFFICE_WORKER=1) until it has been run against a real LibreOffice
+install; otherwise run_worker_jobs returns None and callers launch soffice
+themselves:
+
+    from office.soffice import run_worker_jobs
+
+    errors = run_worker_jobs(recalculate, ["/abs/a.xlsx", "/abs/b.xlsx"], timeout=30)
+
+The worker is one headless soffice per user. It listens for UNO connections,
+keeps its profile between runs, and exits after WORKER_IDLE_TIMEOUT without
+a job. A small supervisor process (this file, run with --serve-worker) watches
+it. Each job is a function called with the loaded document and the component
+context. run_worker_jobs stores and closes the document after the job, and
+returns one result per path: None, or the exception that stopped it
+(TimeoutError if it ran over). When the worker is unusable it returns None, so
+the caller can fall back to launching soffice itself. That happens when
+the worker isn't enabled, when Python can't import LibreOffice's `uno` module, when soffice is missing or
+never comes up, when AF_UNIX sockets are blocked (the worker only listens on a
+named pipe, never on an unauthenticated TCP port), or when its directory under
+$XDG_RUNTIME_DIR (else ~/.cache) isn't private to this user.
 """
 
 import contextlib
+import fcntl
+import json
 import os
+import shutil
+import signal
 import socket
+import stat
 import subprocess
+import sys
 import tempfile
-from collections.abc import Iterable
+import threading
+import time
+from collections.abc import Callable, Iterable
 from pathlib import Path
 
+WORKER_ENV = "OFFICE_SOFFICE_WORKER"
+WORKER_IDLE_TIMEOUT = 600
+WORKER_START_TIMEOUT = 60
+_WORKER_POLL = 2.0
+
 
 def get_soffice_env() -> dict:
     env = os.environ.copy()
@@ -46,6 +82,234 @@ def run_soffice(args: Iterable[str], **kwargs) -> subprocess.CompletedProcess:
         return subprocess.run(["soffice"] + args, env=get_soffice_env(), **kwargs)
 
 
+def run_worker_jobs(
+    job: Callable, paths: Iterable[str], timeout: float = 30
+) -> list[BaseException | None] | None:
+    if os.environ.get(WORKER_ENV) != "1":
+        return None
+    uno = _import_uno()
+    if uno is None or shutil.which("soffice") is None or _needs_shim():
+        return None
+    worker_dir = _worker_dir()
+    if worker_dir is None:
+        return None
+
+    paths = [str(Path(p).absolute()) for p in paths]
+    with open(worker_dir / "jobs.lock", "a") as lock:
+        # One job at a time; the supervisor takes this lock before it
+        # shuts an idle worker down.
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            state = _worker_state(worker_dir) or _start_worker(worker_dir)
+            context = _connect_worker(uno, state, worker_dir) if state else None
+            if context is None:
+                return None
+            results = []
+            for path in paths:
+                if context is None:
+                    # The previous job timed out and its soffice was killed.
+                    state = _start_worker(worker_dir)
+                    context = _connect_worker(uno, state, worker_dir) if state else None
+                    if context is None:
+                        results.append(
+                            RuntimeError("the LibreOffice worker did not restart")
+                        )
+                        continue
+                result = _run_worker_job(uno, context, job, path, timeout, state)
+                if isinstance(result, TimeoutError):
+                    context = None
+                results.append(result)
+            return results
+        finally:
+            (worker_dir / "last_used").touch()
+
+
+def _import_uno():
+    try:
+        import uno
+    except ImportError:
+        soffice = shutil.which("soffice")
+        if soffice is None:
+            return None
+        # LibreOffice ships uno.py next to the soffice binary.
+        sys.path.append(str(Path(soffice).resolve().parent))
+        try:
+            import uno
+        except ImportError:
+            return None
+    return uno
+
+
+def _worker_dir() -> Path | None:
+    # The worker's profile, state and locks. Another user who could write
+    # here could plant a profile (macros) or point state.json at their own
+    # process, so the dir is only used while it is ours and closed to others.
+    base = Path(
+        os.environ.get("XDG_RUNTIME_DIR")
+        or os.environ.get("XDG_CACHE_HOME")
+        or Path.home() / ".cache"
+    )
+    worker_dir = base / "lo_worker"
+    try:
+        base.mkdir(parents=True, exist_ok=True)
+        worker_dir.mkdir(mode=0o700, exist_ok=True)
+        st = worker_dir.lstat()
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return worker_dir
+
+
+def _worker_state(worker_dir: Path) -> dict | None:
+    try:
+        state = json.loads((worker_dir / "state.json").read_text())
+        os.kill(state["supervisor"], 0)
+        os.kill(state["pid"], 0)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return state
+
+
+def _start_worker(worker_dir: Path) -> dict | None:
+    (worker_dir / "state.json").unlink(missing_ok=True)
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--serve-worker"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + WORKER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        state = _worker_state(worker_dir)
+        if state:
+            return state
+        time.sleep(0.1)
+    return None
+
+
+def _connect_worker(uno, state: dict, worker_dir: Path):
+    local = uno.getComponentContext()
+    resolver = local.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", local
+    )
+    url = f"uno:{state['accept']};urp;StarOffice.ComponentContext"
+    deadline = time.monotonic() + WORKER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            return resolver.resolve(url)
+        except Exception:
+            if _worker_state(worker_dir) is None:
+                return None
+            time.sleep(0.25)
+    return None
+
+
+def _run_worker_job(uno, context, job, path, timeout, state):
+    outcome: list[BaseException | None] = []
+
+    def run():
+        document = None
+        try:
+            desktop = context.ServiceManager.createInstanceWithContext(
+                "com.sun.star.frame.Desktop", context
+            )
+            hidden = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+            hidden.Name, hidden.Value = "Hidden", True
+            document = desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(path), "_blank", 0, (hidden,)
+            )
+            if document is None:
+                raise RuntimeError(f"LibreOffice could not open {path}")
+            job(document, context)
+            document.store()
+            outcome.append(None)
+        except Exception as e:
+            outcome.append(e)
+        finally:
+            if document is not None:
+                with contextlib.suppress(Exception):
+                    document.close(True)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        # A hung soffice can't be interrupted over UNO; kill it and let the
+        # next job start a fresh one.
+        with contextlib.suppress(OSError):
+            os.kill(state["pid"], signal.SIGKILL)
+        return TimeoutError(f"LibreOffice took longer than {timeout}s on {path}")
+    return outcome[0]
+
+
+def _serve_worker() -> None:
+    worker_dir = _worker_dir()
+    if worker_dir is None:
+        return
+    # A named pipe is private to this user; UNO has no authentication, so
+    # the worker never listens on a TCP port.
+    accept = f"pipe,name=lo_worker_{os.getuid()}_{os.getpid()}"
+    profile = worker_dir / "profile"
+    # Only the worker uses this profile, and jobs.lock lets one start at a
+    # time, so a lock file left here belongs to a soffice that was killed.
+    (profile / ".lock").unlink(missing_ok=True)
+    with open(worker_dir / "soffice.log", "ab") as log:
+        proc = subprocess.Popen(
+            [
+                "soffice",
+                "--headless",
+                "--invisible",
+                "--nodefault",
+                "--norestore",
+                f"-env:UserInstallation={profile.as_uri()}",
+                f"--accept={accept};urp;StarOffice.ComponentContext",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            env=get_soffice_env(),
+        )
+    state_file = worker_dir / "state.json"
+    tmp = state_file.with_suffix(f".{os.getpid()}")
+    tmp.write_text(
+        json.dumps({"supervisor": os.getpid(), "pid": proc.pid, "accept": accept})
+    )
+    os.replace(tmp, state_file)
+    started = time.time()
+
+    try:
+        while True:
+            try:
+                proc.wait(timeout=_WORKER_POLL)
+                return
+            except subprocess.TimeoutExpired:
+                pass
+            try:
+                last_used = (worker_dir / "last_used").stat().st_mtime
+            except OSError:
+                last_used = 0
+            if time.time() - max(started, last_used) < WORKER_IDLE_TIMEOUT:
+                continue
+            with open(worker_dir / "jobs.lock", "a") as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue
+                state_file.unlink(missing_ok=True)
+                proc.terminate()
+                try:
+                    proc.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                return
+    finally:
+        with contextlib.suppress(OSError, ValueError):
+            if json.loads(state_file.read_text()).get("supervisor") == os.getpid():
+                state_file.unlink()
+
+
 
 _SHIM_SO = Path(tempfile.gettempdir()) / "lo_socket_shim.so"
 
@@ -187,6 +451,8 @@ int close(int fd) {
 
 
 if __name__ == "__main__":
-    import sys
+    if sys.argv[1:] == ["--serve-worker"]:
+        _serve_worker()
+        sys.exit(0)
     result = run_soffice(sys.argv[1:])
     sys.exit(result.returncode)
@@ -2,7 +2,7 @@
 Command line tool to validate Office document XML files against XSD schemas and tracked changes.
 
 Usage:
-    python validate.py <path> [--original <original_file>] [--auto-repair] [--author NAME]
+    python validate.py <path> [--original <original_file>] [--auto-repair] [--author NAME] [--jobs N]
 
 The first argument can be either:
 - An unpacked directory containing the Office document XML files
@@ -69,6 +69,14 @@ def main():
         help="Automatically repair common issues (hex IDs, whitespace preservation). "
         "Modifies the input in place: repairs to a packed file are written back to it.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Validate parts against the XSD schemas in N worker processes "
+        "(0: one per CPU core). Worth it for large decks and documents.",
+    )
     parser.add_argument(
         "--author",
         default=None,
@@ -83,6 +91,8 @@ def main():
 
     if args.author is not None and not args.original:
         _fail("--author requires --original")
+    if args.jobs < 0:
+        _fail("--jobs must be 0 or more")
 
     path = Path(args.path)
     if not path.exists():
@@ -124,7 +134,9 @@ def main():
     match family:
         case "docx":
             validators = [
-                DOCXSchemaValidator(unpacked_dir, original_file, verbose=args.verbose),
+                DOCXSchemaValidator(
+                    unpacked_dir, original_file, verbose=args.verbose, jobs=args.jobs
+                ),
             ]
             if args.author is not None:
                 validators.append(
@@ -137,7 +149,9 @@ def main():
                 )
         case "pptx":
             validators = [
-                PPTXSchemaValidator(unpacked_dir, original_file, verbose=args.verbose),
+                PPTXSchemaValidator(
+                    unpacked_dir, original_file, verbose=args.verbose, jobs=args.jobs
+                ),
             ]
         case "xlsx":
             exts = ", ".join(k for k, v in sorted(OOXML_FAMILY.items()) if v == "xlsx")
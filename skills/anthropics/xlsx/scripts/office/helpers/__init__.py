@@ -82,6 +82,19 @@ def safe_extract(zf: zipfile.ZipFile, dest: Path) -> None:
         zf.extract(m, dest)
 
 
+def safe_members(zf: zipfile.ZipFile) -> dict[str, zipfile.ZipInfo]:
+    members = {}
+    for m in zf.infolist():
+        if stat.S_ISLNK(m.external_attr >> 16):
+            raise ValueError(f"symlink archive entry not allowed: {m.filename!r}")
+        name = posixpath.normpath(m.filename)
+        if name == ".." or name.startswith(("/", "../")):
+            raise ValueError(f"unsafe archive entry: {m.filename!r}")
+        if not m.is_dir():
+            members[name] = m
+    return members
+
+
 def rezip(src_dir: Path, out_path: Path) -> None:
     files = sorted(p for p in src_dir.rglob("*") if p.is_file())
     ct = src_dir / "[Content_Types].xml"
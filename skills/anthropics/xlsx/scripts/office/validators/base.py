@@ -2,15 +2,30 @@
 Base validator with common validation logic for document files.
 """
 
+import copy
+import hashlib
+import io
+import json
+import os
 import re
+import sqlite3
+import stat
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
 import defusedxml.minidom
-from functools import lru_cache
+from functools import lru_cache, partial
 
 import lxml.etree
 
-from helpers import safe_extract
+from helpers import safe_members
+
+VERDICT_CACHE_ENV = "OFFICE_VALIDATOR_CACHE"
+VERDICT_CACHE_MAX_ENTRIES = 50000
+VERDICT_CACHE_TOUCH_INTERVAL = 3600
 
 
 @lru_cache(maxsize=None)
@@ -21,6 +36,117 @@ def _load_schema(schema_path: str):
         )
     return lxml.etree.XMLSchema(xsd_doc)
 
+
+# A compiled XMLSchema is a libxml2 structure that can't be pickled or written
+# out, so the on-disk cache one level up holds what the schema was compiled
+# for: each part's verdict, keyed by the part's bytes. A re-run over parts
+# that haven't changed never compiles a schema at all.
+
+
+@lru_cache(maxsize=None)
+def _validator_signature(schemas_dir: str) -> str:
+    digest = hashlib.sha256()
+    sources = list(Path(__file__).parent.glob("*.py")) + list(
+        Path(schemas_dir).rglob("*.xsd")
+    )
+    for path in sorted(sources):
+        st = path.stat()
+        digest.update(f"{path}:{st.st_mtime_ns}:{st.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def _verdict_cache_dir():
+    # A cached verdict skips schema validation, so the cache lives in the
+    # user's own cache dir and is only used while nobody else can write it.
+    base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    cache_dir = base / "office-validators"
+    base.mkdir(parents=True, exist_ok=True)
+    cache_dir.mkdir(mode=0o700, exist_ok=True)
+    st = cache_dir.lstat()
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        return None
+    return cache_dir
+
+
+@lru_cache(maxsize=None)
+def _open_verdict_cache():
+    if os.environ.get(VERDICT_CACHE_ENV, "1") == "0":
+        return None
+    try:
+        cache_dir = _verdict_cache_dir()
+        if cache_dir is None:
+            return None
+        conn = sqlite3.connect(
+            str(cache_dir / "xsd-verdicts.db"), timeout=1, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS verdicts ("
+            "key TEXT PRIMARY KEY, verdict TEXT NOT NULL, used REAL NOT NULL)"
+        )
+        with conn:
+            conn.execute(
+                "DELETE FROM verdicts WHERE key IN (SELECT key FROM verdicts "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (VERDICT_CACHE_MAX_ENTRIES,),
+            )
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def _cached_verdict(key):
+    conn = _open_verdict_cache()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(
+            "SELECT verdict, used FROM verdicts WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > VERDICT_CACHE_TOUCH_INTERVAL:
+            with conn:
+                conn.execute(
+                    "UPDATE verdicts SET used = ? WHERE key = ?", (now, key)
+                )
+    except sqlite3.Error:
+        return None
+    is_valid, errors = json.loads(row[0])
+    return is_valid, set(errors)
+
+
+def _store_verdict(key, is_valid, errors):
+    conn = _open_verdict_cache()
+    if conn is None:
+        return
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?)",
+                (key, json.dumps([is_valid, sorted(errors)]), time.time()),
+            )
+    except sqlite3.Error:
+        pass
+
+
+# Process-pool mode: every worker builds its own validator (and so its own
+# part caches, original zip and compiled schemas) for the same package.
+_worker_validator = None
+
+
+def _init_worker(validator_class, unpacked_dir, original_file):
+    global _worker_validator
+    # A sqlite connection must not cross a fork.
+    _open_verdict_cache.cache_clear()
+    _worker_validator = validator_class(unpacked_dir, original_file)
+
+
+def _run_in_worker(method, args, part):
+    return getattr(_worker_validator, method)(part, *args)
+
+
 class BaseSchemaValidator:
 
     IGNORED_VALIDATION_ERRORS = [
@@ -103,10 +229,11 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file=None, verbose=False):
+    def __init__(self, unpacked_dir, original_file=None, verbose=False, jobs=1):
         self.unpacked_dir = Path(unpacked_dir).resolve()
         self.original_file = Path(original_file) if original_file else None
         self.verbose = verbose
+        self.jobs = jobs or os.cpu_count() or 1
 
         self.schemas_dir = Path(__file__).parent.parent / "schemas"
 
@@ -118,6 +245,99 @@ class BaseSchemaValidator:
         if not self.xml_files:
             print(f"Warning: No XML files found in {self.unpacked_dir}")
 
+        self._part_bytes_cache = {}
+        self._part_tree_cache = {}
+
+        self._original_zip = None
+        self._original_members_cache = None
+        self._original_errors = {}
+
+    def _part_bytes(self, path):
+        path = Path(path)
+        if path not in self._part_bytes_cache:
+            self._part_bytes_cache[path] = path.read_bytes()
+        return self._part_bytes_cache[path]
+
+    def _part_text(self, path):
+        # Same text Path.read_text gives: universal newlines.
+        content = self._part_bytes(path).decode("utf-8")
+        return content.replace("\r\n", "\n").replace("\r", "\n")
+
+    def _parse_part(self, path):
+        """Parsed tree of a part, read and parsed once per validator and
+        shared by every pass. Don't modify it; use _parse_part_copy."""
+        path = Path(path)
+        tree = self._part_tree_cache.get(path)
+        if tree is None:
+            try:
+                tree = lxml.etree.parse(
+                    io.BytesIO(self._part_bytes(path)), base_url=str(path)
+                )
+            except Exception as e:
+                tree = e
+            self._part_tree_cache[path] = tree
+        if isinstance(tree, Exception):
+            raise tree.with_traceback(None)
+        return tree
+
+    def _parse_part_copy(self, path):
+        return copy.deepcopy(self._parse_part(path))
+
+    def _forget_part(self, path):
+        path = Path(path)
+        self._part_bytes_cache.pop(path, None)
+        self._part_tree_cache.pop(path, None)
+
+    def _map_parts(self, method, parts, *args):
+        """[getattr(self, method)(part, *args) for part in parts], sharded
+        across a process pool when self.jobs > 1. Results keep the order
+        of parts whichever worker produced them."""
+        parts = list(parts)
+        workers = min(self.jobs, len(parts))
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=(type(self), self.unpacked_dir, self.original_file),
+                ) as pool:
+                    return list(
+                        pool.map(
+                            partial(_run_in_worker, method, args),
+                            parts,
+                            chunksize=max(1, len(parts) // (workers * 4)),
+                        )
+                    )
+            except (BrokenProcessPool, OSError):
+                pass
+        return [getattr(self, method)(part, *args) for part in parts]
+
+    def _original_members(self):
+        if self._original_members_cache is None:
+            self._original_members_cache = {}
+            if self.original_file is not None:
+                try:
+                    self._original_zip = zipfile.ZipFile(self.original_file, "r")
+                    self._original_members_cache = safe_members(self._original_zip)
+                except (zipfile.BadZipFile, ValueError, OSError):
+                    self._original_members_cache = {}
+        return self._original_members_cache
+
+    def _original_part_bytes(self, relative_path):
+        """Bytes of a part of the original package, read straight from the
+        zip, or None if the original has no such part."""
+        info = self._original_members().get(Path(relative_path).as_posix())
+        if info is None:
+            return None
+        return self._original_zip.read(info)
+
+    def close(self):
+        """Close the original package's zip. Reading from it again reopens it."""
+        if self._original_zip is not None:
+            self._original_zip.close()
+            self._original_zip = None
+        self._original_members_cache = None
+
     def validate(self):
         raise NotImplementedError("Subclasses must implement the validate method")
 
@@ -129,7 +349,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                content = xml_file.read_text(encoding="utf-8")
+                content = self._part_text(xml_file)
                 dom = defusedxml.minidom.parseString(content)
                 pending = []  
 
@@ -149,6 +369,7 @@ class BaseSchemaValidator:
                                 pending.append(f"  Repaired: {xml_file.name}: Added xml:space='preserve' to {elem.tagName}: {text_preview}")
 
                 if pending:
+                    self._forget_part(xml_file)
                     xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
                     for message in pending:
                         print(message)
@@ -164,7 +385,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                lxml.etree.parse(str(xml_file))
+                self._parse_part(xml_file)
             except lxml.etree.XMLSyntaxError as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: "
@@ -191,7 +412,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_part(xml_file).getroot()
                 declared = set(root.nsmap.keys()) - {None}  
 
                 for attr_val in [
@@ -221,12 +442,18 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_part(xml_file).getroot()
                 file_ids = {}  
 
                 mc_elements = root.xpath(
                     ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
                 )
+                if mc_elements:
+                    root = self._parse_part_copy(xml_file).getroot()
+                    mc_elements = root.xpath(
+                        ".//mc:AlternateContent",
+                        namespaces={"mc": self.MC_NAMESPACE},
+                    )
                 for elem in mc_elements:
                     elem.getparent().remove(elem)
 
@@ -335,7 +562,7 @@ class BaseSchemaValidator:
 
         for rels_file in rels_files:
             try:
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self._parse_part(rels_file).getroot()
 
                 rels_dir = rels_file.parent
 
@@ -406,8 +633,6 @@ class BaseSchemaValidator:
             return True
 
     def validate_all_relationship_ids(self):
-        import lxml.etree
-
         errors = []
 
         for xml_file in self.xml_files:
@@ -421,7 +646,7 @@ class BaseSchemaValidator:
                 continue
 
             try:
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self._parse_part(rels_file).getroot()
                 rid_to_type = {}
 
                 for rel in rels_root.findall(
@@ -441,7 +666,7 @@ class BaseSchemaValidator:
                         )
                         rid_to_type[rid] = type_name
 
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
+                xml_root = self._parse_part(xml_file).getroot()
 
                 r_ns = self.OFFICE_RELATIONSHIPS_NAMESPACE
                 rid_attrs_to_check = ["id", "embed", "link"]
@@ -523,7 +748,7 @@ class BaseSchemaValidator:
             return False
 
         try:
-            root = lxml.etree.parse(str(content_types_file)).getroot()
+            root = self._parse_part(content_types_file).getroot()
             declared_parts = set()
             declared_extensions = set()
 
@@ -578,7 +803,7 @@ class BaseSchemaValidator:
                     continue
 
                 try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
+                    root_tag = self._parse_part(xml_file).getroot().tag
                     root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
 
                     if root_name in declarable_roots and path_str not in declared_parts:
@@ -647,7 +872,7 @@ class BaseSchemaValidator:
             if verbose:
                 relative_path = xml_file.relative_to(unpacked_dir)
                 print(f"FAILED - {relative_path}: {len(new_errors)} new error(s)")
-                for error in list(new_errors)[:3]:
+                for error in sorted(new_errors)[:3]:
                     truncated = error[:250] + "..." if len(error) > 250 else error
                     print(f"  - {truncated}")
             return False, new_errors
@@ -664,11 +889,9 @@ class BaseSchemaValidator:
         valid_count = 0
         skipped_count = 0
 
-        for xml_file in self.xml_files:
+        results = self._map_parts("validate_file_against_xsd", self.xml_files)
+        for xml_file, (is_valid, new_file_errors) in zip(self.xml_files, results):
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
 
             if is_valid is None:
                 skipped_count += 1
@@ -682,7 +905,7 @@ class BaseSchemaValidator:
                 continue
 
             new_errors.append(f"  {relative_path}: {len(new_file_errors)} new error(s)")
-            for error in list(new_file_errors)[:3]:  
+            for error in sorted(new_file_errors)[:3]:  
                 new_errors.append(
                     f"    - {error[:250]}..." if len(error) > 250 else f"    - {error}"
                 )
@@ -775,69 +998,108 @@ class BaseSchemaValidator:
     def _preprocess_for_schema(self, xml_doc, relative_path):
         return xml_doc
 
+    def _verdict_key(self, xml_content, relative_path, schema_path):
+        digest = hashlib.sha256(xml_content).hexdigest()
+        parts = [
+            _validator_signature(str(self.schemas_dir)),
+            f"{type(self).__module__}.{type(self).__qualname__}",
+            Path(schema_path).as_posix(),
+            Path(relative_path).as_posix(),
+            digest,
+        ]
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
     def _validate_single_file_xsd(self, xml_file, base_path, schema_path=None):
         schema_path = schema_path or self._get_schema_path(xml_file)
         if not schema_path:
             return None, None  
 
         try:
-            schema = _load_schema(str(schema_path))
-
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
-
-            xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
-            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
-
+            xml_content = self._part_bytes(xml_file)
             relative_path = xml_file.relative_to(base_path)
-            if (
-                relative_path.parts
-                and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
-            ):
-                xml_doc = self._clean_ignorable_namespaces(xml_doc)
+        except (OSError, ValueError) as e:
+            return False, {str(e)}
 
-            xml_doc = self._preprocess_for_schema(xml_doc, relative_path)
+        return self._validate_content_xsd(
+            xml_content,
+            relative_path,
+            schema_path,
+            lambda: self._parse_part(xml_file),
+        )
 
-            if schema.validate(xml_doc):
-                return True, set()
-            else:
-                errors = set()
-                for error in schema.error_log:
-                    errors.add(error.message)
-                return False, errors
+    def _validate_original_part_xsd(self, relative_path, schema_path):
+        try:
+            xml_content = self._original_part_bytes(relative_path)
+        except (zipfile.BadZipFile, OSError):
+            return None, None
+        if xml_content is None:
+            return None, None
+
+        relative_path = Path(relative_path)
+        return self._validate_content_xsd(
+            xml_content,
+            relative_path,
+            schema_path,
+            lambda: lxml.etree.parse(
+                io.BytesIO(xml_content), base_url=relative_path.as_posix()
+            ),
+        )
+
+    def _validate_content_xsd(self, xml_content, relative_path, schema_path, parse):
+        key = self._verdict_key(xml_content, relative_path, schema_path)
+        cached = _cached_verdict(key)
+        if cached is not None:
+            return cached
 
+        try:
+            is_valid, errors = self._validate_tree_xsd(
+                parse(), relative_path, schema_path
+            )
         except Exception as e:
             return False, {str(e)}
+        _store_verdict(key, is_valid, errors)
+        return is_valid, errors
+
+    def _validate_tree_xsd(self, xml_doc, relative_path, schema_path):
+        schema = _load_schema(str(schema_path))
+
+        xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
+        xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
+
+        if (
+            relative_path.parts
+            and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
+        ):
+            xml_doc = self._clean_ignorable_namespaces(xml_doc)
+
+        xml_doc = self._preprocess_for_schema(xml_doc, relative_path)
+
+        if schema.validate(xml_doc):
+            return True, set()
+        else:
+            errors = set()
+            for error in schema.error_log:
+                errors.add(error.message)
+            return False, errors
 
     def _get_original_file_errors(self, xml_file, schema_path=None):
         if self.original_file is None:
             return set()
 
-        import tempfile
-        import zipfile
-
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
+        schema_path = schema_path or self._get_schema_path(xml_file)
+        if not schema_path:
+            return set()
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            try:
-                with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                    safe_extract(zip_ref, temp_path)
-            except (zipfile.BadZipFile, ValueError, OSError):
-                return set()
-
-            original_xml_file = temp_path / relative_path
-
-            if not original_xml_file.exists():
-                return set()
-
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path, schema_path=schema_path
+        key = (relative_path.as_posix(), str(schema_path))
+        if key not in self._original_errors:
+            is_valid, errors = self._validate_original_part_xsd(
+                relative_path, schema_path
             )
-            return errors if errors else set()
+            self._original_errors[key] = errors if errors else set()
+        return self._original_errors[key]
 
     def _remove_template_tags_from_text_nodes(self, xml_doc):
         warnings = []
@@ -2,17 +2,13 @@
 Validator for Word document XML files against XSD schemas.
 """
 
+import io
 import random
 import re
-import tempfile
-import zipfile
-from pathlib import Path
 
 import defusedxml.minidom
 import lxml.etree
 
-from helpers import safe_extract
-
 from .base import BaseSchemaValidator
 
 
@@ -25,46 +21,49 @@ class DOCXSchemaValidator(BaseSchemaValidator):
     ELEMENT_RELATIONSHIP_TYPES = {}
 
     def validate(self):
-        if not self.validate_xml():
-            return False
+        try:
+            if not self.validate_xml():
+                return False
 
-        all_valid = True
-        if not self.validate_namespaces():
-            all_valid = False
+            all_valid = True
+            if not self.validate_namespaces():
+                all_valid = False
 
-        if not self.validate_unique_ids():
-            all_valid = False
+            if not self.validate_unique_ids():
+                all_valid = False
 
-        if not self.validate_file_references():
-            all_valid = False
+            if not self.validate_file_references():
+                all_valid = False
 
-        if not self.validate_content_types():
-            all_valid = False
+            if not self.validate_content_types():
+                all_valid = False
 
-        if not self.validate_against_xsd():
-            all_valid = False
+            if not self.validate_against_xsd():
+                all_valid = False
 
-        if not self.validate_whitespace_preservation():
-            all_valid = False
+            if not self.validate_whitespace_preservation():
+                all_valid = False
 
-        if not self.validate_deletions():
-            all_valid = False
+            if not self.validate_deletions():
+                all_valid = False
 
-        if not self.validate_insertions():
-            all_valid = False
+            if not self.validate_insertions():
+                all_valid = False
 
-        if not self.validate_all_relationship_ids():
-            all_valid = False
+            if not self.validate_all_relationship_ids():
+                all_valid = False
 
-        if not self.validate_id_constraints():
-            all_valid = False
+            if not self.validate_id_constraints():
+                all_valid = False
 
-        if not self.validate_comment_markers():
-            all_valid = False
+            if not self.validate_comment_markers():
+                all_valid = False
 
-        self.compare_paragraph_counts()
+            self.compare_paragraph_counts()
 
-        return all_valid
+            return all_valid
+        finally:
+            self.close()
 
     def validate_whitespace_preservation(self):
         errors = []
@@ -74,7 +73,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_part(xml_file).getroot()
 
                 for elem in root.iter(f"{{{self.WORD_2006_NAMESPACE}}}t"):
                     if elem.text:
@@ -120,7 +119,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_part(xml_file).getroot()
                 namespaces = {"w": self.WORD_2006_NAMESPACE}
 
                 for t_elem in root.xpath(".//w:del//w:t", namespaces=namespaces):
@@ -171,7 +170,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_part(xml_file).getroot()
                 paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
                 count = len(paragraphs)
             except Exception as e:
@@ -187,15 +186,13 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         count = 0
 
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                with zipfile.ZipFile(original, "r") as zip_ref:
-                    safe_extract(zip_ref, Path(temp_dir))
+            xml_content = self._original_part_bytes("word/document.xml")
+            if xml_content is None:
+                raise FileNotFoundError(f"word/document.xml not found in {original}")
+            root = lxml.etree.parse(io.BytesIO(xml_content)).getroot()
 
-                doc_xml_path = temp_dir + "/word/document.xml"
-                root = lxml.etree.parse(doc_xml_path).getroot()
-
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+            paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
+            count = len(paragraphs)
 
         except Exception as e:
             print(f"Error counting paragraphs in original document: {e}")
@@ -210,7 +207,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_part(xml_file).getroot()
                 namespaces = {"w": self.WORD_2006_NAMESPACE}
 
                 invalid_elements = root.xpath(
@@ -264,7 +261,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
 
         for xml_file in self.xml_files:
             try:
-                for elem in lxml.etree.parse(str(xml_file)).iter():
+                for elem in self._parse_part(xml_file).iter():
                     if val := elem.get(para_id_attr):
                         try:
                             if self._parse_id_value(val, base=16) >= 0x80000000:
@@ -330,7 +327,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             return True
 
         try:
-            doc_root = lxml.etree.parse(str(document_xml)).getroot()
+            doc_root = self._parse_part(document_xml).getroot()
             namespaces = {"w": self.WORD_2006_NAMESPACE}
 
             range_starts = {
@@ -370,7 +367,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
 
             comment_ids = set()
             if comments_xml and comments_xml.exists():
-                comments_root = lxml.etree.parse(str(comments_xml)).getroot()
+                comments_root = self._parse_part(comments_xml).getroot()
                 comment_ids = {
                     elem.get(f"{{{self.WORD_2006_NAMESPACE}}}id")
                     for elem in comments_root.xpath(
@@ -413,7 +410,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
 
         for xml_file in self.xml_files:
             try:
-                content = xml_file.read_text(encoding="utf-8")
+                content = self._part_text(xml_file)
                 dom = defusedxml.minidom.parseString(content)
                 is_numbering = xml_file.name == "numbering.xml"
                 base = 10 if is_numbering else 16
@@ -451,6 +448,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                             modified = True
 
                 if modified:
+                    self._forget_part(xml_file)
                     xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
                     for message in pending:
                         print(message)
@@ -3,9 +3,8 @@ Validator for PowerPoint presentation XML files against XSD schemas.
 """
 
 import re
-from pathlib import Path
 
-from helpers import opc_target, rels_source_part, safe_extract
+from helpers import opc_target, rels_source_part
 
 from .base import BaseSchemaValidator
 
@@ -26,50 +25,53 @@ class PPTXSchemaValidator(BaseSchemaValidator):
     }
 
     def validate(self):
-        if not self.validate_xml():
-            return False
+        try:
+            if not self.validate_xml():
+                return False
 
-        all_valid = True
-        if not self.validate_namespaces():
-            all_valid = False
+            all_valid = True
+            if not self.validate_namespaces():
+                all_valid = False
 
-        if not self.validate_unique_ids():
-            all_valid = False
+            if not self.validate_unique_ids():
+                all_valid = False
 
-        if not self.validate_uuid_ids():
-            all_valid = False
+            if not self.validate_uuid_ids():
+                all_valid = False
 
-        if not self.validate_file_references():
-            all_valid = False
+            if not self.validate_file_references():
+                all_valid = False
 
-        if not self.validate_slide_layout_ids():
-            all_valid = False
+            if not self.validate_slide_layout_ids():
+                all_valid = False
 
-        if not self.validate_content_types():
-            all_valid = False
+            if not self.validate_content_types():
+                all_valid = False
 
-        if not self.validate_against_xsd():
-            all_valid = False
+            if not self.validate_against_xsd():
+                all_valid = False
 
-        if not self.validate_notes_slide_references():
-            all_valid = False
+            if not self.validate_notes_slide_references():
+                all_valid = False
 
-        if not self.validate_all_relationship_ids():
-            all_valid = False
+            if not self.validate_all_relationship_ids():
+                all_valid = False
 
-        if not self.validate_no_duplicate_slide_layouts():
-            all_valid = False
+            if not self.validate_no_duplicate_slide_layouts():
+                all_valid = False
 
-        if not self.validate_master_theme_uniqueness():
-            all_valid = False
+            if not self.validate_master_theme_uniqueness():
+                all_valid = False
 
-        if not self.validate_charts():
-            all_valid = False
+            if not self.validate_charts():
+                all_valid = False
 
-        if not self.validate_slides():
-            all_valid = False
+            if not self.validate_slides():
+                all_valid = False
 
-        return all_valid
+            return all_valid
+        finally:
+            self.close()
 
     def _package_map(self) -> dict:
         wanted = []
@@ -82,7 +84,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
             wanted += list(self.unpacked_dir.glob(f"ppt/{group}/*.xml"))
             wanted += list(self.unpacked_dir.glob(f"ppt/{group}/_rels/*.rels"))
         return {
-            p.relative_to(self.unpacked_dir).as_posix(): p.read_bytes()
+            p.relative_to(self.unpacked_dir).as_posix(): self._part_bytes(p)
             for p in wanted
             if p.is_file()
         }
@@ -121,33 +123,22 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         return True
 
     def _original_slide_defects(self, schema) -> set[str]:
-        import tempfile
-        import zipfile
-
         from helpers.pptx_slide import SLIDE_PART_RE, fatal_slide_errors
 
         if self.original_file is None:
             return set()
 
+        slides = [
+            relative
+            for relative in sorted(self._original_members())
+            if SLIDE_PART_RE.fullmatch(relative)
+        ]
         found: set[str] = set()
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            try:
-                with zipfile.ZipFile(self.original_file, "r") as zf:
-                    safe_extract(zf, temp_path)
-            except (zipfile.BadZipFile, ValueError, OSError):
-                return set()  
-
-            for part in sorted(temp_path.rglob("*.xml")):
-                relative = part.relative_to(temp_path).as_posix()
-                if not SLIDE_PART_RE.fullmatch(relative):
-                    continue
-                ok, errors = self._validate_single_file_xsd(
-                    part.resolve(), temp_path.resolve(), schema_path=schema
-                )
-                if ok is None or ok or not errors:
-                    continue
-                found |= set(fatal_slide_errors(set(errors)))
+        results = self._map_parts("_validate_original_part_xsd", slides, schema)
+        for ok, errors in results:
+            if ok is None or ok or not errors:
+                continue
+            found |= set(fatal_slide_errors(set(errors)))
         return found
 
     def validate_slides(self):
@@ -158,17 +149,22 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         )
 
         schema = self.schemas_dir / self.SCHEMA_MAPPINGS["ppt"]
-        inherited = self._original_slide_defects(schema)
+        inherited = None
         problems: list[str] = []
         broken: list[str] = []
 
-        for xml_file in self.xml_files:
-            relative = xml_file.relative_to(self.unpacked_dir).as_posix()
-            if not SLIDE_PART_RE.fullmatch(relative):
-                continue
-            ok, errors = self._validate_single_file_xsd(
-                xml_file.resolve(), self.unpacked_dir.resolve(), schema_path=schema
+        slides = [
+            xml_file.resolve()
+            for xml_file in self.xml_files
+            if SLIDE_PART_RE.fullmatch(
+                xml_file.relative_to(self.unpacked_dir).as_posix()
             )
+        ]
+        results = self._map_parts(
+            "_validate_single_file_xsd", slides, self.unpacked_dir.resolve(), schema
+        )
+        for xml_file, (ok, errors) in zip(slides, results):
+            relative = xml_file.relative_to(self.unpacked_dir).as_posix()
             if ok is None or not errors:
                 continue
 
@@ -180,6 +176,8 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                 continue
 
             for message in fatal_slide_errors(set(errors)):
+                if inherited is None:
+                    inherited = self._original_slide_defects(schema)
                 if message in inherited:
                     continue  
                 problems.append(f"{relative}: {message}")
@@ -235,7 +233,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse_part(xml_file).getroot()
 
                 for elem in root.iter():
                     for attr, value in elem.attrib.items():
@@ -281,7 +279,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for slide_master in slide_masters:
             try:
-                root = lxml.etree.parse(str(slide_master)).getroot()
+                root = self._parse_part(slide_master).getroot()
 
                 rels_file = slide_master.parent / "_rels" / f"{slide_master.name}.rels"
 
@@ -292,7 +290,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                     )
                     continue
 
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self._parse_part(rels_file).getroot()
 
                 valid_layout_rids = set()
                 for rel in rels_root.findall(
@@ -336,14 +334,12 @@ class PPTXSchemaValidator(BaseSchemaValidator):
             return True
 
     def validate_no_duplicate_slide_layouts(self):
-        import lxml.etree
-
         errors = []
         slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
+                root = self._parse_part(rels_file).getroot()
 
                 layout_rels = [
                     rel
@@ -388,7 +384,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
+                root = self._parse_part(rels_file).getroot()
 
                 for rel in root.findall(
                     f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
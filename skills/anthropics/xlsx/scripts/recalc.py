@@ -16,7 +16,7 @@ import time
 import zipfile
 from pathlib import Path
 
-from office.soffice import get_soffice_env, run_soffice
+from office.soffice import get_soffice_env, run_soffice, run_worker_jobs
 
 from openpyxl import load_workbook
 
@@ -122,6 +122,20 @@ def external_links_at_risk(filename):
 
 
 def recalc(filename, timeout=30, force=False):
+    return recalc_many([filename], timeout, force=force)[0]
+
+
+def recalc_many(filenames, timeout=30, force=False):
+    results = [_precheck(filename, force) for filename in filenames]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        batch = [(filenames[i], str(Path(filenames[i]).absolute())) for i in pending]
+        for i, result in zip(pending, _recalc_batch(batch, timeout)):
+            results[i] = result
+    return results
+
+
+def _precheck(filename, force):
     if not Path(filename).exists():
         return {"error": f"File {filename} does not exist"}
 
@@ -155,20 +169,59 @@ def recalc(filename, timeout=30, force=False):
                 "external_link_cells_truncated": max(0, len(at_risk) - len(shown)),
             }
 
-    with tempfile.TemporaryDirectory(
-        prefix="recalc-lo-profile-", ignore_cleanup_errors=True
-    ) as profile_dir:
-        return _recalc_with_profile(filename, abs_path, timeout, Path(profile_dir))
+    return None
+
+
+def _recalculate_document(document, context):
+    document.calculateAll()
+
+
+def _timed_out(timeout):
+    return {
+        "error": f"LibreOffice timed out after {timeout}s; formulas were NOT recalculated. Re-run with a longer timeout."
+    }
+
+
+def _recalc_batch(batch, timeout):
+    befores = [_stamp(abs_path) for _, abs_path in batch]
+    outcomes = run_worker_jobs(
+        _recalculate_document, [abs_path for _, abs_path in batch], timeout=timeout
+    )
+    if outcomes is None:
+        with tempfile.TemporaryDirectory(
+            prefix="recalc-lo-profile-", ignore_cleanup_errors=True
+        ) as profile_dir:
+            return _recalc_with_profile(batch, timeout, Path(profile_dir))
 
+    results = []
+    for (filename, abs_path), before, outcome in zip(batch, befores, outcomes):
+        if isinstance(outcome, TimeoutError):
+            results.append(_timed_out(timeout))
+        elif outcome is not None:
+            results.append({"error": f"LibreOffice failed to recalculate: {outcome}"})
+        else:
+            results.append(_check_recalculated(filename, abs_path, before))
+    return results
 
-def _recalc_with_profile(filename, abs_path, timeout, profile_dir: Path):
+
+def _recalc_with_profile(batch, timeout, profile_dir: Path):
     started = time.monotonic()
     profile_url, err = setup_libreoffice_macro(profile_dir, timeout=timeout)
     if err:
-        return {"error": err}
+        return [{"error": err} for _ in batch]
+
+    # The first file's budget pays for creating the profile; the profile is
+    # then reused for the rest of the batch.
+    first_timeout = max(5, int(timeout - (time.monotonic() - started)))
+    return [
+        _recalc_with_macro(
+            filename, abs_path, first_timeout if i == 0 else timeout, profile_url
+        )
+        for i, (filename, abs_path) in enumerate(batch)
+    ]
 
-    timeout = max(5, int(timeout - (time.monotonic() - started)))
 
+def _recalc_with_macro(filename, abs_path, timeout, profile_url):
     before = _stamp(abs_path)
 
     cmd = [
@@ -185,24 +238,26 @@ def _recalc_with_profile(filename, abs_path, timeout, profile_dir: Path):
     elif platform.system() == "Darwin" and has_gtimeout():
         cmd = ["gtimeout", str(timeout)] + cmd
 
-    timed_out = f"LibreOffice timed out after {timeout}s; formulas were NOT recalculated. Re-run with a longer timeout."
-
     try:
         result = subprocess.run(
             cmd, capture_output=True, text=True, env=get_soffice_env(), timeout=timeout + 15
         )
     except subprocess.TimeoutExpired:
-        return {"error": timed_out}
+        return _timed_out(timeout)
     except FileNotFoundError:
         return {"error": SOFFICE_MISSING}
 
     if result.returncode == 124:
-        return {"error": timed_out}
+        return _timed_out(timeout)
 
     if result.returncode != 0:
         detail = (result.stderr or "").strip() or f"soffice exited {result.returncode}"
         return {"error": f"LibreOffice failed to recalculate: {detail}"}
 
+    return _check_recalculated(filename, abs_path, before)
+
+
+def _check_recalculated(filename, abs_path, before):
     if _stamp(abs_path) == before:
         return {
             "error": (
@@ -284,7 +339,7 @@ def main():
     force = "--force" in sys.argv[1:]
 
     if not args:
-        print("Usage: python recalc.py <excel_file> [timeout_seconds] [--force]")
+        print("Usage: python recalc.py <excel_file> [more_excel_files...] [timeout_seconds] [--force]")
         print("\nRecalculates all formulas in an Excel file using LibreOffice")
         print("\nReturns JSON with error details:")
         print("  - status: 'success' or 'errors_found'")
@@ -294,14 +349,26 @@ def main():
         print("    - #VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A")
         print("\nOn any failure the JSON has an 'error' key and no 'status'.")
         print("--force recalculates even when it would destroy external links.")
+        print("\nWith several files the output is a list of those objects, each with a")
+        print("'file' key, and the exit code is non-zero if any of them has an 'error'.")
         sys.exit(1)
 
-    filename = args[0]
-    timeout = int(args[1]) if len(args) > 1 else 30
-
-    result = recalc(filename, timeout, force=force)
-    print(json.dumps(result, indent=2))
-    sys.exit(1 if "error" in result else 0)
+    timeout = 30
+    if len(args) > 1 and args[-1].isdigit():
+        timeout = int(args.pop())
+    filenames = args
+
+    results = recalc_many(filenames, timeout, force=force)
+    if len(filenames) == 1:
+        print(json.dumps(results[0], indent=2))
+    else:
+        print(
+            json.dumps(
+                [{"file": f, **result} for f, result in zip(filenames, results)],
+                indent=2,
+            )
+        )
+    sys.exit(1 if any("error" in result for result in results) else 0)
 
 
 if __name__ == "__main__":
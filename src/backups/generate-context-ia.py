@@ -8,7 +8,9 @@ import math
 import os
 import re  # Usar re padrão do Python
 import subprocess
+import sys
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 import enchant
 from dotenv import load_dotenv
@@ -55,6 +57,7 @@ DEFAULT_EXCLUDE = [
 ]
 
 DEFAULT_CONTENT_EXCLUDE = os.getenv("DEFAULT_CONTENT_EXCLUDE", "").split(",")
+READ_ERROR_PREFIX = "# ERRO ao ler arquivo"
 
 
 def remove_comments_from_code(code: str, filetype: str) -> str:
@@ -264,6 +267,11 @@ def should_exclude(file_path, exclude_dirs, exclude_files, include_dirs):
 
 
 def read_file(common_basepath, file, content_exclude, line_numbers=[]):
+    """
+    Lê, mascara segredos, remove comentários e formata um arquivo.
+    Retorna o bloco markdown (None para binários); não escreve no stdout,
+    para poder rodar em paralelo nos workers.
+    """
     filepath = file.replace(home_directory, "~")
     common_basepath = common_basepath.replace(home_directory, "~")
     try:
@@ -314,11 +322,43 @@ def read_file(common_basepath, file, content_exclude, line_numbers=[]):
         if ext in {"js", "ts", "go", "py", "html", "css"}:
             content = remove_comments_from_code(content, f".{ext}")
         content = remove_blank_lines(content)
-        result = f"### Arquivo: {filepath.replace(common_basepath, '')}\n````{ext}\n{content}\n````\n"
-        print(result)
+        return f"### Arquivo: {filepath.replace(common_basepath, '')}\n````{ext}\n{content}\n````\n"
 
     except Exception as e:
-        return f"# ERRO ao ler arquivo {filepath}: {e}\n"
+        return f"{READ_ERROR_PREFIX} {filepath}: {e}\n"
+
+
+def _read_file_task(task):
+    return read_file(*task)
+
+
+def dump_files(common_basepath, files, content_exclude, workers=8):
+    """
+    Processa (detecção de binário, mascaramento de segredos, remoção de
+    comentários, formatação) em um pool de processos e escreve cada bloco
+    no stdout assim que ele e todos os anteriores ficam prontos, mantendo
+    a ordem de `files` ([(arquivo, linhas)]).
+    """
+    tasks = [(common_basepath, file, content_exclude, lines) for file, lines in files]
+
+    def emit(results):
+        for result in results:
+            if result is None:
+                continue
+            if result.startswith(READ_ERROR_PREFIX):
+                sys.stderr.write(result)
+                continue
+            sys.stdout.write(result + "\n")
+            sys.stdout.flush()
+
+    if workers <= 1 or len(tasks) <= 1:
+        emit(map(_read_file_task, tasks))
+        return
+
+    # chunks pequenos: o primeiro arquivo sai logo e a ordem não segura memória demais
+    chunksize = max(1, min(32, len(tasks) // (workers * 8)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        emit(executor.map(_read_file_task, tasks, chunksize=chunksize))
 
 
 def remove_blank_lines(text: str) -> str:
@@ -394,7 +434,7 @@ def main():
         "--workers",
         type=int,
         default=8,
-        help="Número de threads simultâneas (padrão: 8)",
+        help="Número de processos simultâneos (padrão: 8; 1 = sequencial)",
     )
     parser.add_argument(
         "--list",
@@ -467,14 +507,14 @@ def main():
             directories=directories,
         )
         if args.text_full:
-            for file in data:
-                read_file(common_basepath, file, args.exclude_content, [])
+            files = [(file, []) for file in data]
         else:
-            for file in data:
-                read_file(common_basepath, file, args.exclude_content, data[file])
+            files = [(file, data[file]) for file in data]
     else:
-        for file in all_files:
-            read_file(common_basepath, file, args.exclude_content, [])
+        files = [(file, []) for file in all_files]
+
+    sys.stdout.flush()
+    dump_files(common_basepath, files, args.exclude_content, args.workers)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,15 @@
 import fnmatch
+import hashlib
+import heapq
+import math
 import os
 import re
+import sqlite3
 import subprocess
+import threading
+import time
+from collections import Counter
+from pathlib import Path
 
 import numpy as np
 from fastembed import TextEmbedding
@@ -49,6 +57,51 @@ DEFAULT_EXCLUDE = [
 ]
 
 
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+CODE_EXTENSIONS = (".py", ".ts", ".js", ".tsx", ".jsx", ".go", ".md", ".prisma")
+INDEX_DIR = Path(
+    os.environ.get("SEARCH_ENGINE_INDEX_DIR", Path.home() / ".cache" / "search-engine")
+)
+EMBED_BATCH_SIZE = 256
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_IDF_FLOOR = 0.01  # termos presentes em mais da metade dos chunks
+TOKENIZER_VERSION = "2"  # muda -> postings antigas são descartadas
+MIN_SUBSTRING_LEN = 3  # termos menores não casam por substring
+MAX_SUBSTRING_TERMS = 200
+SUBSTRING_WEIGHT = 0.5  # peso de "token" casando "tokenize" vs. casamento exato
+INLINE_UPDATE_FILES = 50  # acima disso a atualização roda em background
+
+
+# ===================================
+# 🧠 MODELO DE EMBEDDING (um por processo)
+# ===================================
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder() -> TextEmbedding:
+    """TextEmbedding compartilhado pelo processo, criado na primeira chamada.
+
+    Carregar o modelo ONNX custa segundos; criar um por consulta fazia cada
+    busca pagar esse custo de novo.
+    """
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = TextEmbedding(model_name=MODEL_NAME)
+    return _embedder
+
+
+def warm_up(base_dir=None) -> None:
+    """Carrega o modelo (e, se base_dir for dado, sincroniza o índice do repo)
+    antes da primeira consulta, ex.: no startup do servidor MCP."""
+    list(get_embedder().embed(["warm up"]))
+    if base_dir is not None:
+        update_in_background(base_dir)
+
+
 def ag_search(text="", rootProject="src", globs=["*.*"]):
     command_results = []
     data = {}
@@ -119,8 +172,7 @@ def should_exclude(path: str) -> bool:
     return False
 
 
-def collect_code_snippets(base_dir="src", max_chars_per_chunk=600):
-    snippets = []
+def iter_code_files(base_dir="src"):
     for root, _, files in os.walk(base_dir):
         if should_exclude(root):
             continue
@@ -131,26 +183,323 @@ def collect_code_snippets(base_dir="src", max_chars_per_chunk=600):
                 continue
 
             # filtrar extensões de código
-            if not fname.endswith(
-                (".py", ".ts", ".js", ".tsx", ".jsx", ".go", ".md", ".prisma")
-            ):
+            if not fname.endswith(CODE_EXTENSIONS):
                 continue
 
+            yield fpath
+
+
+def chunk_file(fpath: str, max_chars_per_chunk=600) -> list[str]:
+    try:
+        with open(fpath, "r", encoding="utf-8", errors="ignore") as f:
+            code = f.read()
+    except Exception:
+        return []
+
+    # quebrar em blocos
+    chunks = []
+    for chunk in re.split(r"\n\s*\n", code):
+        chunk = chunk.strip()
+        if len(chunk) > 0:
+            chunks.append(chunk[:max_chars_per_chunk])
+    return chunks
+
+
+def collect_code_snippets(base_dir="src", max_chars_per_chunk=600):
+    snippets = []
+    for fpath in iter_code_files(base_dir):
+        for chunk in chunk_file(fpath, max_chars_per_chunk):
+            snippets.append({"path": fpath, "code": chunk})
+    return snippets
+
+
+IDENT_RE = re.compile(r"[A-Za-z0-9_]+")
+SUBTOKEN_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Identificadores em minúsculas mais suas partes camelCase/snake_case,
+    ex.: getImage() -> getimage, get, image."""
+    tokens = []
+    for word in IDENT_RE.findall(text):
+        tokens.append(word.lower())
+        parts = SUBTOKEN_RE.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return tokens
+
+
+# ===================================
+# 🗂️ ÍNDICE PERSISTENTE POR REPOSITÓRIO
+# ===================================
+class CodeIndex:
+    """
+    Índice em disco (SQLite) dos chunks de um repositório: texto, postings
+    BM25 (termo -> chunk, tf) e embeddings L2-normalizados.
+
+    update() só re-indexa arquivos cujo (mtime, size) mudou e remove os que
+    sumiram; uma consulta embeda apenas a query e usa os vetores já gravados.
+    A conexão é protegida por self.lock; uma construção em background usa um
+    CodeIndex (e conexão) próprio.
+    """
+
+    def __init__(self, base_dir="src", index_dir: Path = INDEX_DIR):
+        self.base_dir = base_dir
+        key = hashlib.sha1(os.path.realpath(base_dir).encode()).hexdigest()[:16]
+        self.db_path = Path(index_dir) / key / "index.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(
+            str(self.db_path), timeout=30, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY, path TEXT NOT NULL, code TEXT NOT NULL,
+                length INTEGER NOT NULL, embedding BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_path ON chunks(path);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL, chunk_id INTEGER NOT NULL, tf INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS postings_term ON postings(term);
+            CREATE INDEX IF NOT EXISTS postings_chunk ON postings(chunk_id);
+            CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY);
+        """)
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if meta and (
+            meta.get("model") != MODEL_NAME
+            or meta.get("tokenizer") != TOKENIZER_VERSION
+        ):
+            # embeddings de outro modelo não são comparáveis e postings de
+            # outro tokenizador não casam com a query: recomeça do zero
+            self.conn.executescript(
+                "DELETE FROM postings; DELETE FROM terms; DELETE FROM chunks;"
+                "DELETE FROM files; DELETE FROM meta;"
+            )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("model", MODEL_NAME), ("tokenizer", TOKENIZER_VERSION)],
+        )
+        self.conn.commit()
+
+    def is_built(self) -> bool:
+        """True depois que um update() completo terminou ao menos uma vez."""
+        with self.lock:
+            return (
+                self.conn.execute("SELECT 1 FROM meta WHERE key='built'").fetchone()
+                is not None
+            )
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        embs = np.array(list(get_embedder().embed(texts)), dtype=np.float32)
+        norms = np.linalg.norm(embs, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embs / norms
+
+    def _remove_file(self, path: str):
+        self.conn.execute(
+            "DELETE FROM postings WHERE chunk_id IN (SELECT id FROM chunks WHERE path=?)",
+            (path,),
+        )
+        self.conn.execute("DELETE FROM chunks WHERE path=?", (path,))
+        self.conn.execute("DELETE FROM files WHERE path=?", (path,))
+
+    def scan(self) -> tuple[list, list]:
+        """(arquivos novos/alterados, arquivos removidos) desde o último update."""
+        with self.lock:
+            indexed = {
+                path: (mtime_ns, size)
+                for path, mtime_ns, size in self.conn.execute(
+                    "SELECT path, mtime_ns, size FROM files"
+                )
+            }
+        seen = set()
+        stale = []
+        for fpath in iter_code_files(self.base_dir):
             try:
-                with open(fpath, "r", encoding="utf-8", errors="ignore") as f:
-                    code = f.read()
-            except Exception:
+                st = os.stat(fpath)
+            except OSError:
                 continue
+            seen.add(fpath)
+            if indexed.get(fpath) != (st.st_mtime_ns, st.st_size):
+                stale.append((fpath, st.st_mtime_ns, st.st_size))
+        removed = [path for path in indexed if path not in seen]
+        return stale, removed
 
-            # quebrar em blocos
-            chunks = re.split(r"\n\s*\n", code)
-            for chunk in chunks:
-                chunk = chunk.strip()
-                if len(chunk) > 0:
-                    snippets.append(
-                        {"path": fpath, "code": chunk[:max_chars_per_chunk]}
-                    )
-    return snippets
+    def update(self, changes=None) -> dict:
+        """Sincroniza o índice com o disco via (mtime, size) de cada arquivo;
+        changes é o resultado de um scan() recente, se houver."""
+        with self.lock:
+            return self._update(*(changes or self.scan()))
+
+    def _update(self, stale, removed) -> dict:
+        for path in removed:
+            self._remove_file(path)
+
+        pending = []  # (path, code)
+        for fpath, mtime_ns, size in stale:
+            self._remove_file(fpath)
+            self.conn.execute(
+                "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                (fpath, mtime_ns, size),
+            )
+            pending.extend((fpath, code) for code in chunk_file(fpath))
+
+        for start in range(0, len(pending), EMBED_BATCH_SIZE):
+            batch = pending[start : start + EMBED_BATCH_SIZE]
+            embs = self.embed([code for _, code in batch])
+            for (fpath, code), emb in zip(batch, embs):
+                tokens = tokenize(code)
+                chunk_id = self.conn.execute(
+                    "INSERT INTO chunks (path, code, length, embedding) VALUES (?, ?, ?, ?)",
+                    (fpath, code, len(tokens), emb.tobytes()),
+                ).lastrowid
+                counts = Counter(tokens)
+                self.conn.executemany(
+                    "INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)",
+                    [(term, chunk_id, tf) for term, tf in counts.items()],
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO terms (term) VALUES (?)",
+                    [(term,) for term in counts],
+                )
+        if stale or removed:
+            self.conn.execute(
+                "DELETE FROM terms WHERE term NOT IN (SELECT term FROM postings)"
+            )
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', '1')")
+        self.conn.commit()
+        return {"updated": len(stale), "removed": len(removed), "chunks": len(pending)}
+
+    def _query_terms(self, query: str) -> dict[str, float]:
+        """Termos a buscar e seus pesos: cada termo da query e, como no antigo
+        regex do ag, os termos indexados que o contêm (token -> tokenize)."""
+        weights: dict[str, float] = {}
+        for term in tokenize(query):
+            weights[term] = 1.0
+            if len(term) < MIN_SUBSTRING_LEN:
+                continue
+            for (indexed,) in self.conn.execute(
+                "SELECT term FROM terms WHERE instr(term, ?) > 0 AND term != ? LIMIT ?",
+                (term, term, MAX_SUBSTRING_TERMS),
+            ):
+                weights.setdefault(indexed, SUBSTRING_WEIGHT)
+        return weights
+
+    def bm25_candidates(self, query: str, globs=["*.*"], top_n=50) -> list[int]:
+        """Okapi BM25 sobre as postings gravadas; devolve ids dos top_n chunks."""
+        with self.lock:
+            return self._bm25_candidates(query, globs, top_n)
+
+    def _bm25_candidates(self, query, globs, top_n) -> list[int]:
+        n_docs, avgdl = self.conn.execute(
+            "SELECT COUNT(*), AVG(length) FROM chunks"
+        ).fetchone()
+        if not n_docs:
+            return []
+        avgdl = avgdl or 1.0
+
+        scores: dict[int, float] = {}
+        paths: dict[int, str] = {}
+        for term, weight in self._query_terms(query).items():
+            rows = self.conn.execute(
+                "SELECT p.chunk_id, p.tf, c.length, c.path FROM postings p "
+                "JOIN chunks c ON c.id = p.chunk_id WHERE p.term = ?",
+                (term,),
+            ).fetchall()
+            if not rows:
+                continue
+            df = len(rows)
+            idf = max(
+                math.log(n_docs - df + 0.5) - math.log(df + 0.5), BM25_IDF_FLOOR
+            )
+            for chunk_id, tf, length, path in rows:
+                denom = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+                scores[chunk_id] = (
+                    scores.get(chunk_id, 0.0)
+                    + weight * idf * tf * (BM25_K1 + 1) / denom
+                )
+                paths[chunk_id] = path
+
+        matching = (
+            chunk_id
+            for chunk_id in scores
+            if any(fnmatch.fnmatch(paths[chunk_id], glob) for glob in globs)
+        )
+        return heapq.nlargest(top_n, matching, key=scores.__getitem__)
+
+    def search(self, query: str, globs=["*.*"], top_n=10, bm25_top_n=50):
+        candidate_ids = self.bm25_candidates(query, globs, bm25_top_n)
+        if not candidate_ids:
+            return []
+
+        placeholders = ",".join("?" * len(candidate_ids))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT path, code, embedding FROM chunks WHERE id IN ({placeholders})",
+                candidate_ids,
+            ).fetchall()
+        code_embs = np.stack([np.frombuffer(emb, dtype=np.float32) for *_, emb in rows])
+        query_emb = self.embed([query])[0]
+        sims = code_embs @ query_emb
+
+        ranked = sorted(zip(rows, sims), key=lambda x: x[1], reverse=True)
+        return [
+            {"path": path, "code": code, "score": round(float(score), 4)}
+            for (path, code, _), score in ranked[:top_n]
+        ]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_indexes: dict[str, CodeIndex] = {}
+_updaters: dict[str, threading.Thread] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(base_dir="src") -> CodeIndex:
+    """Um CodeIndex aberto por repositório, reaproveitado entre consultas."""
+    key = os.path.realpath(base_dir)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = CodeIndex(base_dir)
+        return _indexes[key]
+
+
+def _background_update(base_dir):
+    index = CodeIndex(base_dir)  # conexão própria; não segura o lock das consultas
+    try:
+        index.update()
+    finally:
+        index.close()
+
+
+def update_in_background(base_dir="src"):
+    """Inicia a atualização do índice numa thread, se ainda não houver uma."""
+    key = os.path.realpath(base_dir)
+    with _indexes_lock:
+        thread = _updaters.get(key)
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(
+                target=_background_update, args=(base_dir,), daemon=True
+            )
+            _updaters[key] = thread
+            thread.start()
+
+
+def is_updating(base_dir="src") -> bool:
+    thread = _updaters.get(os.path.realpath(base_dir))
+    return thread is not None and thread.is_alive()
 
 
 # ===================================
@@ -166,7 +515,7 @@ def bm25_filter(snippets, query, top_n=50):
 
 
 def semantic_rerank(snippets, query, top_n=10):
-    embedder = TextEmbedding(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    embedder = get_embedder()
 
     query_emb = np.array(list(embedder.embed([query])))[0]
     code_embs = np.array(list(embedder.embed([s["code"] for s in snippets])))
@@ -182,8 +531,22 @@ def semantic_rerank(snippets, query, top_n=10):
     ]
 
 
-def search_codebase(query: str, base_dir="src", globs=["*.*"],top_n=10):
-    # snippets = collect_code_snippets(base_dir)
+def search_codebase(
+    query: str, base_dir="src", globs=["*.*"], top_n=10, use_index=True
+):
+    if use_index:
+        index = get_code_index(base_dir)
+        if not is_updating(base_dir) and index.is_built():
+            changes = index.scan()
+            stale, removed = changes
+            if len(stale) + len(removed) <= INLINE_UPDATE_FILES:
+                index.update(changes)
+                return index.search(query, globs, top_n)
+        # primeira indexação (ou mudança grande) roda em background; até
+        # terminar, a consulta usa o caminho antigo
+        update_in_background(base_dir)
+
+    # caminho antigo: ag + BM25 e embeddings recalculados a cada consulta
     snippets = ag_search(query, rootProject=base_dir, globs=globs)
     if not snippets:
         return []
@@ -193,10 +556,40 @@ def search_codebase(query: str, base_dir="src", globs=["*.*"],top_n=10):
     return ranked
 
 
+def benchmark(query: str, base_dir="src", runs=5, use_index=True) -> dict:
+    """Latência da primeira consulta (modelo frio) vs. das seguintes (modelo em memória)."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        search_codebase(query, base_dir, use_index=use_index)
+        timings.append(time.perf_counter() - start)
+    steady = sorted(timings[1:])
+    return {
+        "first_query_s": round(timings[0], 4),
+        "steady_state_median_s": round(steady[len(steady) // 2], 4) if steady else None,
+        "runs": runs,
+    }
+
+
 if __name__ == "__main__":
+    import argparse
     from pprint import pprint
 
-    ranked = search_codebase(
-        "token image", base_dir="/home/ronnas/develop/lingopass/lingospace-backend"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("query")
+    parser.add_argument("--base-dir", default="src")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--no-index", action="store_true")
+    parser.add_argument(
+        "--bench", type=int, metavar="RUNS", help="mede primeira consulta vs. steady-state"
     )
-    pprint(ranked)
+    args = parser.parse_args()
+
+    if args.bench:
+        pprint(benchmark(args.query, args.base_dir, args.bench, not args.no_index))
+    else:
+        pprint(
+            search_codebase(
+                args.query, args.base_dir, top_n=args.top_n, use_index=not args.no_index
+            )
+        )